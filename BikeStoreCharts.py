@@ -0,0 +1,441 @@
+'''
+This file contains ChartPanel, the chart engine of the dashboards, and the ChartRenderer that draws the
+panels off the GUI thread.
+Every dashboard panel keeps one matplotlib Figure on an Agg canvas for the life of the dialog.
+Bar and line charts whose categories did not change are updated in place (bar heights, line data),
+other charts are redrawn on the cleared axes of the same figure. The figures are rasterized by a
+single ChartRenderer worker thread and shown as images, so the GUI thread never runs matplotlib.
+The rendered images are cached by (chart, query, parameters, warehouse generation): revisiting a filter
+combination shows the cached image at once, without a query or a redraw.
+The figures use the object-oriented Figure API, so they are not registered with pyplot and do not
+have to be closed.
+
+Author: SQLWeavers
+File: BikeStoreCharts.py
+Course: Data 225
+Project: TerraBikes
+'''
+
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from PyQt5.QtWidgets import QLabel
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QImage, QPixmap
+from matplotlib.colors import to_hex, to_rgb
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+def light_palette(color, n_colors=6):
+    """
+    Returns colors blending from a very light gray to a color, as seaborn.light_palette does.
+
+    Args:
+        color (str): The darkest color, any matplotlib color.
+        n_colors (int): The number of colors. Default is 6.
+
+    Returns:
+        list: The colors as hex strings, lightest first.
+    """
+    light = np.array([0.95, 0.95, 0.95])
+    blend = np.linspace(0, 1, n_colors)[:, np.newaxis]
+    return [to_hex(rgb) for rgb in light + blend * (np.array(to_rgb(color)) - light)]
+
+
+class ChartImageCache:
+    """
+    A thread-safe LRU cache of rendered chart images.
+
+    Images expire after a time to live, like the query results they are drawn from, and the least
+    recently used images are dropped once the images exceed the memory limit. The callers put the
+    published generation of the warehouse into every key, so an image is not reused once a refresh
+    they have seen has been published.
+    """
+
+    def __init__(self, ttl=600, max_bytes=64 * 1024 * 1024):
+        """
+        Initializes the cache.
+
+        Args:
+            ttl (int): Seconds a cached image stays valid. Default is 600.
+            max_bytes (int): The memory limit of the cached images in bytes. Default is 64 MB.
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns a cached image.
+
+        Args:
+            key (tuple): The chart key.
+
+        Returns:
+            QImage: The image, or None if the chart is not cached or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            image, stored = entry
+            if time.monotonic() - stored > self.ttl:
+                del self._entries[key]
+                self._size -= image.byteCount()
+                return None
+            self._entries.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        """
+        Stores a rendered image.
+
+        Args:
+            key (tuple): The chart key.
+            image (QImage): The rendered chart.
+        """
+        size = image.byteCount()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[0].byteCount()
+            self._entries[key] = (image, time.monotonic())
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= evicted.byteCount()
+
+    def clear(self):
+        """
+        Drops every cached image.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class _RenderSignals(QObject):
+    """
+    Signals emitted by a _RenderJob from the renderer thread.
+    """
+    rendered = pyqtSignal(object, object, object)
+    failed = pyqtSignal(object, object, str)
+
+
+class _RenderJob(QRunnable):
+    """
+    Paints one chart on the figure of its panel and rasterizes the figure to a QImage.
+    """
+
+    def __init__(self, panel, key, paint):
+        super(_RenderJob, self).__init__()
+        self.panel = panel
+        self.key = key
+        self.paint = paint
+        self.signals = _RenderSignals()
+
+    def run(self):
+        # The panel may have moved on to another filter combination while this job was queued
+        if self.panel._key != self.key:
+            self.signals.rendered.emit(self.panel, self.key, None)
+            return
+        try:
+            self.paint(self.panel)
+            image = self.panel._rasterize()
+        except Exception as e:
+            # The figure may be half drawn, the next chart of the panel is drawn from scratch
+            self.panel._bars = None
+            self.panel._lines = None
+            self.signals.failed.emit(self.panel, self.key, str(e))
+            return
+        self.signals.rendered.emit(self.panel, self.key, image)
+
+
+class ChartRenderer(QObject):
+    """
+    Rasterizes chart panels on one worker thread and caches the images.
+
+    matplotlib is not thread-safe, so all figures are drawn on the same thread, one after the other.
+    A chart that fails to draw shows its "No Data" placeholder and renderFailed is emitted on the GUI thread.
+    panelShown is emitted with the chart name whenever a panel shows its current chart, a rendered or cached
+    image or the "No Data" placeholder.
+    """
+
+    renderFailed = pyqtSignal(str, str)
+    panelShown = pyqtSignal(str)
+
+    def __init__(self, cache=None, parent=None):
+        """
+        Initializes the renderer.
+
+        Args:
+            cache (ChartImageCache): The image cache. Defaults to None, meaning a new cache.
+            parent (QObject): The parent object. Defaults to None.
+        """
+        super(ChartRenderer, self).__init__(parent)
+        self.cache = cache if cache is not None else ChartImageCache()
+        self._threadPool = QThreadPool()
+        self._threadPool.setMaxThreadCount(1)
+
+    def submit(self, panel, key, paint):
+        """
+        Queues a chart for rendering.
+
+        Args:
+            panel (ChartPanel): The panel the chart is drawn on.
+            key (tuple): The chart key.
+            paint (callable): Called on the renderer thread with the panel to draw the chart.
+        """
+        job = _RenderJob(panel, key, paint)
+        job.signals.rendered.connect(self._onRendered)
+        job.signals.failed.connect(self._onFailed)
+        self._threadPool.start(job)
+
+    @pyqtSlot(object, object, object)
+    def _onRendered(self, panel, key, image):
+        if image is None:
+            return
+        self.cache.put(key, image)
+        if panel._key == key:
+            panel._showImage(image)
+
+    @pyqtSlot(object, object, str)
+    def _onFailed(self, panel, key, message):
+        if panel._key == key:
+            panel.showNoData()
+        self.renderFailed.emit(panel.name, message)
+
+    def clear(self):
+        """
+        Drops the queued renders and the cached images.
+        """
+        self._threadPool.clear()
+        self.cache.clear()
+
+
+class ChartPanel:
+    """
+    A persistent chart figure, the label showing its image and its "No Data" placeholder in a dashboard layout.
+    """
+
+    def __init__(self, layout, figsize, renderer, name, dpi=100):
+        """
+        Initializes the panel and adds its image label to the layout, replacing whatever the layout holds.
+
+        Args:
+            layout (QLayout): The layout of the panel.
+            figsize (tuple): The figure size in inches.
+            renderer (ChartRenderer): The renderer that draws the panel.
+            name (str): The chart name, part of the image cache keys.
+            dpi (int): The resolution of the rendered image. Default is 100.
+        """
+        while layout.count():
+            item = layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+        self.renderer = renderer
+        self.name = name
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.image = QLabel()
+        self.image.setAlignment(Qt.AlignCenter)
+        self.noData = QLabel("No Data")
+        self.noData.setStyleSheet("color: white; background-color: DodgerBlue;")
+        self.noData.setAlignment(Qt.AlignCenter)
+        self.noData.hide()
+        layout.addWidget(self.image)
+        layout.addWidget(self.noData)
+        self._key = None
+        self._bars = None
+        self._barTexts = None
+        self._barLabels = None
+        self._lines = None
+        self._lineKeys = None
+
+    def show(self, sql, params, generation):
+        """
+        Selects the chart of a query for the panel and shows its cached image, if there is one.
+
+        Args:
+            sql (str): The SQL template of the chart data.
+            params (tuple): The bind parameters.
+            generation (int): The published generation of the warehouse the chart data is read from.
+
+        Returns:
+            bool: True if the cached image is shown and the chart does not have to be queried or drawn.
+        """
+        self._key = (self.name, sql, tuple(params or ()), generation)
+        image = self.renderer.cache.get(self._key)
+        if image is None:
+            return False
+        self._showImage(image)
+        return True
+
+    def render(self, paint):
+        """
+        Draws the chart selected by the last show() call on the renderer thread.
+
+        Args:
+            paint (callable): Called with the panel to draw the chart, with reset(), bar(), lines()
+                and decorate() or directly on the axes.
+        """
+        self.renderer.submit(self, self._key, paint)
+
+    def showNoData(self):
+        """
+        Hides the chart and shows the "No Data" placeholder.
+        """
+        self.image.hide()
+        self.noData.show()
+        self.renderer.panelShown.emit(self.name)
+
+    def _showImage(self, image):
+        self.image.setPixmap(QPixmap.fromImage(image))
+        self.noData.hide()
+        self.image.show()
+        self.renderer.panelShown.emit(self.name)
+
+    def _rasterize(self):
+        """
+        Draws the figure on the Agg canvas and copies the pixels to a QImage.
+        """
+        self.canvas.draw()
+        width, height = self.canvas.get_width_height()
+        return QImage(bytes(self.canvas.buffer_rgba()), width, height, QImage.Format_RGBA8888).copy()
+
+    def reset(self):
+        """
+        Clears the axes for a chart that is drawn from scratch.
+
+        Returns:
+            Axes: The cleared axes.
+        """
+        self._bars = None
+        self._lines = None
+        self.ax.clear()
+        return self.ax
+
+    def _rescale(self):
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+    def bar(self, labels, values, colors=None, value_labels=True, fontsize=8):
+        """
+        Draws a bar chart. If the categories are the same as in the last call, only the bar heights
+        and value labels are updated.
+
+        Args:
+            labels (list): The category of each bar.
+            values (list): The height of each bar.
+            colors (list): The bar colors. Defaults to None, meaning the default colors.
+            value_labels (bool): Whether the values are written above the bars. Default is True.
+            fontsize (int): The font size of the value labels. Default is 8.
+
+        Returns:
+            Axes: The axes of the chart.
+        """
+        labels = list(labels)
+        if self._bars is not None and self._barLabels == labels:
+            for bar, value in zip(self._bars, values):
+                bar.set_height(value)
+            for text, value in zip(self._barTexts, values):
+                text.set_y(value)
+                text.set_text(str(round(value, 2)))
+            self._rescale()
+        else:
+            ax = self.reset()
+            self._bars = ax.bar(labels, values, color=colors)
+            self._barLabels = labels
+            self._barTexts = []
+            if value_labels:
+                for bar, value in zip(self._bars, values):
+                    self._barTexts.append(ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height(),
+                                                  round(value, 2), ha='center', va='bottom', fontsize=fontsize))
+        return self.ax
+
+    def lines(self, series, legend_loc='best', legend_fontsize=8):
+        """
+        Draws one line per series. If the series and their x values are the same as in the last call,
+        only the y data of the lines is updated.
+
+        Args:
+            series (list): (label, x values, y values) of every line.
+            legend_loc (str): The legend location. Default is 'best'.
+            legend_fontsize (int): The legend font size. Default is 8.
+
+        Returns:
+            Axes: The axes of the chart.
+        """
+        keys = [(label, list(xs)) for label, xs, _ in series]
+        if self._lines is not None and self._lineKeys == keys:
+            for line, (_, _, ys) in zip(self._lines, series):
+                line.set_ydata(ys)
+            self._rescale()
+        else:
+            ax = self.reset()
+            self._lines = [ax.plot(list(xs), list(ys), label=str(label))[0] for label, xs, ys in series]
+            self._lineKeys = keys
+            ax.legend(loc=legend_loc, fontsize=legend_fontsize)
+        return self.ax
+
+    def grouped_bars(self, index, columns, matrix, colors=None, stacked=False, width=0.5, legend_title=None):
+        """
+        Draws one group of bars per matrix row and one bar per matrix column, side by side or stacked.
+
+        Args:
+            index (list): The label of every matrix row, written under its group.
+            columns (list): The label of every matrix column, shown in the legend.
+            matrix (ndarray): The bar heights, one row per group. NaN heights draw no bar.
+            colors (list): The colors of the columns, repeated if there are more columns. Defaults to None,
+                meaning the default colors.
+            stacked (bool): Whether the bars of a group are stacked. Default is False.
+            width (float): The width of a group. Default is 0.5.
+            legend_title (str): The legend title. Defaults to None, meaning no title.
+
+        Returns:
+            Axes: The axes of the chart.
+        """
+        ax = self.reset()
+        positions = np.arange(len(index))
+        bottom = np.zeros(len(index))
+        for position, column in enumerate(columns):
+            color = colors[position % len(colors)] if colors else None
+            heights = matrix[:, position]
+            if stacked:
+                ax.bar(positions, heights, width, bottom=bottom, color=color, label=str(column))
+                bottom = bottom + np.nan_to_num(heights)
+            else:
+                offsets = positions - width / 2 + width * (position + 0.5) / len(columns)
+                ax.bar(offsets, heights, width / len(columns), color=color, label=str(column))
+        ax.set_xticks(positions)
+        ax.set_xticklabels([str(label) for label in index])
+        ax.legend(title=legend_title)
+        return ax
+
+    def decorate(self, title, xlabel=None, ylabel=None, title_fontsize=10, label_fontsize=8, tick_fontsize=None):
+        """
+        Sets the title, axis labels and tick label sizes of the chart.
+
+        Args:
+            title (str): The chart title.
+            xlabel (str): The x axis label. Defaults to None, meaning no label.
+            ylabel (str): The y axis label. Defaults to None, meaning no label.
+            title_fontsize (int): The title font size. Default is 10.
+            label_fontsize (int): The axis label font size. Default is 8.
+            tick_fontsize (int): The tick label font size. Defaults to None, meaning unchanged.
+        """
+        self.ax.set_title(title, fontsize=title_fontsize)
+        if xlabel is not None:
+            self.ax.set_xlabel(xlabel, fontsize=label_fontsize)
+        if ylabel is not None:
+            self.ax.set_ylabel(ylabel, fontsize=label_fontsize)
+        if tick_fontsize is not None:
+            self.ax.tick_params(axis='x', labelsize=tick_fontsize)
+            self.ax.tick_params(axis='y', labelsize=tick_fontsize)
@@ -0,0 +1,167 @@
+'''
+This file contains ColumnarResult, a lightweight column store of query results used by the dashboard
+charts in place of pandas DataFrames.
+Every column is one NumPy array, typed by the column types of the cursor description or given by the
+caller: integer columns become int64 arrays (float64 if they hold NULLs), DECIMAL and floating point
+columns float64 arrays with NULL as NaN, and all other columns object arrays. pivot() and groups()
+are vectorized with np.unique, so a chart's data is built without a per-row Python loop.
+pandas is optional, to_frame() imports it only when it is called.
+
+Author: SQLWeavers
+File: BikeStoreColumns.py
+Course: Data 225
+Project: TerraBikes
+'''
+
+import numpy as np
+from mysql.connector import FieldType
+
+_INTEGER_TYPES = {FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.LONGLONG,
+                  FieldType.INT24, FieldType.YEAR}
+_FLOAT_TYPES = {FieldType.DECIMAL, FieldType.NEWDECIMAL, FieldType.FLOAT, FieldType.DOUBLE}
+
+
+def column_dtype(type_code):
+    """
+    Returns the NumPy type of a column of a MySQL type.
+
+    Args:
+        type_code (int): The FieldType of the column, as in the cursor description.
+
+    Returns:
+        type: int, float or object.
+    """
+    if type_code in _INTEGER_TYPES:
+        return int
+    if type_code in _FLOAT_TYPES:
+        return float
+    return object
+
+
+def _to_array(values, dtype):
+    if dtype is int:
+        if None in values:
+            return np.array([np.nan if value is None else float(value) for value in values], dtype=float)
+        # SUM() of an integer column comes back as a Decimal
+        return np.array([int(value) for value in values], dtype=np.int64)
+    if dtype is float:
+        # float() accepts Decimal, NULL becomes NaN
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=float)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+class ColumnarResult:
+    """
+    Query result rows stored as one NumPy array per column.
+    """
+
+    def __init__(self, names, arrays):
+        """
+        Initializes the result.
+
+        Args:
+            names (list): The column names.
+            arrays (list): The column arrays, all of the same length.
+        """
+        self.names = list(names)
+        self._columns = dict(zip(self.names, arrays))
+
+    @classmethod
+    def from_rows(cls, rows, names, dtypes=None):
+        """
+        Builds a result from fetched rows.
+
+        Args:
+            rows (list): The rows.
+            names (list): The column names.
+            dtypes (list): int, float or object for every column. Defaults to None, meaning object columns.
+
+        Returns:
+            ColumnarResult: The result.
+        """
+        if dtypes is None:
+            dtypes = [object] * len(names)
+        columns = list(zip(*rows)) if rows else [()] * len(names)
+        return cls(names, [_to_array(list(values), dtype) for values, dtype in zip(columns, dtypes)])
+
+    @classmethod
+    def from_cursor(cls, cursor, names=None):
+        """
+        Fetches the rows of an executed statement, with the column types of the cursor description.
+
+        Args:
+            cursor (MySQLCursor): The cursor the statement was executed on.
+            names (list): The column names. Defaults to None, meaning the names of the description.
+
+        Returns:
+            ColumnarResult: The result.
+        """
+        description = cursor.description
+        rows = cursor.fetchall()
+        if names is None:
+            names = [column[0] for column in description]
+        return cls.from_rows(rows, names, [column_dtype(column[1]) for column in description])
+
+    def __len__(self):
+        if not self.names:
+            return 0
+        return len(self._columns[self.names[0]])
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def take(self, rows):
+        """
+        Returns the selected rows.
+
+        Args:
+            rows (ndarray): The row positions or a boolean mask.
+
+        Returns:
+            ColumnarResult: The selected rows.
+        """
+        return ColumnarResult(self.names, [self._columns[name][rows] for name in self.names])
+
+    def groups(self, name):
+        """
+        Splits the rows by the values of a column, in the order the values first appear.
+
+        Args:
+            name (str): The column name.
+
+        Returns:
+            list: (value, ColumnarResult) of every distinct value.
+        """
+        values, first, inverse = np.unique(self._columns[name], return_index=True, return_inverse=True)
+        return [(values[group], self.take(inverse == group)) for group in np.argsort(first)]
+
+    def pivot(self, index, columns, values, fill=0.0):
+        """
+        Reshapes the rows into a matrix with one row per index value and one column per columns value.
+
+        Args:
+            index (str): The column whose values label the matrix rows.
+            columns (str): The column whose values label the matrix columns.
+            values (str): The column of the matrix values.
+            fill (float): The value of combinations without a row. Default is 0.0, use NaN for none.
+
+        Returns:
+            tuple: The sorted index labels (ndarray), the sorted column labels (ndarray) and the matrix (ndarray).
+        """
+        rowLabels, rowPositions = np.unique(self._columns[index], return_inverse=True)
+        columnLabels, columnPositions = np.unique(self._columns[columns], return_inverse=True)
+        matrix = np.full((len(rowLabels), len(columnLabels)), fill, dtype=float)
+        matrix[rowPositions, columnPositions] = self._columns[values]
+        return rowLabels, columnLabels, matrix
+
+    def to_frame(self):
+        """
+        Returns the result as a pandas DataFrame. Requires pandas.
+
+        Returns:
+            DataFrame: The result.
+        """
+        import pandas as pd
+        return pd.DataFrame({name: self._columns[name] for name in self.names}, columns=self.names)
@@ -12,12 +12,14 @@ Project: TerraBikes GUI
 Course: Data 225
 '''
 import sys
-from PyQt5.QtWidgets import QDialog, QApplication, QStackedWidget, QLabel, QTableWidgetItem, QComboBox,QSpinBox
+from PyQt5.QtWidgets import QDialog, QApplication, QStackedWidget, QLabel, QComboBox,QSpinBox
 from PyQt5.QtWidgets import QWidget, QTextEdit, QMessageBox
 from BikeStoreCustMainDialog_ui import Ui_BikeStoreCustMainDialog
-from BikeStoreUtils import create_connection
+from BikeStoreUtils import create_connection, get_product_catalogue
+from BikeStoreTableModel import fill_table
+from BikeStoreOrders import OrderService
 from datetime import datetime
-from PyQt5.QtCore import pyqtSlot,Qt
+from PyQt5.QtCore import pyqtSlot
 
 class BikeStoreCustMain(QDialog):
     """
@@ -84,7 +86,7 @@ class BikeStoreCustMain(QDialog):
         sql = """select concat(first_name,' ',c.last_name)
                 from users u, customer c
                 where c.customer_id = u.customer_id
-                and upper(u.username) = upper(%s)"""
+                and u.username = %s"""
         self.cursor.execute(sql, (_username,))
         result = self.cursor.fetchall()
 
@@ -114,7 +116,7 @@ class BikeStoreCustMain(QDialog):
             sql = """
                     select o.order_id, o.order_status, o.ordered_date, o.shipped_date, concat(e.first_name, ' ', e.last_name) as "Sales Rep"
                     from orders o, employee e, customer c, users u
-                    where upper(u.username) = upper(%s)
+                    where u.username = %s
                     AND u.customer_id = c.customer_id
                     AND o.employee_id = e.employee_id
                     AND o.customer_id = c.customer_id;
@@ -133,14 +135,7 @@ class BikeStoreCustMain(QDialog):
                 stackCustPortalWidgets = self.ui.CustomerPortalStacked.currentWidget()
                 tableOrders = self.ui.tblPg1Orders
 
-                tableOrders.setRowCount(len(result))
-                for i, row in enumerate(result):
-                    for j, col in enumerate(row):
-                        item = QTableWidgetItem(str(col))
-                        tableOrders.setItem(i, j, item)
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                tableOrders.resizeColumnsToContents()
-                tableOrders.setSortingEnabled(True)
+                fill_table(tableOrders, result)
                 
 
     def on_tblPg1Orders_cellClicked(self, row, column):
@@ -175,14 +170,7 @@ class BikeStoreCustMain(QDialog):
 
             tableOrdersDetails = self.ui.tblPg1OrderDetails
 
-            tableOrdersDetails.setRowCount(len(result))
-            for i, row in enumerate(result):
-                for j, col in enumerate(row):
-                    item = QTableWidgetItem(str(col))
-                    tableOrdersDetails.setItem(i, j, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            tableOrdersDetails.resizeColumnsToContents()
-            tableOrdersDetails.setSortingEnabled(True)
+            fill_table(tableOrdersDetails, result)
 
     def on_btnOrdersLarge_toggled(self):
         """
@@ -228,14 +216,15 @@ class BikeStoreCustMain(QDialog):
                 lblTotalPrice = self.ui.widget.findChild(QLabel, 'lblTotPrice')
                 lblTotalPrice.setText('0.0')
 
-        sql="""select CONCAT(product_id,' - ',product_name) as product from products"""
-        self.cursor.execute(sql)
-        result = self.cursor.fetchall()
-        if len(result) > 0:
+        # Prices and stock come from the product catalogue, refreshed once when the form is set up
+        catalogue = get_product_catalogue()
+        catalogue.refresh()
+        choices = catalogue.choices()
+        if len(choices) > 0:
             for i in range(1, 6):
                 widgetProd = self.ui.widget.findChild(QWidget, 'widgetProd'+str(i))
                 OrderPgProd = widgetProd.findChild(QComboBox, 'OrderPgProd'+str(i))
-                OrderPgProd.addItems([i[0] for i in result])
+                OrderPgProd.addItems(choices)
 
     def populatePriceQuantity(self, index_num):
         """
@@ -255,17 +244,16 @@ class BikeStoreCustMain(QDialog):
 
         product_id = OrderPgProd.currentText().split(' - ')[0]
         
-        sql = """select price,quantity,discount_percent from products where product_id = %s"""
-        self.cursor.execute(sql,(product_id,))
-        result = self.cursor.fetchall()
+        snapshot = get_product_catalogue().snapshot(product_id)
 
-        if len(result) > 0:
-            lblPrice.setText(str(result[0][0]))
-            if result[0][2] != None:
-                DiscountAmount = round(float((result[0][0] * result[0][2])/100),2)
+        if snapshot is not None:
+            price, quantity, discountPercent = snapshot
+            lblPrice.setText(str(price))
+            if discountPercent != None:
+                DiscountAmount = round(float((price * discountPercent)/100),2)
                 txtDiscount.setText(str(DiscountAmount))
             sbQuantity.setMinimum(0)
-            sbQuantity.setMaximum(result[0][1])
+            sbQuantity.setMaximum(quantity)
 
     def calculateSubtotals(self, index_num):
         """
@@ -313,44 +301,35 @@ class BikeStoreCustMain(QDialog):
             QMessageBox.warning(self, "Warning", "Please select a product to order")
             return
         else: 
-            self.conn.autocommit = True
-            self.cursor.execute("SELECT InsertOrder(%s, %s)", (self._username, 'ONL_DIRECT'))
-            _order_id = self.cursor.fetchone()[0]
-            # conn.commit()
-
-            if _order_id != None or _order_id != 0:
-                _orderDetailIDs = []
-                for i in range(1, 6):
-                    widgetProd = self.ui.widget.findChild(QWidget, 'widgetProd'+str(i))
-                    if not widgetProd.isVisible():
-                        break
-                    else:
-                        OrderPgProd = widgetProd.findChild(QComboBox, 'OrderPgProd'+str(i))
-                        sbQuantity = widgetProd.findChild(QSpinBox, 'sbQuantity'+str(i))
-                        txtDiscount = widgetProd.findChild(QLabel, 'txtDiscount'+str(i))
-                        lblSubtotal = widgetProd.findChild(QLabel, 'lblSubtotal'+str(i))
-                        product_id = OrderPgProd.currentText().split(' - ')[0]
-                        quantity = float(sbQuantity.value())
-                        if txtDiscount.text() == '':
-                            discount = 0
-                        else:    
-                            discount = float(txtDiscount.text())
-                        subtotal = float(lblSubtotal.text())
-                        if quantity > 0:
-                            orderDetailArgs = [_order_id, product_id, quantity, discount, subtotal]
-                            self.cursor.execute("SELECT InsertOrderDetails(%s,%s,%s,%s,%s)", orderDetailArgs)
-                            _orderDetailID = self.cursor.fetchone()[0]
-                            self.conn.commit()
-                            if _orderDetailID != None:
-                                _orderDetailIDs.append(_orderDetailID)
-                if len(_orderDetailIDs) > 0:
-                    QMessageBox.information(self, "Success", "Order Submitted Successfully")
-                    self.conn.commit()
-                    self._setProductSelection()
-                    self.ui.btnOrdersLarge.setChecked(True)
-                    self.on_btnOrdersLarge_toggled()
+            lines = []
+            for i in range(1, 6):
+                widgetProd = self.ui.widget.findChild(QWidget, 'widgetProd'+str(i))
+                if not widgetProd.isVisible():
+                    break
                 else:
-                    QMessageBox.warning(self, "Warning", "Order Submission Failed")
+                    OrderPgProd = widgetProd.findChild(QComboBox, 'OrderPgProd'+str(i))
+                    sbQuantity = widgetProd.findChild(QSpinBox, 'sbQuantity'+str(i))
+                    txtDiscount = widgetProd.findChild(QLabel, 'txtDiscount'+str(i))
+                    lblSubtotal = widgetProd.findChild(QLabel, 'lblSubtotal'+str(i))
+                    product_id = OrderPgProd.currentText().split(' - ')[0]
+                    quantity = float(sbQuantity.value())
+                    if txtDiscount.text() == '':
+                        discount = 0
+                    else:    
+                        discount = float(txtDiscount.text())
+                    subtotal = float(lblSubtotal.text())
+                    if quantity > 0:
+                        lines.append((product_id, quantity, discount, subtotal))
+            try:
+                # The order and all of its lines are stored in one transaction
+                OrderService().submit({'customer_username': self._username, 'employee_username': 'ONL_DIRECT'}, lines)
+            except Exception:
+                QMessageBox.warning(self, "Warning", "Order Submission Failed")
+                return
+            QMessageBox.information(self, "Success", "Order Submitted Successfully")
+            self._setProductSelection()
+            self.ui.btnOrdersLarge.setChecked(True)
+            self.on_btnOrdersLarge_toggled()
     
     # Handle Signals for Combo Box
     def on_OrderPgProd1_currentIndexChanged(self, index):
@@ -419,7 +398,7 @@ class BikeStoreCustMain(QDialog):
         sql = """select concat('Order: ',order_id,' Status: ',order_status, ' Ordered Date: ', ordered_date)
                     from orders o, users u
                     where o.customer_id = u.customer_id
-                    and upper(u.username) = upper(%s)"""
+                    and u.username = %s"""
         self.cursor.execute(sql, (self._username,))
         resOrder = self.cursor.fetchall()
         if len(resOrder) > 0:
@@ -503,7 +482,7 @@ class BikeStoreCustMain(QDialog):
         sql = """select concat('Order: ',order_id,' Status: ',order_status, ' Ordered Date: ', ordered_date)
                     from orders o, users u
                     where o.customer_id = u.customer_id
-                    and upper(u.username) = upper(%s)"""
+                    and u.username = %s"""
         self.cursor.execute(sql, (self._username,))
         resOrder = self.cursor.fetchall()
         if len(resOrder) > 0:
@@ -515,18 +494,11 @@ class BikeStoreCustMain(QDialog):
                     where f.record_type = 'GREVIANCE'
                     and c.customer_id = f.customer_id
                     and c.customer_id = u.customer_id
-                    and upper(u.username) = upper(%s)"""
+                    and u.username = %s"""
         self.cursor.execute(sql, (self._username,))
         result = self.cursor.fetchall()
         if len(result) > 0:
-            self.ui.tblGreviances.setRowCount(len(result))
-            for i, row in enumerate(result):
-                for j, col in enumerate(row):
-                    item = QTableWidgetItem(str(col))
-                    self.ui.tblGreviances.setItem(i, j, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            self.ui.tblGreviances.resizeColumnsToContents()
-            self.ui.tblGreviances.setSortingEnabled(True)
+            fill_table(self.ui.tblGreviances, result)
 
     def on_tblGreviances_cellClicked(self, row, column):
         """
@@ -0,0 +1,225 @@
+'''
+This file contains the driver for refreshing the terrabikes_bi warehouse from the terrabikes database.
+The full refresh rebuilds every warehouse table into shadow tables with refresh_dwh_prc and publishes them
+with an atomic rename, the incremental refresh runs refresh_dwh_incr_prc, which only loads the rows changed
+since the last load. Both record their progress and the published generation in dwh_refresh_status, and both
+maintain the rollup tables of migrations/004_dashboard_rollups.sql and the materialized employee sales of
+migrations/005_employee_sales.sql the manager dashboard reads.
+
+Run this file to refresh the warehouse without the GUI, once or on a schedule, e.g. from cron:
+    python BikeStoreDwhRefresh.py --full
+    python BikeStoreDwhRefresh.py --every 60
+
+Author: SQLWeavers
+File: BikeStoreDwhRefresh.py
+Course: Data 225
+Project: TerraBikes
+'''
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from BikeStoreUtils import get_pool
+
+WAREHOUSE_TABLES = ['Product', 'Calendar', 'Region', 'Employee', 'Customer', 'Order_Details', 'Sales', 'Performance',
+                    'Employee_Sales']
+
+ROLLUP_TABLES = ['Sales_Order_Rollup', 'Sales_Product_Rollup', 'Sales_Customer_Rollup', 'Employee_Rollup']
+
+
+def refresh_warehouse(incremental=True, config_file='terrabikes_bi.ini'):
+    """
+    Refreshes the warehouse and returns the number of rows touched per table.
+
+    Args:
+        incremental (bool): Whether to load only the changed rows. Default is True.
+        config_file (str): The configuration file of the warehouse connection. Default is 'terrabikes_bi.ini'.
+
+    Returns:
+        dict: The rows touched per warehouse table. For a full refresh, the rows loaded per table.
+
+    Raises:
+        Exception: If the refresh procedure does not report success.
+    """
+    procedure = 'refresh_dwh_incr_prc' if incremental else 'refresh_dwh_prc'
+    with get_pool(config_file=config_file).connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"call {procedure}(@refresh_status)")
+        cursor.execute("select @refresh_status")
+        result = cursor.fetchall()
+        conn.commit()
+        if len(result) == 0 or result[0][0] != "Success":
+            cursor.close()
+            raise Exception(f'{procedure} failed')
+
+        rowsTouched = {}
+        if incremental:
+            cursor.execute("select table_name, rows_touched from dwh_load_watermark order by 1")
+            for table_name, rows_touched in cursor.fetchall():
+                rowsTouched[table_name] = rows_touched
+        else:
+            # A warehouse without the later migrations has no rollup or Employee_Sales table
+            for table_name in existing_tables(WAREHOUSE_TABLES + ROLLUP_TABLES, config_file):
+                cursor.execute(f"select count(*) from {table_name}")
+                rowsTouched[table_name] = cursor.fetchall()[0][0]
+        cursor.close()
+    return rowsTouched
+
+
+def refresh_progress(config_file='terrabikes_bi.ini'):
+    """
+    Returns the progress of the running or last full refresh.
+
+    Args:
+        config_file (str): The configuration file of the warehouse connection. Default is 'terrabikes_bi.ini'.
+
+    Returns:
+        tuple: The current step (str), the steps done (int) and the total number of steps (int).
+    """
+    with get_pool(config_file=config_file).cursor() as cursor:
+        cursor.execute("select step, steps_done, steps_total from dwh_refresh_status where status_id = 1")
+        result = cursor.fetchall()
+    if len(result) == 0:
+        return None, 0, 0
+    return result[0]
+
+
+def published_generation(config_file='terrabikes_bi.ini'):
+    """
+    Returns the generation of the warehouse data the dashboards currently read.
+
+    The generation is incremented every time a full or incremental refresh is published.
+
+    Args:
+        config_file (str): The configuration file of the warehouse connection. Default is 'terrabikes_bi.ini'.
+
+    Returns:
+        int: The published generation, 0 if the warehouse has never been refreshed.
+    """
+    with get_pool(config_file=config_file).cursor() as cursor:
+        cursor.execute("select generation from dwh_refresh_status where status_id = 1")
+        result = cursor.fetchall()
+    if len(result) == 0:
+        return 0
+    return result[0][0]
+
+
+def existing_tables(tables, config_file='terrabikes_bi.ini'):
+    """
+    Returns the tables of a list that exist in the warehouse, so the dashboards can tell which
+    migrations have been applied.
+
+    Args:
+        tables (list): The table names.
+        config_file (str): The configuration file of the warehouse connection. Default is 'terrabikes_bi.ini'.
+
+    Returns:
+        list: The existing tables, as named in the list.
+    """
+    placeholders = ', '.join(['%s'] * len(tables))
+    with get_pool(config_file=config_file).cursor() as cursor:
+        cursor.execute(f"""select lower(table_name) from information_schema.tables
+                           where table_schema = database() and lower(table_name) in ({placeholders})""",
+                       tuple(table_name.lower() for table_name in tables))
+        found = {row[0] for row in cursor.fetchall()}
+    return [table_name for table_name in tables if table_name.lower() in found]
+
+
+def rollups_available(config_file='terrabikes_bi.ini'):
+    """
+    Checks whether the rollup tables of migration 004 exist in the warehouse.
+
+    Args:
+        config_file (str): The configuration file of the warehouse connection. Default is 'terrabikes_bi.ini'.
+
+    Returns:
+        bool: True if every rollup table exists.
+    """
+    return len(existing_tables(ROLLUP_TABLES, config_file)) == len(ROLLUP_TABLES)
+
+
+def employee_sales_source(config_file='terrabikes_bi.ini'):
+    """
+    Returns the relation the employee dashboard queries read: the Employee_Sales table of migration 005,
+    or employee_sales_view on a warehouse without it. Both have the same columns.
+
+    Args:
+        config_file (str): The configuration file of the warehouse connection. Default is 'terrabikes_bi.ini'.
+
+    Returns:
+        str: 'employee_sales' or 'employee_sales_view'.
+    """
+    if existing_tables(['Employee_Sales'], config_file):
+        return 'employee_sales'
+    return 'employee_sales_view'
+
+
+def run_refresh(incremental=True, config_file='terrabikes_bi.ini'):
+    """
+    Refreshes the warehouse and records the duration and rows per table in dwh_refresh_log.
+
+    Failures of the refresh and of the log insert are reported on stderr instead of raised, so a scheduler
+    or the dashboard can carry on after a database outage.
+
+    Args:
+        incremental (bool): Whether to load only the changed rows. Default is True.
+        config_file (str): The configuration file of the warehouse connection. Default is 'terrabikes_bi.ini'.
+
+    Returns:
+        dict: The rows touched per warehouse table, empty if the refresh failed.
+    """
+    mode = 'Incremental' if incremental else 'Full'
+    started = datetime.now()
+    start = time.perf_counter()
+    try:
+        rowsTouched = refresh_warehouse(incremental, config_file)
+        status = 'Success'
+    except Exception as e:
+        rowsTouched = {}
+        status = 'Failed'
+        print(f'{mode} refresh failed: {e}', file=sys.stderr)
+    duration = round(time.perf_counter() - start, 2)
+
+    logRows = [(started, mode, table_name, rows, duration, status) for table_name, rows in rowsTouched.items()]
+    if len(logRows) == 0:
+        logRows = [(started, mode, None, 0, duration, status)]
+    sql = """insert into dwh_refresh_log (run_started, refresh_mode, table_name, rows_touched, duration_sec, status)
+             values (%s, %s, %s, %s, %s, %s)"""
+    try:
+        with get_pool(config_file=config_file).connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(sql, logRows)
+            conn.commit()
+            cursor.close()
+    except Exception as e:
+        print(f'Could not log the {mode.lower()} refresh: {e}', file=sys.stderr)
+    return rowsTouched
+
+
+def main(argv=None):
+    """
+    Command line entry point: refreshes the warehouse once, or every --every minutes.
+    """
+    parser = argparse.ArgumentParser(description='Refresh the terrabikes_bi warehouse.')
+    parser.add_argument('--full', action='store_true', help='rebuild every table instead of loading the changes')
+    parser.add_argument('--every', type=float, metavar='MINUTES', help='keep running and refresh every MINUTES')
+    parser.add_argument('--config', default='terrabikes_bi.ini', help='warehouse configuration file')
+    args = parser.parse_args(argv)
+
+    while True:
+        try:
+            rowsTouched = run_refresh(incremental=not args.full, config_file=args.config)
+        except Exception as e:
+            # Keep the schedule running, the next run may find the database back
+            print(f'Refresh run failed: {e}', file=sys.stderr)
+            rowsTouched = {}
+        for table_name, rows in rowsTouched.items():
+            print(f'{table_name}: {rows}')
+        if args.every is None:
+            return 0 if rowsTouched else 1
+        time.sleep(args.every * 60)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,12 +17,15 @@ Author: SQLWeavers
 Course: DATA 225    
 '''
 import sys
-from PyQt5.QtWidgets import QDialog, QApplication, QLabel, QTableWidgetItem
+from PyQt5.QtWidgets import QDialog, QApplication, QLabel
 from PyQt5.QtWidgets import QMessageBox, QWidget, QComboBox, QSpinBox, QLineEdit, QInputDialog
 from BikeStoreEmplMainDialog_ui import Ui_BikeStoreEmplMainDialog
-from BikeStoreUtils import create_connection, _show_custom_message
+from BikeStoreUtils import get_pool, get_region_catalogue, get_product_catalogue, QueryExecutor, _show_custom_message
+from BikeStoreOrders import OrderService
+from BikeStoreTableModel import PagedQueryModel, fill_table
+from BikeStoreSearch import customer_search, search_terms
 from datetime import datetime
-from PyQt5.QtCore import QDate, pyqtSlot, QRegExp,Qt
+from PyQt5.QtCore import QDate, pyqtSlot, QRegExp, QTimer
 from PyQt5.QtGui import QRegExpValidator
 
 class BikeStoreEmplMain(QDialog):
@@ -40,6 +43,13 @@ class BikeStoreEmplMain(QDialog):
         self.ui.setupUi(self)
         self.conn = conn
         self.cursor = cursor
+        # Table fills run on pooled connections off the GUI thread
+        self._executor = QueryExecutor(get_pool(config_file='terrabikes.ini'), parent=self)
+        # The customer search runs once typing in the name box pauses
+        self._custSearchTimer = QTimer(self)
+        self._custSearchTimer.setSingleShot(True)
+        self._custSearchTimer.setInterval(250)
+        self._custSearchTimer.timeout.connect(self._onCustSearchPaused)
 
         self._BikeStoreMainWin = None
 
@@ -79,7 +89,7 @@ class BikeStoreEmplMain(QDialog):
         sql = """select concat(e.first_name,' ',e.last_name)
                 from users u, employee e
                 where e.employee_id = u.employee_id
-                and upper(u.username) = upper(%s)"""
+                and u.username = %s"""
         self.cursor.execute(sql, (self._username,))
         result = self.cursor.fetchall()
 
@@ -94,10 +104,21 @@ class BikeStoreEmplMain(QDialog):
         """
         Handles the sign out button click event.
         """
+        self._executor.cancel()
         self.close()
         if self._BikeStoreMainWin:
             self._BikeStoreMainWin.show_dialog()
 
+    def _showPage(self, index):
+        """
+        Switches the portal to another page, cancelling queries still running for the previous page.
+
+        Args:
+            index (int): The stack index of the page to show.
+        """
+        self._executor.cancel()
+        self.ui.EmployeePortalStacked.setCurrentIndex(index)
+
     '''
     Functions for Orders Page
     =========================
@@ -105,53 +126,81 @@ class BikeStoreEmplMain(QDialog):
     '''
 
     def on_btnOrdersLarge_toggled(self):
-        self.ui.EmployeePortalStacked.setCurrentIndex(0)
+        self._showPage(0)
         self._setOrders(self._username)
 
     def _setOrders(self, username):
         """
         Sets the orders table with the orders of the employee.
+        The orders are counted first; the table then reads them page by page as it is scrolled.
 
         Args:
             username (str): The username of the employee.
         """
         if self.ui.EmployeePortalStacked.currentIndex() == 0:
+            sql = """
+                    select count(*)
+                    from orders o, users u
+                    where u.username = %s
+                    AND o.employee_id = u.employee_id
+                    """
+
+            self._executor.submit('orders', sql, (username,), on_result=self._showOrders)
+
+    def _showOrders(self, result):
+        """
+        Attaches a paged model of the employee's orders to the orders table once the count has returned.
+
+        Args:
+            result (list): The row returned by the count query.
+        """
+        orderCount = result[0][0]
+        if orderCount == 0:
+            QMessageBox.warning(self, "Warning", "No Orders Found")
+        else:
+            if self._showWelcome == "Yes":
+                QMessageBox.information(self, "Success", "Number of Orders Found - " + str(orderCount))
+                self._showWelcome = "No"
+
             sql = """
                     select o.order_id, o.order_status, o.ordered_date, o.shipped_date, 
                     concat(c.first_name,' ',c.last_name) as customer_name, c.contact, c.address delivery_address, o.delivered_date
                     from orders o, employee e, customer c, users u
-                    where upper(u.username) = upper(%s)
+                    where u.username = %s
                     AND u.employee_id = e.employee_id
                     AND o.employee_id = e.employee_id
-                    AND o.customer_id = c.customer_id;
+                    AND o.customer_id = c.customer_id
                     """
+            headers = ["Order ID", "Order Status", "Ordered Date", "Shipped Date", "Customer Name", "Contact",
+                       "Delivery Address", "Delivered Date"]
+            model = PagedQueryModel(self._executor, 'orderPages', sql, (self._username,), "o.order_id", headers,
+                                    parent=self)
+            self.ui.tblPg1Orders.setModel(model)
+            self.ui.tblPg1Orders.resizeColumnsToContents()
 
-            self.cursor.execute(sql, (username,))
-            result = self.cursor.fetchall()
+    def _selectedOrder(self, column):
+        """
+        Returns a column of the order selected in the orders table.
 
-            if len(result) == 0:
-                QMessageBox.warning(self, "Warning", "No Orders Found")
-            else:
-                if self._showWelcome == "Yes":
-                    QMessageBox.information(self, "Success", "Number of Orders Found - " + str(len(result)))
-                    self._showWelcome = "No"
+        Args:
+            column (int): The column number, 0 for the order id and 1 for the order status.
 
-                self.ui.tblPg1Orders.setRowCount(len(result))
-                for i, row in enumerate(result):
-                    for j, col in enumerate(row):
-                        item = QTableWidgetItem(str(col))
-                        self.ui.tblPg1Orders.setItem(i, j, item)
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                self.ui.tblPg1Orders.resizeColumnsToContents()
-                self.ui.tblPg1Orders.setSortingEnabled(True)
+        Returns:
+            str: The column value, or None if no order is selected.
+        """
+        model = self.ui.tblPg1Orders.model()
+        index = self.ui.tblPg1Orders.currentIndex()
+        if model is None or not index.isValid():
+            return None
+        return model.value(index.row(), column)
 
-    def on_tblPg1Orders_cellClicked(self, row, column):
+    def on_tblPg1Orders_clicked(self, index):
         """
         Sets the order details table with the order details of the selected order.
         """
         if self.ui.EmployeePortalStacked.currentIndex() == 0:
 
-            order_id = self.ui.tblPg1Orders.item(row, 0).text()
+            order_id = self.ui.tblPg1Orders.model().value(index.row(), 0)
             sql = """
                     select p.product_id, p.product_name, p.price as "unit price", od.quantity, (p.price*od.quantity) as "gross price",
                     od.discount, CASE WHEN od.discount is not null
@@ -166,14 +215,7 @@ class BikeStoreEmplMain(QDialog):
             self.cursor.execute(sql, (order_id,))
             result = self.cursor.fetchall()
             self.ui.tblPg1OrderDetails.clearContents()
-            self.ui.tblPg1OrderDetails.setRowCount(len(result))
-            for i, row in enumerate(result):
-                for j, col in enumerate(row):
-                    item = QTableWidgetItem(str(col))
-                    self.ui.tblPg1OrderDetails.setItem(i, j, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            self.ui.tblPg1OrderDetails.resizeColumnsToContents()
-            self.ui.tblPg1OrderDetails.setSortingEnabled(True)
+            fill_table(self.ui.tblPg1OrderDetails, result)
 
     def _updateOrderStatus(self, action):
         """
@@ -185,19 +227,19 @@ class BikeStoreEmplMain(QDialog):
         Returns:
             None
         """
-        if self.ui.tblPg1Orders.rowCount() == 0:
+        if self._selectedOrder(0) is None:
             QMessageBox.warning(self, "Warning", "Please select an order")
-        if self.ui.tblPg1Orders.rowCount() > 0:
+        else:
             if (action == "Shipped" or action == "Delayed"):
-                if self.ui.tblPg1Orders.item(self.ui.tblPg1Orders.currentRow(),1).text() == "New":
+                if self._selectedOrder(1) == "New":
                     decision = _show_custom_message("Confirmation","Do you want to proceed?",self)
                     if decision == "Ok":
                         if action == "Shipped":
                             dateParam = 0
                         if action == "Delayed":
                             dateParam = 10
-                        sql = """update orders set order_status = %s , shipped_date = now()+%s where order_id = %s"""
-                        self.cursor.execute(sql,(action, dateParam, self.ui.tblPg1Orders.item(self.ui.tblPg1Orders.currentRow(),0).text(),))
+                        sql = """update orders set order_status = %s , shipped_date = now()+%s, updated_date = now() where order_id = %s"""
+                        self.cursor.execute(sql,(action, dateParam, self._selectedOrder(0),))
                         self.conn.commit()
                         QMessageBox.information(self, "Success", "Order Updated")
                         self._setOrders(self._username)
@@ -207,18 +249,18 @@ class BikeStoreEmplMain(QDialog):
                     QMessageBox.warning(self, "Warning", "Order is already shipped or delivered")
                     return
             if action == "Delivered":
-                if self.ui.tblPg1Orders.item(self.ui.tblPg1Orders.currentRow(),1).text() == "New":
+                if self._selectedOrder(1) == "New":
                     QMessageBox.warning(self, "Warning", "Order is not shipped, it cannot be delivered")
                     return
-                if self.ui.tblPg1Orders.item(self.ui.tblPg1Orders.currentRow(),1).text() == "Delivered":
+                if self._selectedOrder(1) == "Delivered":
                     QMessageBox.warning(self, "Warning", "Order is already delivered")
                     return
-                if (self.ui.tblPg1Orders.item(self.ui.tblPg1Orders.currentRow(),1).text() == "Delayed" or
-                    self.ui.tblPg1Orders.item(self.ui.tblPg1Orders.currentRow(),1).text() == "Shipped"):
+                if (self._selectedOrder(1) == "Delayed" or
+                    self._selectedOrder(1) == "Shipped"):
                     decision = _show_custom_message("Confirmation","Do you want to proceed?",self)
                     if decision == "Ok":
-                        sql = """update orders set order_status = %s , delivered_date = now() where order_id = %s"""
-                        self.cursor.execute(sql,(action, self.ui.tblPg1Orders.item(self.ui.tblPg1Orders.currentRow(),0).text(),))
+                        sql = """update orders set order_status = %s , delivered_date = now(), updated_date = now() where order_id = %s"""
+                        self.cursor.execute(sql,(action, self._selectedOrder(0),))
                         self.conn.commit()
                         QMessageBox.information(self, "Success", "Order Updated")
                         self._setOrders(self._username)
@@ -243,7 +285,7 @@ class BikeStoreEmplMain(QDialog):
     Stack Index = 1
     '''
     def on_btnInventoryLarge_toggled(self):
-        self.ui.EmployeePortalStacked.setCurrentIndex(1)
+        self._showPage(1)
         self._loadSelectionMenus()
 
     def _loadSelectionMenus(self):
@@ -253,14 +295,11 @@ class BikeStoreEmplMain(QDialog):
         This method retrieves distinct values from the 'products', 'category', and 'warehouse' tables
         and populates the corresponding dropdown menus in the GUI with these values.
         """
-        sql = """ select distinct product_id from products """
-        self.cursor.execute(sql)
-        result = self.cursor.fetchall()
-        if len(result) > 0:
+        productIds = get_product_catalogue().product_ids()
+        if len(productIds) > 0:
             self.ui.selectProd.clear()
             self.ui.selectProd.addItem("All")
-            for i in range(len(result)):
-                self.ui.selectProd.addItem(result[i][0])
+            self.ui.selectProd.addItems(productIds)
 
         sql = """ select distinct category_name from category """
         self.cursor.execute(sql)
@@ -312,25 +351,21 @@ class BikeStoreEmplMain(QDialog):
             if warehouse_name != "All":
                 sql += " and p.product_id in (select wi.product_id from warehouse_inventory wi, warehouse w where wi.warehouse_id = w.warehouse_id and w.warehouse_name = %s)"
                 sql_params = sql_params + (warehouse_name,)
-            if len(sql_params) > 0:
-                self.cursor.execute(sql,sql_params)
-            else:  
-                self.cursor.execute(sql)
-            result = self.cursor.fetchall()
+            self._executor.submit('inventory', sql, sql_params, on_result=self._showInventoryDetails)
+
+    def _showInventoryDetails(self, result):
+        """
+        Fills the product list once the inventory query has returned.
 
-            self.ui.tblProdList.clearContents()
-            self.ui.tblWarehouse.clearContents()
-            self.ui.tblWarehouse.setRowCount(0)
-            self.ui.tblWarehouseOrders.clearContents()
-            self.ui.tblWarehouseOrders.setRowCount(0)
-            self.ui.tblProdList.setRowCount(len(result))
-            for i, row in enumerate(result):
-                for j, col in enumerate(row):
-                    item = QTableWidgetItem(str(col))
-                    self.ui.tblProdList.setItem(i, j, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            self.ui.tblProdList.resizeColumnsToContents()
-            self.ui.tblProdList.setSortingEnabled(True)
+        Args:
+            result (list): The rows returned by the inventory query.
+        """
+        self.ui.tblProdList.clearContents()
+        self.ui.tblWarehouse.clearContents()
+        self.ui.tblWarehouse.setRowCount(0)
+        self.ui.tblWarehouseOrders.clearContents()
+        self.ui.tblWarehouseOrders.setRowCount(0)
+        fill_table(self.ui.tblProdList, result)
 
     def on_tblProdList_cellClicked(self, row, column):
         """
@@ -348,14 +383,7 @@ class BikeStoreEmplMain(QDialog):
             self.cursor.execute(sql,(product_id,))
             result = self.cursor.fetchall()
 
-            self.ui.tblWarehouse.setRowCount(len(result))
-            for i, row in enumerate(result):
-                for j, col in enumerate(row):
-                    item = QTableWidgetItem(str(col))
-                    self.ui.tblWarehouse.setItem(i, j, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            self.ui.tblWarehouse.resizeColumnsToContents()
-            self.ui.tblWarehouse.setSortingEnabled(True)
+            fill_table(self.ui.tblWarehouse, result)
             self.on_tblWarehouse_cellClicked(0, 0)
 
     def on_tblWarehouse_cellClicked(self, row, column):
@@ -378,14 +406,7 @@ class BikeStoreEmplMain(QDialog):
             self.cursor.execute(sql,(product_id,warehouse_id))
             result = self.cursor.fetchall()
 
-            self.ui.tblWarehouseOrders.setRowCount(len(result))
-            for i, row in enumerate(result):
-                for j, col in enumerate(row):
-                    item = QTableWidgetItem(str(col))
-                    self.ui.tblWarehouseOrders.setItem(i, j, item) 
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            self.ui.tblWarehouseOrders.resizeColumnsToContents()
-            self.ui.tblWarehouseOrders.setSortingEnabled(True)
+            fill_table(self.ui.tblWarehouseOrders, result)
 
     @pyqtSlot()
     def on_btnWarehouseInv_clicked(self):
@@ -511,6 +532,7 @@ class BikeStoreEmplMain(QDialog):
                             QMessageBox.warning(self, "Warning", "Inventory Update Failed")
                             return
                         else:
+                            get_product_catalogue().invalidate()
                             QMessageBox.information(self, "Success", "Inventory Received")
                             self.ui.tblWarehouse.clearContents()
                             self.ui.tblWarehouse.setRowCount(0)
@@ -544,9 +566,11 @@ class BikeStoreEmplMain(QDialog):
             else:
                 decision = _show_custom_message("Confirmation", "Do you want to proceed?", self)
                 if decision == "Ok":
-                    sql = """update products set quantity = 0, inventory_status = 'Out of Stock' where product_id = %s"""
-                    self.cursor.execute(sql, (self.ui.tblProdList.item(self.ui.tblProdList.currentRow(), 0).text(),))
+                    sql = """update products set quantity = 0, inventory_status = 'Out of Stock', updated_date = now() where product_id = %s"""
+                    product_id = self.ui.tblProdList.item(self.ui.tblProdList.currentRow(), 0).text()
+                    self.cursor.execute(sql, (product_id,))
                     self.conn.commit()
+                    get_product_catalogue().invalidate([product_id])
                     QMessageBox.information(self, "Success", "Product Updated")
                     self.on_btnSearch_clicked()
                 if decision == "Cancel":
@@ -580,9 +604,10 @@ class BikeStoreEmplMain(QDialog):
             default_text = "0.00"
         text, ok = QInputDialog.getText(self, 'Input Dialog', 'Enter Discount %:', txtDiscount.Normal, default_text)
         if ok:
-            sql = """update products set discount_percent = %s where product_id = %s"""
+            sql = """update products set discount_percent = %s, updated_date = now() where product_id = %s"""
             self.cursor.execute(sql,(text,product_id))
             self.conn.commit()
+            get_product_catalogue().invalidate([product_id])
             self.on_btnSearch_clicked()
             QMessageBox.information(self, "Success", "Discount Updated")
             self.on_btnCustSearch_clicked()
@@ -593,7 +618,7 @@ class BikeStoreEmplMain(QDialog):
     Stack Index = 2
     '''
     def on_btnComplaintsLarge_2_toggled(self):
-        self.ui.EmployeePortalStacked.setCurrentIndex(2)
+        self._showPage(2)
         self._populateComplaints()   
 
     def _populateComplaints(self):
@@ -612,14 +637,7 @@ class BikeStoreEmplMain(QDialog):
             self.cursor.execute(sql)
             result = self.cursor.fetchall()
 
-            self.ui.tblGreviances.setRowCount(len(result))
-            for i, row in enumerate(result):
-                for j, col in enumerate(row):
-                    item = QTableWidgetItem(str(col))
-                    self.ui.tblGreviances.setItem(i, j, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            self.ui.tblGreviances.resizeColumnsToContents()
-            self.ui.tblGreviances.setSortingEnabled(True)
+            fill_table(self.ui.tblGreviances, result)
 
     def on_tblGreviances_cellClicked(self, row, column):
         self.ui.GrvPgComments.setText(self.ui.tblGreviances.item(row,7).text())
@@ -684,21 +702,18 @@ class BikeStoreEmplMain(QDialog):
     Stack Index = 3
     '''
     def on_btnCustomersLarge_toggled(self):    
-        self.ui.EmployeePortalStacked.setCurrentIndex(3)
+        self._showPage(3)
         self._loadCustSearchMenus()
 
     def _loadCustSearchMenus(self):
         """
         Loads the menus for Search Bar
         """
-        sql = """ select distinct state_name from regions """
-        self.cursor.execute(sql)
-        result = self.cursor.fetchall()
-        if len(result) > 0:
+        states = get_region_catalogue().states()
+        if len(states) > 0:
             self.ui.selectState.clear()
             self.ui.selectState.addItem("All")
-            for i in range(len(result)):
-                self.ui.selectState.addItem(result[i][0])
+            self.ui.selectState.addItems(states)
 
     @pyqtSlot()
     def on_btnCustSearch_clicked(self):
@@ -710,45 +725,52 @@ class BikeStoreEmplMain(QDialog):
             custName = self.ui.txtSrchCustName.text()
             state = self.ui.selectState.currentText()
 
-            sql = """select customer_id, concat(first_name,' ',last_name) customer_name, status, end_date,
-                        (select count(order_id) from orders where customer_id = c.customer_id) order_count,
-                        contact, email_id, address, city, state_name, region
-                        from customer c, regions r
-                        where c.region_id = r.region_id"""
-            sql_params = ()
-            if custId != "":
-                sql += " and customer_id = %s"
-                sql_params = (custId,)
-            if custName != "":
-                sql += " and concat(first_name,' ',last_name) like %s"
-                sql_params = sql_params + ('%'+custName+'%',)
-            if state != "All":
-                sql += " and state_name = %s"
-                sql_params = sql_params + (state,)
-            if len(sql_params) > 0:
-                self.cursor.execute(sql,sql_params)
-            else:
-                self.cursor.execute(sql)
-            result = self.cursor.fetchall()
+            sql, sql_params, keyColumn = customer_search(custName, custId, state)
+            headers = ["Customer ID", "Customer Name", "Status", "End Date", "Order Count", "Contact", "Email ID",
+                       "Address", "City", "State", "Region"]
+            model = PagedQueryModel(self._executor, 'customers', sql, sql_params, keyColumn, headers, parent=self)
+            self.ui.tblCustOrders.clearContents()
+            self.ui.tblCustomers.setModel(model)
+            model.rowsInserted.connect(lambda *args: self.ui.tblCustomers.resizeColumnsToContents())
 
+    def on_txtSrchCustName_textChanged(self, text):
+        """
+        Restarts the search delay, so the customer search runs once typing pauses instead of per keystroke.
+        """
+        self._custSearchTimer.start()
 
-            self.ui.tblCustomers.clearContents()
-            self.ui.tblCustOrders.clearContents()
-            self.ui.tblCustomers.setRowCount(len(result))
-            for i, row in enumerate(result):
-                for j, col in enumerate(row):
-                    item = QTableWidgetItem(str(col))
-                    self.ui.tblCustomers.setItem(i, j, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            self.ui.tblCustomers.resizeColumnsToContents()
-            self.ui.tblCustomers.setSortingEnabled(True)
+    def _onCustSearchPaused(self):
+        """
+        Runs the customer search once typing pauses, unless every search field is empty.
+        Clearing the name box does not list every customer, the Search button still does.
+        """
+        if (self.ui.txtCustId.text() == "" and search_terms(self.ui.txtSrchCustName.text()) == []
+                and self.ui.selectState.currentText() in ("", "All")):
+            return
+        self.on_btnCustSearch_clicked()
 
-    def on_tblCustomers_cellClicked(self, row, column):
+    def _selectedCustomer(self, column):
+        """
+        Returns a column of the customer selected in the customers table.
+
+        Args:
+            column (int): The column number, 0 for the customer id and 2 for the status.
+
+        Returns:
+            str: The column value, or None if no customer is selected.
+        """
+        model = self.ui.tblCustomers.model()
+        index = self.ui.tblCustomers.currentIndex()
+        if model is None or not index.isValid():
+            return None
+        return model.value(index.row(), column)
+
+    def on_tblCustomers_clicked(self, index):
         """
         Sets the orders table with the orders of the customer.
         """
         if self.ui.EmployeePortalStacked.currentIndex() == 3:
-            custId = self.ui.tblCustomers.item(row,0).text()
+            custId = self.ui.tblCustomers.model().value(index.row(), 0)
             sql = """select o.order_id, o.order_status, o.ordered_date, o.shipped_date, count(od.product_id) item_count,
                     sum(od.quantity) total_quantity, round(sum(price),2) total_price, sum(discount) total_discount
                     from orders o, order_details od
@@ -758,14 +780,7 @@ class BikeStoreEmplMain(QDialog):
             self.cursor.execute(sql,(custId,))
             result = self.cursor.fetchall()
 
-            self.ui.tblCustOrders.setRowCount(len(result))
-            for i, row in enumerate(result):
-                for j, col in enumerate(row):
-                    item = QTableWidgetItem(str(col))
-                    self.ui.tblCustOrders.setItem(i, j, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            self.ui.tblCustOrders.resizeColumnsToContents()
-            self.ui.tblCustOrders.setSortingEnabled(True)
+            fill_table(self.ui.tblCustOrders, result)
 
     @pyqtSlot()
     def on_BtnDisableCustomer_clicked(self):
@@ -783,20 +798,20 @@ class BikeStoreEmplMain(QDialog):
         Returns:
             None
         """
-        if self.ui.tblCustomers.rowCount() == 0:
+        if self._selectedCustomer(0) is None:
             QMessageBox.warning(self, "Warning", "Please select a customer")
 
-        if self.ui.tblCustomers.rowCount() > 0:
-            if self.ui.tblCustomers.item(self.ui.tblCustomers.currentRow(), 2).text() == "INACTIVE":
+        else:
+            if self._selectedCustomer(2) == "INACTIVE":
                 QMessageBox.warning(self, "Warning", "Customer is already disabled")
 
-            if self.ui.tblCustomers.item(self.ui.tblCustomers.currentRow(), 2).text() == "ACTIVE":
+            if self._selectedCustomer(2) == "ACTIVE":
                 decision = _show_custom_message("Confirmation", "Do you want to proceed?", self)
                 if decision == "Ok":
-                    sql = """update customer set status = 'INACTIVE' , end_date = now() where customer_id = %s"""
-                    self.cursor.execute(sql, (self.ui.tblCustomers.item(self.ui.tblCustomers.currentRow(), 0).text(),))
+                    sql = """update customer set status = 'INACTIVE' , end_date = now(), updated_date = now() where customer_id = %s"""
+                    self.cursor.execute(sql, (self._selectedCustomer(0),))
                     sql = """update users set end_date = now() where customer_id = %s"""
-                    self.cursor.execute(sql, (self.ui.tblCustomers.item(self.ui.tblCustomers.currentRow(), 0).text(),))
+                    self.cursor.execute(sql, (self._selectedCustomer(0),))
                     self.conn.commit()
                     QMessageBox.information(self, "Success", "Customer disabled")
                     self.on_btnCustSearch_clicked()
@@ -817,14 +832,14 @@ class BikeStoreEmplMain(QDialog):
         Returns:
             None
         """
-        if self.ui.tblCustomers.rowCount() == 0:
+        if self._selectedCustomer(0) is None:
             QMessageBox.warning(self, "Warning", "Please select a customer")
-        if self.ui.tblCustomers.rowCount() > 0:
-            if self.ui.tblCustomers.item(self.ui.tblCustomers.currentRow(),2).text() == "INACTIVE":
+        else:
+            if self._selectedCustomer(2) == "INACTIVE":
                 QMessageBox.warning(self, "Warning", "Customer is disabled, unable to Delete")
-            if self.ui.tblCustomers.item(self.ui.tblCustomers.currentRow(),2).text() == "ACTIVE":
+            if self._selectedCustomer(2) == "ACTIVE":
                 sql = """select count(order_id) from orders where customer_id = %s"""
-                self.cursor.execute(sql,(self.ui.tblCustomers.item(self.ui.tblCustomers.currentRow(),0).text(),))
+                self.cursor.execute(sql,(self._selectedCustomer(0),))
                 result = self.cursor.fetchall()
                 if result[0][0] > 0:
                     QMessageBox.warning(self, "Warning", "Customer has orders, unable to Delete")
@@ -832,9 +847,9 @@ class BikeStoreEmplMain(QDialog):
                     decision = _show_custom_message("Confirmation","Do you want to proceed?",self)  
                     if decision == "Ok":
                         sql = """delete from users where customer_id = %s"""
-                        self.cursor.execute(sql,(self.ui.tblCustomers.item(self.ui.tblCustomers.currentRow(),0).text(),))
+                        self.cursor.execute(sql,(self._selectedCustomer(0),))
                         sql = """delete from customer where customer_id = %s"""
-                        self.cursor.execute(sql,(self.ui.tblCustomers.item(self.ui.tblCustomers.currentRow(),0).text(),))
+                        self.cursor.execute(sql,(self._selectedCustomer(0),))
                         self.conn.commit()
                         QMessageBox.information(self, "Success", "Customer deleted")
                         self.on_btnCustSearch_clicked()
@@ -856,7 +871,7 @@ class BikeStoreEmplMain(QDialog):
         Sets the state selection if it is empty.
         Sets the product selection for the EOrderPgProd1 QComboBox widget if it is empty.
         """
-        self.ui.EmployeePortalStacked.setCurrentIndex(4)
+        self._showPage(4)
         # Hide Product Widgets in New Order Screen
         self.ui.widgetProd2.hide()
         self.ui.widgetProd3.hide()
@@ -875,28 +890,22 @@ class BikeStoreEmplMain(QDialog):
         """
         Sets the state selection options in the order page.
         """
-        sql = """select DISTINCT state_name from regions order by 1"""
-        self.cursor.execute(sql)
-        result = self.cursor.fetchall()
+        states = get_region_catalogue().states()
         self.ui.txtState.clear()
-        if len(result) > 0:
+        if len(states) > 0:
             self.ui.txtState.addItem("")
-            for i in range(len(result)):
-                self.ui.txtState.addItem(result[i][0])
+            self.ui.txtState.addItems(states)
 
     def on_txtState_currentIndexChanged(self, index):
         """
         Sets the city selection options in the order page.
         """
         if self.ui.txtState.currentText() != "":
-            sql = """select DISTINCT city from regions where state_name = %s order by 1"""
-            self.cursor.execute(sql,(self.ui.txtState.currentText(),))
-            result = self.cursor.fetchall()
+            cities = get_region_catalogue().cities(self.ui.txtState.currentText())
             self.ui.txtCity.clear()
-            if len(result) > 0:
+            if len(cities) > 0:
                 self.ui.txtCity.addItem("")
-                for i in range(len(result)):
-                    self.ui.txtCity.addItem(result[i][0])         
+                self.ui.txtCity.addItems(cities)         
 
     def _setProductSelection(self):
         """
@@ -921,14 +930,15 @@ class BikeStoreEmplMain(QDialog):
                 lblTotalPrice = self.ui.widget.findChild(QLabel, 'lblTotPrice')
                 lblTotalPrice.setText('0.0')
 
-        sql="""select CONCAT(product_id,' - ',product_name) as product from products"""
-        self.cursor.execute(sql)
-        result = self.cursor.fetchall()
-        if len(result) > 0:
+        # Prices and stock come from the product catalogue, refreshed once when the form is set up
+        catalogue = get_product_catalogue()
+        catalogue.refresh()
+        choices = catalogue.choices()
+        if len(choices) > 0:
             for i in range(1, 6):
                 widgetProd = self.ui.widget.findChild(QWidget, 'widgetProd'+str(i))
                 OrderPgProd = widgetProd.findChild(QComboBox, 'EOrderPgProd'+str(i))
-                OrderPgProd.addItems([i[0] for i in result])       
+                OrderPgProd.addItems(choices)
 
     def populatePriceQuantity(self, index_num):
         """
@@ -948,17 +958,16 @@ class BikeStoreEmplMain(QDialog):
 
         product_id = OrderPgProd.currentText().split(' - ')[0]
         
-        sql = """select price,quantity,discount_percent from products where product_id = %s"""
-        self.cursor.execute(sql,(product_id,))
-        result = self.cursor.fetchall()
+        snapshot = get_product_catalogue().snapshot(product_id)
 
-        if len(result) > 0:
-            lblPrice.setText(str(result[0][0]))
-            if result[0][2] != None:
-                DiscountAmount = round(float((result[0][0] * result[0][2])/100),2)
+        if snapshot is not None:
+            price, quantity, discountPercent = snapshot
+            lblPrice.setText(str(price))
+            if discountPercent != None:
+                DiscountAmount = round(float((price * discountPercent)/100),2)
                 txtDiscount.setText(str(DiscountAmount))
             sbQuantity.setMinimum(0)
-            sbQuantity.setMaximum(result[0][1])
+            sbQuantity.setMaximum(quantity)
 
     def calculateSubtotals(self, index_num):
         """
@@ -1121,41 +1130,32 @@ class BikeStoreEmplMain(QDialog):
             None
         """
         if self._user_id != None or self._user_id != 0:
-            self.conn.autocommit = True
-            self.cursor.execute("SELECT InsertOrder(%s, %s)", (self.ui.txtUserName.text(), self._username))
-            _order_id = self.cursor.fetchone()[0]
-            # self.conn.commit()
-
-            if _order_id != None or _order_id != 0:
-                _orderDetailIDs = []
-                for i in range(1, 6):
-                    widgetProd = self.ui.widget.findChild(QWidget, 'widgetProd'+str(i))
-                    if not widgetProd.isVisible():
-                        break
-                    else:
-                        OrderPgProd = widgetProd.findChild(QComboBox, 'EOrderPgProd'+str(i))
-                        sbQuantity = widgetProd.findChild(QSpinBox, 'EsbQuantity'+str(i))
-                        txtDiscount = widgetProd.findChild(QLabel, 'EtxtDiscount'+str(i))
-                        lblSubtotal = widgetProd.findChild(QLabel, 'ElblSubtotal'+str(i))
-                        product_id = OrderPgProd.currentText().split(' - ')[0]
-                        quantity = float(sbQuantity.value())
-                        if txtDiscount.text() == '':
-                            discount = 0
-                        else:    
-                            discount = float(txtDiscount.text())
-                        subtotal = float(lblSubtotal.text())
-                        if quantity > 0:
-                            orderDetailArgs = [_order_id, product_id, quantity, discount, subtotal]
-                            self.cursor.execute("SELECT InsertOrderDetails(%s,%s,%s,%s,%s)", orderDetailArgs)
-                            _orderDetailID = self.cursor.fetchone()[0]
-                            self.conn.commit()
-                            if _orderDetailID != None:
-                                _orderDetailIDs.append(_orderDetailID)
-                if len(_orderDetailIDs) > 0:
-                    QMessageBox.information(self, "Success", "Order Submitted Successfully")
-                    self.conn.commit()
-                    self._setProductSelection()
-                    self.ui.btnOrdersLarge.setChecked(True)
-                    self.on_btnOrdersLarge_toggled()
+            lines = []
+            for i in range(1, 6):
+                widgetProd = self.ui.widget.findChild(QWidget, 'widgetProd'+str(i))
+                if not widgetProd.isVisible():
+                    break
                 else:
-                    QMessageBox.warning(self, "Warning", "Order Submission Failed")
\ No newline at end of file
+                    OrderPgProd = widgetProd.findChild(QComboBox, 'EOrderPgProd'+str(i))
+                    sbQuantity = widgetProd.findChild(QSpinBox, 'EsbQuantity'+str(i))
+                    txtDiscount = widgetProd.findChild(QLabel, 'EtxtDiscount'+str(i))
+                    lblSubtotal = widgetProd.findChild(QLabel, 'ElblSubtotal'+str(i))
+                    product_id = OrderPgProd.currentText().split(' - ')[0]
+                    quantity = float(sbQuantity.value())
+                    if txtDiscount.text() == '':
+                        discount = 0
+                    else:    
+                        discount = float(txtDiscount.text())
+                    subtotal = float(lblSubtotal.text())
+                    if quantity > 0:
+                        lines.append((product_id, quantity, discount, subtotal))
+            try:
+                # The order and all of its lines are stored in one transaction
+                OrderService().submit({'customer_username': self.ui.txtUserName.text(), 'employee_username': self._username}, lines)
+            except Exception:
+                QMessageBox.warning(self, "Warning", "Order Submission Failed")
+                return
+            QMessageBox.information(self, "Success", "Order Submitted Successfully")
+            self._setProductSelection()
+            self.ui.btnOrdersLarge.setChecked(True)
+            self.on_btnOrdersLarge_toggled()
\ No newline at end of file
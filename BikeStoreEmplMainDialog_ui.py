@@ -258,66 +258,8 @@ class Ui_BikeStoreEmplMainDialog(object):
         self.label_20 = QtWidgets.QLabel(self.layoutWidget2)
         self.label_20.setObjectName("label_20")
         self.verticalLayout_5.addWidget(self.label_20)
-        self.tblPg1Orders = QtWidgets.QTableWidget(self.layoutWidget2)
+        self.tblPg1Orders = QtWidgets.QTableView(self.layoutWidget2)
         self.tblPg1Orders.setObjectName("tblPg1Orders")
-        self.tblPg1Orders.setColumnCount(8)
-        self.tblPg1Orders.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblPg1Orders.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblPg1Orders.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblPg1Orders.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblPg1Orders.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblPg1Orders.setHorizontalHeaderItem(4, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblPg1Orders.setHorizontalHeaderItem(5, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblPg1Orders.setHorizontalHeaderItem(6, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblPg1Orders.setHorizontalHeaderItem(7, item)
         self.verticalLayout_5.addWidget(self.tblPg1Orders)
         self.label_19 = QtWidgets.QLabel(self.layoutWidget2)
         self.label_19.setObjectName("label_19")
@@ -808,88 +750,8 @@ class Ui_BikeStoreEmplMainDialog(object):
         self.label_26 = QtWidgets.QLabel(self.layoutWidget11)
         self.label_26.setObjectName("label_26")
         self.verticalLayout_14.addWidget(self.label_26)
-        self.tblCustomers = QtWidgets.QTableWidget(self.layoutWidget11)
+        self.tblCustomers = QtWidgets.QTableView(self.layoutWidget11)
         self.tblCustomers.setObjectName("tblCustomers")
-        self.tblCustomers.setColumnCount(11)
-        self.tblCustomers.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(4, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(5, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(6, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(7, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(8, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(9, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        item.setBackground(QtGui.QColor(255, 255, 255))
-        self.tblCustomers.setHorizontalHeaderItem(10, item)
-        self.tblCustomers.horizontalHeader().setSortIndicatorShown(True)
         self.verticalLayout_14.addWidget(self.tblCustomers)
         self.label_10 = QtWidgets.QLabel(self.layoutWidget11)
         self.label_10.setObjectName("label_10")
@@ -1533,22 +1395,6 @@ class Ui_BikeStoreEmplMainDialog(object):
         self.btnOrderDelay.setText(_translate("BikeStoreEmplMainDialog", "Order Delay"))
         self.btnOrderDelivered.setText(_translate("BikeStoreEmplMainDialog", "Order Delivered"))
         self.label_20.setText(_translate("BikeStoreEmplMainDialog", "Orders"))
-        item = self.tblPg1Orders.horizontalHeaderItem(0)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Order ID"))
-        item = self.tblPg1Orders.horizontalHeaderItem(1)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Order Status"))
-        item = self.tblPg1Orders.horizontalHeaderItem(2)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Ordered Date"))
-        item = self.tblPg1Orders.horizontalHeaderItem(3)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Shipped Date"))
-        item = self.tblPg1Orders.horizontalHeaderItem(4)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Customer Name"))
-        item = self.tblPg1Orders.horizontalHeaderItem(5)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Contact"))
-        item = self.tblPg1Orders.horizontalHeaderItem(6)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Delivery Address"))
-        item = self.tblPg1Orders.horizontalHeaderItem(7)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Delivered Date"))
         self.label_19.setText(_translate("BikeStoreEmplMainDialog", "Order Details"))
         item = self.tblPg1OrderDetails.horizontalHeaderItem(0)
         item.setText(_translate("BikeStoreEmplMainDialog", "Product ID"))
@@ -1649,28 +1495,6 @@ class Ui_BikeStoreEmplMainDialog(object):
         self.BtnDisableCustomer.setText(_translate("BikeStoreEmplMainDialog", "Disable Customer"))
         self.BtnDeleteCustomer.setText(_translate("BikeStoreEmplMainDialog", "Delete Customer"))
         self.label_26.setText(_translate("BikeStoreEmplMainDialog", "Customers"))
-        item = self.tblCustomers.horizontalHeaderItem(0)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Customer ID"))
-        item = self.tblCustomers.horizontalHeaderItem(1)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Customer Name"))
-        item = self.tblCustomers.horizontalHeaderItem(2)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Status"))
-        item = self.tblCustomers.horizontalHeaderItem(3)
-        item.setText(_translate("BikeStoreEmplMainDialog", "End Date"))
-        item = self.tblCustomers.horizontalHeaderItem(4)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Order Count"))
-        item = self.tblCustomers.horizontalHeaderItem(5)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Contact"))
-        item = self.tblCustomers.horizontalHeaderItem(6)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Email ID"))
-        item = self.tblCustomers.horizontalHeaderItem(7)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Address"))
-        item = self.tblCustomers.horizontalHeaderItem(8)
-        item.setText(_translate("BikeStoreEmplMainDialog", "City"))
-        item = self.tblCustomers.horizontalHeaderItem(9)
-        item.setText(_translate("BikeStoreEmplMainDialog", "State"))
-        item = self.tblCustomers.horizontalHeaderItem(10)
-        item.setText(_translate("BikeStoreEmplMainDialog", "Region"))
         self.label_10.setText(_translate("BikeStoreEmplMainDialog", "Customer Orders"))
         item = self.tblCustOrders.horizontalHeaderItem(0)
         item.setText(_translate("BikeStoreEmplMainDialog", "Order Id"))
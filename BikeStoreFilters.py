@@ -0,0 +1,122 @@
+'''
+This file contains the filter builder used by the dashboards to compose SQL statements.
+The builder appends filter clauses with %s placeholders and collects the matching bind parameters,
+so the statement text only depends on which filters are active and never on the values selected.
+
+Author: SQLWeavers
+File: BikeStoreFilters.py
+Course: Data 225
+Project: TerraBikes
+'''
+
+
+class SqlFilter:
+    """
+    Builds a SQL statement from a base select, a list of filter clauses and a trailing group/order part.
+    """
+
+    def __init__(self, select):
+        """
+        Initializes the builder.
+
+        Args:
+            select (str): The SELECT part of the statement, ending in a WHERE clause the filters are appended to.
+        """
+        self.select = select
+        self.clauses = []
+        self.params = []
+
+    def where(self, clause, *params):
+        """
+        Appends a filter clause joined with AND.
+
+        Args:
+            clause (str): The condition, with one %s placeholder per parameter.
+            *params: The bind parameters for the placeholders.
+
+        Returns:
+            SqlFilter: The builder, so calls can be chained.
+        """
+        self.clauses.append(clause)
+        self.params.extend(params)
+        return self
+
+    def build(self, group=""):
+        """
+        Returns the statement template and its bind parameters.
+
+        Args:
+            group (str): The GROUP BY / ORDER BY part of the statement. Default is "".
+
+        Returns:
+            tuple: The SQL template (str) and the bind parameters (tuple).
+        """
+        sql = self.select
+        for clause in self.clauses:
+            sql = sql + " and " + clause
+        return sql + group, tuple(self.params)
+
+
+class DashboardFilter:
+    """
+    The filter selections of a dashboard: year, region, state, date range and the quick range radio buttons.
+
+    apply() adds the active selections to a SqlFilter. Each query passes the clause to use per filter,
+    with {} standing for the predicate, e.g. year="cd.year {}" becomes "cd.year = %s" or "cd.year in (%s, %s)".
+    """
+
+    def __init__(self, year='All', region='All', state='All', from_date=None, to_date=None,
+                 radio_year=None, radio_year2=None, radio_month=None):
+        """
+        Initializes the filter. 'All' and None mean the filter is not applied.
+
+        Args:
+            year (str): The selected year. Default is 'All'.
+            region (str): The selected region. Default is 'All'.
+            state (str): The selected state. Default is 'All'.
+            from_date (date): The start of the date range. Default is None.
+            to_date (date): The end of the date range. Default is None.
+            radio_year (int): The year picked by a quick range radio button. Default is None.
+            radio_year2 (int): The previous year for the two year radio button. Default is None.
+            radio_month (int): The first month picked by a quick range radio button. Default is None.
+        """
+        self.year = year
+        self.region = region
+        self.state = state
+        self.from_date = from_date
+        self.to_date = to_date
+        self.radio_year = radio_year
+        self.radio_year2 = radio_year2
+        self.radio_month = radio_month
+
+    def apply(self, builder, year=None, region=None, state=None, date=None, month=None):
+        """
+        Adds the active selections to a builder using the given clause templates.
+
+        Args:
+            builder (SqlFilter): The builder to add the clauses to.
+            year (str): The clause template for year filters. Default is None (not filtered).
+            region (str): The clause template for the region filter. Default is None (not filtered).
+            state (str): The clause template for the state filter. Default is None (not filtered).
+            date (str): The clause template for the date range filter. Default is None (not filtered).
+            month (str): The clause template for the month filter. Default is None (not filtered).
+
+        Returns:
+            SqlFilter: The builder.
+        """
+        if year is not None and self.year != 'All':
+            builder.where(year.format("= %s"), int(self.year))
+        if region is not None and self.region != 'All':
+            builder.where(region.format("= %s"), self.region)
+        if state is not None and self.state != 'All':
+            builder.where(state.format("= %s"), self.state)
+        if date is not None and self.from_date is not None and self.to_date is not None:
+            builder.where(date.format("between %s and %s"), self.from_date, self.to_date)
+        if year is not None and self.radio_year is not None:
+            if self.radio_year2 is None:
+                builder.where(year.format("= %s"), self.radio_year)
+            else:
+                builder.where(year.format("in (%s, %s)"), self.radio_year2, self.radio_year)
+        if month is not None and self.radio_month is not None:
+            builder.where(month.format(">= %s"), self.radio_month)
+        return builder
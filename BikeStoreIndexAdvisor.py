@@ -0,0 +1,123 @@
+'''
+This file contains the index advisor, which runs EXPLAIN on the queries the dialogs issue most often
+and reports the tables each of them reads with a full table scan.
+Run it after loading the databases or applying a migration:
+    python BikeStoreIndexAdvisor.py
+
+Author: SQLWeavers
+File: BikeStoreIndexAdvisor.py
+Course: Data 225
+Project: TerraBikes
+'''
+
+import sys
+from mysql.connector import Error
+from BikeStoreUtils import get_pool
+from BikeStoreSearch import customer_search, employee_search, product_search
+
+# (name, configuration file, SQL, sample parameters) of the hot path queries of the dialogs
+QUERY_CATALOGUE = [
+    ('Login', 'terrabikes.ini',
+     """select t.role from users u, type t
+        where u.username = %s and u.pwd = md5(%s) and t.user_role_id = u.user_role_id""",
+     ('manager', 'password')),
+    ('Portal user name', 'terrabikes.ini',
+     """select concat(first_name,' ', last_name) from users u, employee e
+        where u.username = %s and e.employee_id = u.employee_id""",
+     ('manager',)),
+    ('Cities of a state', 'terrabikes.ini',
+     """select distinct city from regions where state_name = %s order by 1""",
+     ('California',)),
+    ('Feedback of an order', 'terrabikes.ini',
+     """select record_id from feedback where record_type = 'FEEDBACK' and order_id = %s""",
+     (1,)),
+    ('Employee orders', 'terrabikes.ini',
+     """select o.order_id, o.order_status, o.ordered_date from orders o, users u
+        where u.username = %s and o.employee_id = u.employee_id""",
+     ('manager',)),
+    ('Sales summary by year', 'terrabikes_bi.ini',
+     """select count(distinct od.order_id), sum(s.price) from sales s, order_details od
+        where s.order_detail_key = od.order_detail_key
+        and s.calendar_key in (select calendar_key from calendar where year = %s)""",
+     (2023,)),
+    ('Sales by region', 'terrabikes_bi.ini',
+     """select r.region, count(distinct od.order_id) from sales s, region r, order_details od
+        where s.region_key = r.region_key and od.order_detail_key = s.order_detail_key
+        and r.region = %s group by r.region""",
+     ('West',)),
+    ('Order status by date range', 'terrabikes_bi.ini',
+     """select count(*), order_status from order_details
+        where order_date between %s and %s group by order_status""",
+     ('2023-01-01', '2023-12-31')),
+    ('Employee sales by state', 'terrabikes_bi.ini',
+     """select employee_name, round(sum(price),2) from employee_sales
+        where year = %s and state = %s group by employee_name""",
+     (2023, 'California')),
+    ('Sales by region from the rollup', 'terrabikes_bi.ini',
+     """select region, sum(order_count) from sales_order_rollup
+        where year = %s group by region""",
+     (2023,)),
+    ('Employee sales by state from the rollup', 'terrabikes_bi.ini',
+     """select employee_name, round(sum(revenue),2) from employee_rollup
+        where year = %s and state = %s group by employee_name""",
+     (2023, 'California')),
+    ('Customer name search', 'terrabikes.ini') + customer_search('smith')[:2],
+    ('Employee name type-ahead', 'terrabikes.ini') + employee_search('jo'),
+    ('Product name search', 'terrabikes.ini') + product_search('trek'),
+]
+
+
+def explain_query(config_file, sql, params):
+    """
+    Runs EXPLAIN on a query and returns the tables it reads with a full table scan.
+
+    Args:
+        config_file (str): The configuration file of the database the query runs on.
+        sql (str): The SQL query.
+        params (tuple): Sample bind parameters.
+
+    Returns:
+        list: (table, estimated rows) for every full scan in the plan.
+    """
+    with get_pool(config_file=config_file).cursor(dictionary=True) as cursor:
+        cursor.execute("explain " + sql, params)
+        plan = cursor.fetchall()
+    return [(row['table'], row['rows']) for row in plan if row['type'] == 'ALL']
+
+
+def advise():
+    """
+    Explains every query of the catalogue.
+
+    A query that cannot be explained, e.g. because it reads a table of a migration that has not been applied,
+    is reported on stderr and skipped.
+
+    Returns:
+        list: (query name, list of (table, estimated rows)) for the queries that scan a full table.
+    """
+    report = []
+    for name, config_file, sql, params in QUERY_CATALOGUE:
+        try:
+            fullScans = explain_query(config_file, sql, params)
+        except Error as e:
+            print(f'Skipped {name}: {e}', file=sys.stderr)
+            continue
+        if len(fullScans) > 0:
+            report.append((name, fullScans))
+    return report
+
+
+def main():
+    report = advise()
+    if len(report) == 0:
+        print('No full table scans in the query catalogue')
+        return 0
+    for name, fullScans in report:
+        print(name)
+        for table, rows in fullScans:
+            print(f'    full scan of {table} (~{rows} rows)')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,12 +8,10 @@ Course: Data 225
 import sys
 from PyQt5 import uic
 from PyQt5.QtWidgets import QDialog, QApplication
-from BikeStoreSignUpDialog import BikeStoreSignUp
-from BikeStoreResetPwdDialog import BikeStoreResetPwd
-from BikeStoreCustMainDialog import BikeStoreCustMain
-from BikeStoreEmplMainDialog import BikeStoreEmplMain
-from BikeStoreManagerMainDialog import BikeStoreManagerMain
-from BikeStoreUtils import create_connection
+from BikeStoreUtils import get_pool
+
+# The sign up, password reset and portal dialogs are imported when they are first opened,
+# so the login window does not wait for their generated UI modules.
 
 # Main Class for TerraBikes Application
 class BikeStoreMainWin(QDialog):
@@ -34,26 +32,21 @@ class BikeStoreMainWin(QDialog):
         super(BikeStoreMainWin, self).__init__(parent)
         self.ui = uic.loadUi("BikeStoreMainWin.ui")
         self.ui.show()
-        self.create_connection()
+        # Connections are borrowed from the shared pool for each piece of work
+        self.pool = get_pool(config_file='terrabikes.ini')
         # Capture Button Events
         self.ui.btnSignUp.clicked.connect(self._showBikeStoreNewSignUp)
         self.ui.btnForgetPass.clicked.connect(self._bikeStoreResetPass)
         self.ui.btnLogin.clicked.connect(self._bikeStoreLogin)
 
-    def create_connection(self):
-        # Connect to the database
-        self.conn = create_connection(config_file='terrabikes.ini')
-        self.cursor = self.conn.cursor()
-
     # Close Db connections
     def _close_db_connections(self):
         """
         Closes the database connections.
 
-        This function closes the cursor and connection to the database.
+        This function closes the idle connections held by the connection pool.
         """
-        self.cursor.close()
-        self.conn.close() 
+        self.pool.close_all()
 
     def show_dialog(self):
         """
@@ -70,7 +63,8 @@ class BikeStoreMainWin(QDialog):
         It creates an instance of the `BikeStoreSignUp` class, sets the main dialog as its parent,
         hides the current main window, and shows the sign up dialog.
         """
-        self._bikeStoreSignUp = BikeStoreSignUp(self.conn, self.cursor, parent=self)
+        from BikeStoreSignUpDialog import BikeStoreSignUp
+        self._bikeStoreSignUp = BikeStoreSignUp(self.pool, parent=self)
         self._bikeStoreSignUp.set_main_dialog(self)
         self.ui.hide()
         self._bikeStoreSignUp.show_dialog()
@@ -84,8 +78,9 @@ class BikeStoreMainWin(QDialog):
         text field, creates an instance of the `BikeStoreResetPwd` class, and sets the main dialog as its parent.
         The main dialog is then hidden, and the password reset dialog is shown to the user.
         """
+        from BikeStoreResetPwdDialog import BikeStoreResetPwd
         _username = self.ui.txtUserName.text()
-        self._bikeStoreResetPwd = BikeStoreResetPwd(_username, self.conn, self.cursor, parent=self)
+        self._bikeStoreResetPwd = BikeStoreResetPwd(_username, self.pool, parent=self)
         self._bikeStoreResetPwd.set_main_dialog(self)
         self.ui.hide()
         self._bikeStoreResetPwd.show_dialog()
@@ -109,21 +104,19 @@ class BikeStoreMainWin(QDialog):
         Returns:
         - None
         """
-        if self.conn.is_connected() == False:
-            self.create_connection()
         # Get the username and password
         username = self.ui.txtUserName.text()
         password = self.ui.txtPass.text()
         sql = """ select t.role 
                     from users u, type t
-                   where upper(u.username) = upper(%s) 
+                   where u.username = %s 
                      and u.pwd = md5(%s)
                      and t.user_role_id = u.user_role_id 
               """
-        # Execute the query
-        self.cursor.clear_attributes
-        self.cursor.execute(sql, (username, password))
-        result = self.cursor.fetchall()
+        # Execute the query on a pooled connection
+        with self.pool.cursor() as cursor:
+            cursor.execute(sql, (username, password))
+            result = cursor.fetchall()
         # Check the result
         if len(result) == 0:
             self.ui.lblLoginError.setText("Invalid username or password")
@@ -131,24 +124,31 @@ class BikeStoreMainWin(QDialog):
         else:
             # Initialize the dialogs
             # Check the role
+            # The portal dialogs are modal, the connection is returned to the pool when they close
             # If the role is Customer, show the Customer Main Window
             if result[0][0] == 'Customer':
-                self._bikeStoreCustMain = BikeStoreCustMain(username, self.conn, self.cursor, parent=self)
-                self._bikeStoreCustMain.set_main_dialog(self)
-                self.ui.hide()
-                self._bikeStoreCustMain.exec_()
+                from BikeStoreCustMainDialog import BikeStoreCustMain
+                with self.pool.connection() as conn:
+                    self._bikeStoreCustMain = BikeStoreCustMain(username, conn, conn.cursor(), parent=self)
+                    self._bikeStoreCustMain.set_main_dialog(self)
+                    self.ui.hide()
+                    self._bikeStoreCustMain.exec_()
             # If the role is Manager, show the Manager Main Window
             elif result[0][0] == 'Manager':
-                self._bikeStoreManagerMain = BikeStoreManagerMain(username, self.conn, self.cursor, parent=self)
-                self._bikeStoreManagerMain.set_main_dialog(self)
-                self.ui.hide()
-                self._bikeStoreManagerMain.exec_()
+                from BikeStoreManagerMainDialog import BikeStoreManagerMain
+                with self.pool.connection() as conn:
+                    self._bikeStoreManagerMain = BikeStoreManagerMain(username, conn, conn.cursor(), parent=self)
+                    self._bikeStoreManagerMain.set_main_dialog(self)
+                    self.ui.hide()
+                    self._bikeStoreManagerMain.exec_()
             # If the role is Employee, show the Employee Main Window
             elif result[0][0] == 'Employee':
-                self._bikeStoreEmplMain = BikeStoreEmplMain(username,self.conn, self.cursor, parent=self)
-                self._bikeStoreEmplMain.set_main_dialog(self)
-                self.ui.hide()
-                self._bikeStoreEmplMain.exec_()
+                from BikeStoreEmplMainDialog import BikeStoreEmplMain
+                with self.pool.connection() as conn:
+                    self._bikeStoreEmplMain = BikeStoreEmplMain(username, conn, conn.cursor(), parent=self)
+                    self._bikeStoreEmplMain.set_main_dialog(self)
+                    self.ui.hide()
+                    self._bikeStoreEmplMain.exec_()
             else:
                 # If the role is not defined, show the error message
                 self.ui.lblLoginError.setText("System Error, Please contact admin")
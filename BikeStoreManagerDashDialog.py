@@ -10,51 +10,111 @@ Project: TerraBikes
 '''
 
 import sys
-from PyQt5.QtWidgets import QDialog, QApplication, QMessageBox, QTableWidgetItem, QLabel
-from PyQt5.QtCore import QDate, Qt, pyqtSlot
+import time
+from collections import defaultdict
+from PyQt5.QtWidgets import QDialog, QApplication, QMessageBox
+from PyQt5.QtCore import QDate, Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QFont, QColor
 from BikeStoreManagerDashDialog_ui import Ui_BikeStoreManagerDashDialog
-from BikeStoreUtils import create_connection
+from BikeStoreUtils import get_pool, get_result_cache, QueryExecutor, popupMessage
+from BikeStoreTableModel import fill_table
+from BikeStoreFilters import SqlFilter, DashboardFilter
+from BikeStoreDwhRefresh import (run_refresh, rollups_available, employee_sales_source, published_generation,
+                                 refresh_progress)
 from datetime import datetime
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib.pyplot as plt
-import pandas as pd
-import seaborn as sns
+import numpy as np
+from BikeStoreCharts import ChartPanel, ChartRenderer, light_palette
+from BikeStoreColumns import ColumnarResult
 
-# Connect to the database
-conn = create_connection(config_file='terrabikes_bi.ini')
-cursor = conn.cursor()
+# Filter clauses of the rollup tables, which all name their columns year, month, region and state
+ROLLUP_FILTERS = {'year': "year {}", 'region': "region {}", 'month': "month {}"}
 
-conn2 = create_connection(config_file='terrabikes.ini')
-cursor2 = conn2.cursor()
 
-def _close_db_connections():
+class _RefreshSignals(QObject):
     """
-    Closes the database connections.
+    Signals emitted by a _RefreshJob from its worker thread.
     """
-    cursor.close()
-    conn.close()
-    cursor2.close()
-    conn2.close()
+    finished = pyqtSignal(object)
+
+
+class _RefreshJob(QRunnable):
+    """
+    Runs an incremental warehouse refresh with run_refresh() in a QThreadPool worker.
+    """
+
+    def __init__(self):
+        super(_RefreshJob, self).__init__()
+        self.signals = _RefreshSignals()
+
+    def run(self):
+        try:
+            rowsTouched = run_refresh(incremental=True)
+        except Exception:
+            # The button must come back even if the warehouse cannot be reached
+            rowsTouched = {}
+        self.signals.finished.emit(rowsTouched)
+
 
 class BikeStoreManagerDash(QDialog):
     """
     A class representing the Bike Store Manager Dashboard.
     """
         
-    def __init__(self, _username, parent=None):
+    def __init__(self, _username, conn, cursor, parent=None):
         """
         Initializes the BikeStoreManagerDash object.
 
         Parameters:
         - _username (str): The username of the manager.
+        - conn (MySQLConnection): A connection to the terrabikes_bi warehouse.
+        - cursor (MySQLCursor): A cursor on the warehouse connection.
         - parent (QWidget): The parent widget (default is None).
         """
         super(BikeStoreManagerDash, self).__init__(parent)
         self.ui = Ui_BikeStoreManagerDashDialog()
         self.ui.setupUi(self)
+        self.conn = conn
+        self.cursor = cursor
         self._BikeStoreMainWin = None
-        
+        # The warehouse only changes on refresh, so results are cached until the next refresh
+        self._cache = get_result_cache(config_file='terrabikes_bi.ini')
+        # Each dashboard panel queries the warehouse on its own pooled connection
+        self._executor = QueryExecutor(get_pool(config_file='terrabikes_bi.ini'), max_threads=6, prepared=True,
+                                       cache=self._cache, parent=self)
+        self._executor.resultReady.connect(self._onQueryDone)
+        self._executor.queryFailed.connect(self._onPanelDone)
+        self._pendingPanels = set()
+        self._refreshStart = None
+        self._title = self.windowTitle()
+        self._refreshJob = None
+        # While a refresh runs, the progress published in dwh_refresh_status is shown in the window title
+        self._progressTimer = QTimer(self)
+        self._progressTimer.setInterval(1000)
+        self._progressTimer.timeout.connect(self._showRefreshProgress)
+        # The panels read the rollup tables of migration 004 and the materialized employee sales
+        # of migration 005 when they are installed
+        self._rollups = rollups_available()
+        self._empSales = employee_sales_source()
+        # Every chart keeps one figure for the life of the dialog, rendered off the GUI thread;
+        # the images are cached per filter combination until the next refresh
+        self._renderer = ChartRenderer(parent=self)
+        self._renderer.renderFailed.connect(self._onRenderFailed)
+        self._renderer.panelShown.connect(self._onPanelDone)
+        # The published warehouse generation keys the chart images; a refresh published by this dialog,
+        # the scheduled refresh or another session drops the cached results and images
+        self._generation = published_generation()
+        self._regionChart = ChartPanel(self.ui.barChartLayout, (5.5, 2.5), self._renderer, 'regionOrders')
+        self._statusChart = ChartPanel(self.ui.PieChartLayout, (3, 3), self._renderer, 'orderStatus')
+        self._trendChart = ChartPanel(self.ui.lineChartLayout, (6.5, 3), self._renderer, 'ordersByYear')
+        self._categoryChart = ChartPanel(self.ui.StackBarLayout, (4, 2.8), self._renderer, 'categoryQty')
+        self._topEmpChart = ChartPanel(self.ui.EmpChart1, (5, 3), self._renderer, 'topEmployees')
+        self._ratingChart = ChartPanel(self.ui.EmpChart2, (5, 3), self._renderer, 'ratingByRegion')
+        self._revenuePie = ChartPanel(self.ui.EmpPie1, (5, 3), self._renderer, 'revenueByRegion')
+        self._ordersPie = ChartPanel(self.ui.EmpPie2, (5, 3), self._renderer, 'ordersByRegion')
+        # The chart panels are named like the executor keys of their queries
+        self._chartNames = {'regionOrders', 'orderStatus', 'ordersByYear', 'categoryQty', 'topEmployees',
+                            'ratingByRegion', 'revenueByRegion', 'ordersByRegion'}
+
         self.username = _username
         self.ui.wdgtShortSidebar.hide()
         self.ui.ManagerDashboardStacked.setCurrentIndex(0)
@@ -96,8 +156,9 @@ class BikeStoreManagerDash(QDialog):
                     from users u, employee e
                     where u.username = %s
                     and e.employee_id = u.employee_id"""
-        cursor2.execute(sql, (self.username,))
-        result = cursor2.fetchall()
+        with get_pool(config_file='terrabikes.ini').cursor() as cursor:
+            cursor.execute(sql, (self.username,))
+            result = cursor.fetchall()
         if len(result) > 0:
             ManagerName = result[0][0]
             currDate = datetime.now().date()
@@ -111,8 +172,8 @@ class BikeStoreManagerDash(QDialog):
         
         self.ui.SelectYear.blockSignals(True)
         sql = """select distinct year from calendar order by 1"""
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        self.cursor.execute(sql)
+        result = self.cursor.fetchall()
         self.ui.SelectYear.clear()
         if len(result) > 0:
             self.ui.SelectYear.addItem("All")
@@ -124,8 +185,8 @@ class BikeStoreManagerDash(QDialog):
         
         sql = """select distinct region from region where region!= 'Online' order by 1"""
         self.ui.SelectRegion.blockSignals(True)
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        self.cursor.execute(sql)
+        result = self.cursor.fetchall()
         self.ui.SelectRegion.clear()
         if len(result) > 0:
             self.ui.SelectRegion.addItem("All")
@@ -142,7 +203,12 @@ class BikeStoreManagerDash(QDialog):
         Parameters:
         - Year (str): The selected year (default is 'All').
         - Region (str): The selected region (default is 'All').
+
+        The six panel queries run concurrently and each panel is drawn as soon as its data arrives.
         """
+        self._syncGeneration()
+        self._pendingPanels = {'summary', 'regionOrders', 'orderStatus', 'ordersByYear', 'categoryQty', 'topProducts'}
+        self._refreshStart = time.perf_counter()
         self.setSummaryLabels(Year, Region)
         self.setRegionOrdersBarChart(Year, Region)
         self.setOrderCountsStatusChart(Year, Region)
@@ -150,6 +216,75 @@ class BikeStoreManagerDash(QDialog):
         self.setQuantitiesByCategoryChart(Year, Region)
         self.populateTopProducts(Year, Region)
 
+    def _syncGeneration(self):
+        """
+        Drops the cached results and chart images if the warehouse has published a refresh since they were read.
+        """
+        generation = published_generation()
+        if generation != self._generation:
+            self._generation = generation
+            self._cache.invalidate()
+            self._renderer.clear()
+
+    def _salesFilter(self, Year='All', Region='All'):
+        """
+        Returns the current sales dashboard selections as a DashboardFilter.
+
+        Args:
+            Year (str): The selected year. Default is 'All'.
+            Region (str): The selected region. Default is 'All'.
+        """
+        return DashboardFilter(Year, Region, from_date=self.fromDate, to_date=self.toDate,
+                               radio_year=self.RadioYear, radio_year2=self.RadioYear2,
+                               radio_month=self.RadioMonth)
+
+    def _useRollups(self):
+        """
+        Checks whether the sales panels can read the rollup tables.
+
+        The sales rollups are by month, a date range filter needs the fact tables.
+
+        Returns:
+            bool: True if the rollups can answer the current selections.
+        """
+        return self._rollups and (self.fromDate is None or self.toDate is None)
+
+    def _onQueryDone(self, key, _):
+        """
+        Marks a table or label panel done when its query has returned. Chart panels are done when
+        the renderer shows them, see _onPanelDone().
+
+        Args:
+            key (str): The executor key of the query.
+        """
+        if key not in self._chartNames:
+            self._onPanelDone(key)
+
+    def _onPanelDone(self, key, _=None):
+        """
+        Shows the total refresh time in the window title once the last dashboard panel has been drawn.
+
+        Args:
+            key (str): The executor key or chart name of the panel that finished.
+        """
+        if key not in self._pendingPanels:
+            return
+        self._pendingPanels.discard(key)
+        if not self._pendingPanels and self._refreshStart is not None:
+            seconds = time.perf_counter() - self._refreshStart
+            self.setWindowTitle(f'{self._title} - dashboard refreshed in {seconds:.2f}s')
+            self._refreshStart = None
+
+    def _onRenderFailed(self, name, message):
+        """
+        Reports a chart that could not be drawn, the way failed panel queries are reported.
+
+        Args:
+            name (str): The chart name.
+            message (str): The error message.
+        """
+        popupMessage(f'Chart {name} could not be drawn: {message}', "Error")
+
     '''
     ***********  EVENT HANDLERS  ***********
     =========================================
@@ -337,22 +472,40 @@ class BikeStoreManagerDash(QDialog):
                     order_details od
                 WHERE
                     s.order_detail_key = od.order_detail_key"""
-        if Year != 'All':
-            sql = sql + " and s.calendar_key in (select calendar_key from calendar where year = "+Year+")"
-        if Region != 'All':
-            sql = sql + " and s.region_key in (select region_key from region where region = '"+Region+"')"
-        if self.fromDate != None and self.toDate != None:
-            sql = sql + " and s.calendar_key in (select calendar_key from calendar where full_date between '"+str(self.fromDate)+"' and '"+str(self.toDate)+"')"
-
-        if self.RadioYear != None and self.RadioYear2 == None:
-            sql = sql + " and s.calendar_key in (select calendar_key from calendar where year = "+str(self.RadioYear)+")"
-        if self.RadioYear2 != None and self.RadioYear != None:
-            sql = sql + " and s.calendar_key in (select calendar_key from calendar where year in ("+str(self.RadioYear2)+","+str(self.RadioYear)+"))"
-        if self.RadioMonth != None:
-            sql = sql + " and s.calendar_key in (select calendar_key from calendar where month >= "+str(self.RadioMonth)+")"
-
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        if self._useRollups():
+            customers = self._salesFilter(Year, Region).apply(
+                SqlFilter("select count(distinct customer_key) from sales_customer_rollup where 1=1"), **ROLLUP_FILTERS)
+            customerSql, customerParams = customers.build()
+            sql = f"""SELECT 
+                    COALESCE(SUM(order_count), 0) order_count,
+                    ({customerSql}) customer_count,
+                    SUM(qty) total_items,
+                    ROUND(SUM(revenue), 2) total_sales,
+                    ROUND(SUM(rating_sum) / NULLIF(SUM(rating_count), 0), 2) average_rating,
+                    ROUND((SUM(order_count) / ((DATEDIFF(MAX(last_date), MIN(first_date)) / 365) * 12)),
+                            2) avg_orders
+                FROM
+                    sales_order_rollup
+                WHERE 1=1"""
+            sql, params = self._salesFilter(Year, Region).apply(SqlFilter(sql), **ROLLUP_FILTERS).build()
+            params = customerParams + params
+        else:
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter(sql),
+                year="s.calendar_key in (select calendar_key from calendar where year {})",
+                region="s.region_key in (select region_key from region where region {})",
+                date="s.calendar_key in (select calendar_key from calendar where full_date {})",
+                month="s.calendar_key in (select calendar_key from calendar where month {})")
+            sql, params = builder.build()
+        self._executor.submit('summary', sql, params, on_result=self._drawSummaryLabels)
+
+    def _drawSummaryLabels(self, result):
+        """
+        Fills the summary labels once the summary query has returned.
+
+        Args:
+            result (list): The rows returned by the summary query.
+        """
         if len(result) > 0:
             font = QFont()
             font.setPointSize(24)
@@ -428,56 +581,42 @@ class BikeStoreManagerDash(QDialog):
 
         group = """ group by r.region
                     order by 1"""
-        if Year != 'All':
-            select = select + " and s.calendar_key in (select calendar_key from calendar where year = "+Year+")"
-        if Region != 'All':
-            select = select + " and r.region = '"+Region+"'"
-        if self.fromDate != None and self.toDate != None:
-            select = select + " and s.calendar_key in (select calendar_key from calendar where full_date between '"+str(self.fromDate)+"' and '"+str(self.toDate)+"')"
-
-        if self.RadioYear != None and self.RadioYear2 == None:
-            select = select + " and s.calendar_key in (select calendar_key from calendar where year = "+str(self.RadioYear)+")"
-        if self.RadioYear2 != None and self.RadioYear != None:
-            select = select + " and s.calendar_key in (select calendar_key from calendar where year in ("+str(self.RadioYear2)+","+str(self.RadioYear)+"))"
-        if self.RadioMonth != None:
-            select = select + " and s.calendar_key in (select calendar_key from calendar where month >= "+str(self.RadioMonth)+")"
-
-        sql = select+group
-        cursor.execute(sql)
-        orderData = cursor.fetchall()
+        if self._useRollups():
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter("select region, sum(order_count) from sales_order_rollup where 1=1"), **ROLLUP_FILTERS)
+            sql, params = builder.build(" group by region order by 1")
+        else:
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter(select),
+                year="s.calendar_key in (select calendar_key from calendar where year {})",
+                region="r.region {}",
+                date="s.calendar_key in (select calendar_key from calendar where full_date {})",
+                month="s.calendar_key in (select calendar_key from calendar where month {})")
+            sql, params = builder.build(group)
+        if self._regionChart.show(sql, params, self._generation):
+            self._executor.cancel('regionOrders')
+            return
+        self._executor.submit('regionOrders', sql, params, on_result=self._drawRegionOrdersBarChart)
+
+    def _drawRegionOrdersBarChart(self, orderData):
+        """
+        Draws the region orders bar chart once its query has returned.
+
+        Args:
+            orderData (list): The (region, order count) rows.
+        """
         if len(orderData) > 0:
             labels = [region_name for region_name, _ in orderData]
             values = [order_count for _, order_count in orderData]
 
             bar_colors = ['skyblue', 'lightgreen', 'lightcoral', 'lightsalmon', 'aquamarine']
 
-            fig, ax = plt.subplots(figsize=(5.5, 2.5))
-            bars = ax.bar(labels, values, color=bar_colors)
-            ax.set_xlabel('Region', fontsize=10)
-            ax.set_ylabel('Order Count', fontsize=10)
-            ax.set_title('Total Orders by Region', fontsize=10)
-
-            for bar, value in zip(bars, values):
-                yval = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2, yval, round(value, 2), ha='center', va='bottom', fontsize=8)
-            ax.tick_params(axis='x', labelsize=8)
-            ax.tick_params(axis='y', labelsize=8)
-            canvas = FigureCanvas(fig)
-            while self.ui.barChartLayout.count():
-                item = self.ui.barChartLayout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            self.ui.barChartLayout.addWidget(canvas)
-            plt.close(fig)
+            def paint(chart):
+                chart.bar(labels, values, colors=bar_colors)
+                chart.decorate('Total Orders by Region', 'Region', 'Order Count', label_fontsize=10, tick_fontsize=8)
+            self._regionChart.render(paint)
         else:
-            while self.ui.barChartLayout.count():
-                item = self.ui.barChartLayout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            noData = QLabel("No Data")
-            noData.setStyleSheet("color: white; background-color: DodgerBlue;")
-            noData.setAlignment(Qt.AlignCenter)
-            self.ui.barChartLayout.addWidget(noData)
+            self._regionChart.showNoData()
 
     def setOrderCountsStatusChart(self, Year='All', Region='All'):
         """
@@ -495,48 +634,43 @@ class BikeStoreManagerDash(QDialog):
         group = """ group by order_status
                 order by 1"""
         
-        if Year != 'All':
-            select = select + " and order_date in (select full_date from calendar where year = "+Year+")"
-        if Region != 'All':
-            select = select + " and order_detail_key in (select order_detail_key from sales s, region r where s.region_key = r.region_key and r.region = '"+Region+"') "
-        if self.fromDate != None and self.toDate != None:
-            select = select + " and order_date between '"+str(self.fromDate)+"' and '"+str(self.toDate)+"'"
-        
-        if self.RadioYear != None and self.RadioYear2 == None:
-            select = select + " and order_date in (select full_date from calendar where year = "+str(self.RadioYear)+")"
-        if self.RadioYear2 != None and self.RadioYear != None:
-            select = select + " and order_date in (select full_date from calendar where year in ("+str(self.RadioYear2)+","+str(self.RadioYear)+"))"
-        if self.RadioMonth != None:
-            select = select + " and order_date in (select full_date from calendar where month >= "+str(self.RadioMonth)+")"
-
-        sql = select+group
-        cursor.execute(sql)
-        orderData = cursor.fetchall()
+        if self._useRollups():
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter("select sum(line_count), order_status from sales_order_rollup where 1=1"), **ROLLUP_FILTERS)
+        else:
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter(select),
+                year="order_date in (select full_date from calendar where year {})",
+                region="order_detail_key in (select order_detail_key from sales s, region r where s.region_key = r.region_key and r.region {})",
+                date="order_date {}",
+                month="order_date in (select full_date from calendar where month {})")
+        sql, params = builder.build(group)
+        if self._statusChart.show(sql, params, self._generation):
+            self._executor.cancel('orderStatus')
+            return
+        self._executor.submit('orderStatus', sql, params, on_result=self._drawOrderCountsStatusChart)
+
+    def _drawOrderCountsStatusChart(self, orderData):
+        """
+        Draws the order status pie chart once its query has returned.
+
+        Args:
+            orderData (list): The (order count, order status) rows.
+        """
         if len(orderData) > 0:
             labels = [order_status for _, order_status in orderData]
             values = [order_count for order_count, _ in orderData]
 
             colors = ['gold', 'lightskyblue', 'lightcoral', 'lightgreen']
-            fig, ax = plt.subplots(figsize=(3, 3))
             label_fontsize = 8
-            ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors, textprops={'fontsize': label_fontsize})
-            ax.set_title('Order Counts by Status', fontsize=10)
-            canvas = FigureCanvas(fig)
-            while self.ui.PieChartLayout.count():
-                item = self.ui.PieChartLayout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            self.ui.PieChartLayout.addWidget(canvas)
-            plt.close(fig)
+
+            def paint(chart):
+                ax = chart.reset()
+                ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors, textprops={'fontsize': label_fontsize})
+                chart.decorate('Order Counts by Status')
+            self._statusChart.render(paint)
         else:
-            while self.ui.PieChartLayout.count():
-                item = self.ui.PieChartLayout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            noData = QLabel("No Data")
-            noData.setStyleSheet("color: white; background-color: DodgerBlue;")
-            noData.setAlignment(Qt.AlignCenter)
-            self.ui.PieChartLayout.addWidget(noData)
+            self._statusChart.showNoData()
 
     def setOrderCountsByYearChart(self, Year='All', Region='All'):
         """
@@ -555,57 +689,46 @@ class BikeStoreManagerDash(QDialog):
          group by cd.year, monthname(cd.full_date), cd.month
         order by 1 desc,4"""
         
-        if Year != 'All':
-            select = select + " and cd.year = "+Year
-        if Region != 'All':
-            select = select + " and s.region_key in (select region_key from region where region = '"+Region+"')"
-        if self.fromDate != None and self.toDate != None:
-            select = select + " and cd.full_date between '"+str(self.fromDate)+"' and '"+str(self.toDate)+"'"
-
-        if self.RadioYear != None and self.RadioYear2 == None:
-            select = select + " and cd.year = "+str(self.RadioYear)
-        if self.RadioYear2 != None and self.RadioYear != None:
-            select = select + " and cd.year in ("+str(self.RadioYear2)+","+str(self.RadioYear)+")"
-        if self.RadioMonth != None:
-            select = select + " and cd.month >= "+str(self.RadioMonth)
-
-        sql = select+group
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        if self._useRollups():
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter("""select year, monthname(makedate(year, 1) + interval (month - 1) month), sum(order_count), month
+                             from sales_order_rollup where 1=1"""), **ROLLUP_FILTERS)
+            sql, params = builder.build(""" group by year, month
+                                            order by 1 desc,4""")
+        else:
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter(select),
+                year="cd.year {}",
+                region="s.region_key in (select region_key from region where region {})",
+                date="cd.full_date {}",
+                month="cd.month {}")
+            sql, params = builder.build(group)
+        if self._trendChart.show(sql, params, self._generation):
+            self._executor.cancel('ordersByYear')
+            return
+        self._executor.submit('ordersByYear', sql, params, on_result=self._drawOrderCountsByYearChart)
+
+    def _drawOrderCountsByYearChart(self, result):
+        """
+        Draws the order trend line chart once its query has returned.
+
+        Args:
+            result (list): The (year, month name, order count, month) rows.
+        """
         if len(result) > 0:
             columns = ['year', 'month', 'total_orders','month_number']
-            order_data = pd.DataFrame(result, columns=columns)
-
-            fig, ax = plt.subplots(figsize=(6.5, 3))
+            order_data = ColumnarResult.from_rows(result, columns, [int, object, float, int])
 
-            for year in order_data['year'].unique():
-                data_by_year = order_data[order_data['year'] == year]
-                ax.plot(data_by_year['month'], data_by_year['total_orders'], label=str(year))
+            series = []
+            for year, data_by_year in order_data.groups('year'):
+                series.append((year, data_by_year['month'], data_by_year['total_orders']))
 
-
-            ax.set_xlabel('Month', fontsize=8)
-            ax.set_ylabel('Total Orders', fontsize=8)
-            ax.set_title('Order Trends by Year and Month', fontsize=10)
-            ax.legend(loc='lower right', fontsize=8)
-            ax.tick_params(axis='x', labelsize=6)
-            ax.tick_params(axis='y', labelsize=6)
-
-            canvas = FigureCanvas(fig)
-            while self.ui.lineChartLayout.count():
-                item = self.ui.lineChartLayout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            self.ui.lineChartLayout.addWidget(canvas)
-            plt.close(fig)
+            def paint(chart):
+                chart.lines(series, legend_loc='lower right')
+                chart.decorate('Order Trends by Year and Month', 'Month', 'Total Orders', tick_fontsize=6)
+            self._trendChart.render(paint)
         else:
-            while self.ui.lineChartLayout.count():
-                item = self.ui.lineChartLayout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            noData = QLabel("No Data")
-            noData.setStyleSheet("color: white; background-color: DodgerBlue;")
-            noData.setAlignment(Qt.AlignCenter)
-            self.ui.lineChartLayout.addWidget(noData)
+            self._trendChart.showNoData()
 
     def setQuantitiesByCategoryChart(self, Year='All', Region='All'):
         """
@@ -624,65 +747,54 @@ class BikeStoreManagerDash(QDialog):
         group = """ group by p.category_name, c.year
         order by 1 desc, 2"""
 
-        if Year != 'All':
-            select = select + " and c.year = "+Year
-        if Region != 'All':
-            select = select + " and s.region_key in (select region_key from region where region = '"+Region+"')"
-
-        if self.fromDate != None and self.toDate != None:
-            select = select + " and c.full_date between '"+str(self.fromDate)+"' and '"+str(self.toDate)+"'"
-
-        if self.RadioYear != None and self.RadioYear2 == None:
-            select = select + " and c.year = "+str(self.RadioYear)
-        if self.RadioYear2 != None and self.RadioYear != None:
-            select = select + " and c.year in ("+str(self.RadioYear2)+","+str(self.RadioYear)+")"
-        if self.RadioMonth != None:
-            select = select + " and c.month >= "+str(self.RadioMonth)
+        if self._useRollups():
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter("select year, category_name, sum(line_count) from sales_product_rollup where 1=1"), **ROLLUP_FILTERS)
+            sql, params = builder.build(""" group by category_name, year
+                                            order by 1 desc, 2""")
+        else:
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter(select),
+                year="c.year {}",
+                region="s.region_key in (select region_key from region where region {})",
+                date="c.full_date {}",
+                month="c.month {}")
+            sql, params = builder.build(group)
+        if self._categoryChart.show(sql, params, self._generation):
+            self._executor.cancel('categoryQty')
+            return
+        self._executor.submit('categoryQty', sql, params, on_result=self._drawQuantitiesByCategoryChart)
+
+    def _drawQuantitiesByCategoryChart(self, result):
+        """
+        Draws the category quantities stacked bar chart once its query has returned.
 
-        sql = select+group
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        Args:
+            result (list): The (year, category, quantity) rows.
+        """
         if len(result) > 0:
-            df = pd.DataFrame(result, columns=['Year', 'Category', 'Quantity'])
-            df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce').fillna(0)
+            data = ColumnarResult.from_rows(result, ['Year', 'Category', 'Quantity'], [int, object, float])
 
             custom_colors = ['lightgreen', 'lightblue', 'gold', 'lightsalmon', 'lightcoral']
 
-            # Pivot the DataFrame to create a matrix suitable for plotting
-            pivot_df = df.pivot(index='Year', columns='Category', values='Quantity').fillna(0)
-
-            fig, ax = plt.subplots(figsize=(4, 2.8))
-
-            # Plotting
-            pivot_df.plot(kind='bar', stacked=True, figsize=(4, 2.8), color=custom_colors, ax=ax, width=0.3)
-
-            # Add labels and title
-            ax.set_xlabel('Year', fontsize=8)
-            ax.set_ylabel('Quantity', fontsize=8)
-            ax.set_title('Year-wise Splits of Bike Quantities by Category', fontsize=10)
-
-            # Add legend
-            ax.legend(title='Category', loc='upper left',fontsize=6)
-            ax.tick_params(axis='x', labelsize=6, rotation=0)
-            ax.tick_params(axis='y', labelsize=6)
-            # ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
-            # Show the plot
-            canvas = FigureCanvas(fig)
-            while self.ui.StackBarLayout.count():
-                item = self.ui.StackBarLayout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            self.ui.StackBarLayout.addWidget(canvas)
-            plt.close(fig)
+            # Pivot the rows to create a matrix suitable for plotting
+            years, categories, quantities = data.pivot(index='Year', columns='Category', values='Quantity')
+            quantities[np.isnan(quantities)] = 0
+
+            def paint(chart):
+                # Plotting
+                ax = chart.grouped_bars(years, categories, quantities, colors=custom_colors, stacked=True, width=0.3)
+
+                # Add labels and title
+                chart.decorate('Year-wise Splits of Bike Quantities by Category', 'Year', 'Quantity')
+
+                # Add legend
+                ax.legend(title='Category', loc='upper left',fontsize=6)
+                ax.tick_params(axis='x', labelsize=6, rotation=0)
+                ax.tick_params(axis='y', labelsize=6)
+            self._categoryChart.render(paint)
         else:
-            while self.ui.StackBarLayout.count():
-                item = self.ui.StackBarLayout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            noData = QLabel("No Data")
-            noData.setStyleSheet("color: white; background-color: DodgerBlue;")
-            noData.setAlignment(Qt.AlignCenter)
-            self.ui.StackBarLayout.addWidget(noData)
+            self._categoryChart.showNoData()
 
 
     def populateTopProducts(self, Year='All', Region='All'):
@@ -705,34 +817,35 @@ class BikeStoreManagerDash(QDialog):
         group = """ group by p.product_name
                     order by 3 desc
                     limit 10"""
-        if Year != 'All':
-            select = select + " and cd.year = "+Year
-        if Region != 'All':
-            select = select + " and s.region_key in (select region_key from region where region = '"+Region+"')"
-        if self.fromDate != None and self.toDate != None:
-            select = select + " and cd.full_date between '"+str(self.fromDate)+"' and '"+str(self.toDate)+"'"
-
-        if self.RadioYear != None and self.RadioYear2 == None:
-            select = select + " and cd.year = "+str(self.RadioYear)
-        if self.RadioYear2 != None and self.RadioYear != None:
-            select = select + " and cd.year in ("+str(self.RadioYear2)+","+str(self.RadioYear)+")"
-        if self.RadioMonth != None:
-            select = select + " and cd.month >= "+str(self.RadioMonth)
-
-        sql = select+group
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        if self._useRollups():
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter("""select product_name, sum(qty) items_sold, sum(order_count) orders
+                             from sales_product_rollup where 1=1"""), **ROLLUP_FILTERS)
+            sql, params = builder.build(""" group by product_name
+                                            order by 3 desc
+                                            limit 10""")
+        else:
+            builder = self._salesFilter(Year, Region).apply(
+                SqlFilter(select),
+                year="cd.year {}",
+                region="s.region_key in (select region_key from region where region {})",
+                date="cd.full_date {}",
+                month="cd.month {}")
+            sql, params = builder.build(group)
+        self._executor.submit('topProducts', sql, params, on_result=self._drawTopProducts)
+
+    def _drawTopProducts(self, result):
+        """
+        Fills the top products table once its query has returned.
+
+        Args:
+            result (list): The (product, items sold, orders) rows.
+        """
         self.ui.tblTopProducts.setRowCount(0)
         if len(result) > 0:
-            self.ui.tblTopProducts.setRowCount(len(result))
-            for row_number, row_data in enumerate(result):
-                for column_number, data in enumerate(row_data):
-                    item = QTableWidgetItem(str(data))
-                    self.ui.tblTopProducts.setItem(row_number, column_number, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.ui.tblTopProducts.resizeColumnsToContents()
+            fill_table(self.ui.tblTopProducts, result, sortable=False)
             
-            colorsList = sns.light_palette("lightgreen", 10).as_hex()
+            colorsList = light_palette("lightgreen", 10)
             colorsList = colorsList[::-1]
             for rowIndex in range(self.ui.tblTopProducts.rowCount()):
                 self.setColortoRow(rowIndex, QColor(colorsList[rowIndex]), self.ui.tblTopProducts)
@@ -794,8 +907,8 @@ class BikeStoreManagerDash(QDialog):
         from calendar c
         order by 1 desc
         """
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        self.cursor.execute(sql)
+        result = self.cursor.fetchall()
         self.ui.empYear.blockSignals(True)
         self.ui.empYear.clear()
         if len(result) > 0:
@@ -810,8 +923,8 @@ class BikeStoreManagerDash(QDialog):
         where r.region != "Online"
         order by 1
         """
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        self.cursor.execute(sql)
+        result = self.cursor.fetchall()
         self.ui.empRegion.blockSignals(True)
         self.ui.empRegion.clear()
         if len(result) > 0:
@@ -839,12 +952,12 @@ class BikeStoreManagerDash(QDialog):
             select distinct r.state
             from region r
             where r.region != "Online"
-            and r.region = '"""+self.ui.empRegion.currentText()+"""'
+            and r.region = %s
             order by 1
             """
 
-            cursor.execute(sql)
-            result = cursor.fetchall()
+            self.cursor.execute(sql, (self.ui.empRegion.currentText(),))
+            result = self.cursor.fetchall()
             self.ui.empState.blockSignals(True)
             self.ui.empState.clear()
             if len(result) > 0:
@@ -872,6 +985,7 @@ class BikeStoreManagerDash(QDialog):
         state = self.ui.empState.currentText()
         if state == "":
             state = "All"
+        self._syncGeneration()
         self.top_Emp_by_sales_Chart(Year, Region, state)
         self.pie_regions_by_emp_performance(Year, Region, state)
         self.set_emp_Summary_labels(Year, Region, state)
@@ -891,6 +1005,25 @@ class BikeStoreManagerDash(QDialog):
     def on_empState_currentIndexChanged(self):
         self.setupEmpCharts()
                 
+    def _fetchCached(self, sql, params):
+        """
+        Runs a warehouse query on the dashboard cursor unless its result is already cached.
+
+        Args:
+            sql (str): The SQL template.
+            params (tuple): The bind parameters.
+
+        Returns:
+            list: The result rows.
+        """
+        result = self._cache.get(sql, params)
+        if result is None:
+            generation = self._cache.generation
+            self.cursor.execute(sql, params)
+            result = self.cursor.fetchall()
+            self._cache.put(sql, params, result, generation)
+        return result
+
     def prepareFinalSql(self, year, region, state, select, group, special="None"):
         """
         Prepare the final SQL query based on the provided parameters.
@@ -904,21 +1037,17 @@ class BikeStoreManagerDash(QDialog):
             special (str, optional): Special flag to indicate a special condition. Defaults to "None".
 
         Returns:
-            str: The final SQL query.
+            tuple: The final SQL query (str) and its bind parameters (tuple).
 
         """
+        builder = SqlFilter(select)
         if year != 'All':
             if special == "special":
-                select = select + """ and year <= """+year
+                builder.where("year <= %s", int(year))
             else:
-                select = select + """ and year = """+year
-        if region != 'All':
-            select = select + """ and region = '"""+region+"""' """
-        if state != 'All':
-            select = select + """ and state = '"""+state+"""' """
-        
-        sql = select+group
-        return sql
+                builder.where("year = %s", int(year))
+        DashboardFilter(region=region, state=state).apply(builder, region="region {}", state="state {}")
+        return builder.build(group)
     
     def top_Emp_by_sales_Chart(self, year='All', region='All', state='All'):
         """
@@ -929,10 +1058,16 @@ class BikeStoreManagerDash(QDialog):
             region (str): The region for which the data is to be displayed. Default is 'All'.
             state (str): The state for which the data is to be displayed. Default is 'All'.
         """
-        select1 = """
-        with top_emp as (select employee_id, round(sum(price),2) 
-                        from employee_sales_view 
-                        where 1=1 """
+        if self._rollups:
+            select1 = """
+            with top_emp as (select employee_id, round(sum(revenue),2) 
+                            from employee_rollup 
+                            where 1=1 """
+        else:
+            select1 = f"""
+            with top_emp as (select employee_id, round(sum(price),2) 
+                            from {self._empSales} 
+                            where 1=1 """
 
         if year == 'All':
             select1 = select1 + """ and year = (select max(year) from calendar) """
@@ -942,52 +1077,46 @@ class BikeStoreManagerDash(QDialog):
                 limit 5)
                 """
 
-        sql_part1 = self.prepareFinalSql(year, region, state, select1, group1)
+        sql_part1, params1 = self.prepareFinalSql(year, region, state, select1, group1)
 
-        select2 = """
-            select ev.year, ev.employee_id, ev.employee_name,
-            round(sum(ev.price),2) as Revenue_generated, count(distinct ev.order_id) as count_of_orders
-            from employee_sales_view ev, top_emp te 
-            where ev.employee_id = te.employee_id """
+        if self._rollups:
+            select2 = """
+                select ev.year, ev.employee_id, ev.employee_name,
+                round(sum(ev.revenue),2) as Revenue_generated, sum(ev.order_count) as count_of_orders
+                from employee_rollup ev, top_emp te 
+                where ev.employee_id = te.employee_id """
+        else:
+            select2 = f"""
+                select ev.year, ev.employee_id, ev.employee_name,
+                round(sum(ev.price),2) as Revenue_generated, count(distinct ev.order_id) as count_of_orders
+                from {self._empSales} ev, top_emp te 
+                where ev.employee_id = te.employee_id """
 
         group2 = """
         group by year, employee_id, employee_name
         order by 1,4 desc;
         """
 
-        sql_part2 = self.prepareFinalSql(year, region, state, select2, group2, "special")
+        sql_part2, params2 = self.prepareFinalSql(year, region, state, select2, group2, "special")
 
         sql = sql_part1 + sql_part2
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        if self._topEmpChart.show(sql, params1 + params2, self._generation):
+            return
+        result = self._fetchCached(sql, params1 + params2)
         if len(result) > 0:
-            df = pd.DataFrame(result, columns=['Year', 'Employee_ID', 'Employee_Name', 'Revenue_generated', 'count_of_orders'])
-
-            pivot_df = df.pivot(index='Employee_Name', columns='Year', values='Revenue_generated')
-            fig, ax = plt.subplots(figsize=(5, 3))
-            pivot_df.plot(kind='bar', ax=ax)
-            ax.set_title('Top 5 Employees by Revenue Generated', fontsize=10)
-            ax.set_xlabel('Employee Name', fontsize=8)
-            ax.set_ylabel('Revenue Generated', fontsize=8)
-            ax.tick_params(axis='x', rotation=0, labelsize=6, right=True)
-            ax.legend(loc='upper left')
-            canvas = FigureCanvas(fig)
-            while self.ui.EmpChart1.count():
-                item = self.ui.EmpChart1.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-
-            self.ui.EmpChart1.addWidget(canvas)
-            plt.close(fig)
+            data = ColumnarResult.from_rows(result, ['Year', 'Employee_ID', 'Employee_Name', 'Revenue_generated', 'count_of_orders'],
+                                            [int, int, object, float, int])
+
+            employees, years, revenue = data.pivot(index='Employee_Name', columns='Year', values='Revenue_generated', fill=np.nan)
+
+            def paint(chart):
+                ax = chart.grouped_bars(employees, years, revenue, legend_title='Year')
+                chart.decorate('Top 5 Employees by Revenue Generated', 'Employee Name', 'Revenue Generated')
+                ax.tick_params(axis='x', rotation=0, labelsize=6, right=True)
+                ax.legend(loc='upper left')
+            self._topEmpChart.render(paint)
         else:
-            while self.ui.EmpChart1.count():
-                item = self.ui.EmpChart1.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            noData = QLabel("No Data")
-            noData.setStyleSheet("color: white; background-color: DodgerBlue;")
-            noData.setAlignment(Qt.AlignCenter)
-            self.ui.EmpChart1.addWidget(noData)
+            self._topEmpChart.showNoData()
         
     def avg_rating_by_empregion(self, year='All', region='All', state='All'):
         """
@@ -1001,53 +1130,50 @@ class BikeStoreManagerDash(QDialog):
         Returns:
             None
         """
-        select = """select year, region, round(avg(rating),1)
-                    from employee_sales_view 
-                    where 1=1 """
+        if self._rollups:
+            select = """select year, region, round(sum(rating_sum) / nullif(sum(rating_count), 0),1)
+                        from employee_rollup 
+                        where 1=1 """
+        else:
+            select = f"""select year, region, round(avg(rating),1)
+                        from {self._empSales} 
+                        where 1=1 """
 
         group = """ 
             group by year, region
             order by 1,2 desc"""
 
-        sql = self.prepareFinalSql(year, region, state, select, group)
+        sql, params = self.prepareFinalSql(year, region, state, select, group)
 
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        if self._ratingChart.show(sql, params, self._generation):
+            return
+        result = self._fetchCached(sql, params)
         if len(result) > 0:
-            region_data = pd.DataFrame(result, columns=['Year', 'Region', 'Avg_Rating'])
-            region_data['Avg_Rating'] = pd.to_numeric(region_data['Avg_Rating'], errors='coerce')
+            region_data = ColumnarResult.from_rows(result, ['Year', 'Region', 'Avg_Rating'], [int, object, float])
             if year != 'All' or region != 'All' or state != 'All':
                 custom_colors = ['lightgreen', 'lightblue', 'gold', 'lightsalmon', 'lightcoral']
-                pivot_df = region_data.pivot(index='Region', columns='Year', values='Avg_Rating').fillna(0)
-                fig, ax = plt.subplots(figsize=(5, 3))
-                pivot_df.plot(kind='bar', color=custom_colors, ax=ax)
+                regions, years, ratings = region_data.pivot(index='Region', columns='Year', values='Avg_Rating')
+                ratings[np.isnan(ratings)] = 0
+
+                def draw(chart):
+                    ax = chart.grouped_bars(regions, years, ratings, colors=custom_colors, legend_title='Year')
+                    ax.legend(loc='lower left', title='Year')
+                    return ax
             else:
-                fig, ax = plt.subplots(figsize=(5, 3))
-                for year in region_data['Year'].unique():
-                    data_by_year = region_data[region_data['Year'] == year]
-                    ax.plot(data_by_year['Region'], data_by_year['Avg_Rating'], label=str(year))
-            ax.set_title('Average Rating by Region', fontsize=10)
-            ax.set_xlabel('Region')
-            ax.set_ylabel('Average Rating')
-            ax.tick_params(axis='x', rotation=0, labelsize=6, right=True)
-            ax.legend(loc='lower left')
-            canvas = FigureCanvas(fig)
-            while self.ui.EmpChart2.count():
-                item = self.ui.EmpChart2.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-
-            self.ui.EmpChart2.addWidget(canvas)
-            plt.close(fig)
+                series = []
+                for year, data_by_year in region_data.groups('Year'):
+                    series.append((year, data_by_year['Region'], data_by_year['Avg_Rating']))
+
+                def draw(chart):
+                    return chart.lines(series, legend_loc='lower left', legend_fontsize=None)
+
+            def paint(chart):
+                ax = draw(chart)
+                chart.decorate('Average Rating by Region', 'Region', 'Average Rating', label_fontsize=None)
+                ax.tick_params(axis='x', rotation=0, labelsize=6, right=True)
+            self._ratingChart.render(paint)
         else:
-            while self.ui.EmpChart2.count():
-                item = self.ui.EmpChart2.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-            noData = QLabel("No Data")
-            noData.setStyleSheet("color: white; background-color: DodgerBlue;")
-            noData.setAlignment(Qt.AlignCenter)
-            self.ui.EmpChart2.addWidget(noData)
+            self._ratingChart.showNoData()
     
     def populate_emp_datatable(self, year='All', region='All', state='All'):
         """
@@ -1058,38 +1184,42 @@ class BikeStoreManagerDash(QDialog):
             region (str): The region to filter the data by. Default is 'All'.
             state (str): The state to filter the data by. Default is 'All'.
         """
-        select = """
-        select employee_name, round(sum(price),2), count(distinct order_id) from employee_sales_view 
-        where 1=1 """
+        if self._rollups:
+            select = """
+            select employee_name, round(sum(revenue),2), sum(order_count) from employee_rollup 
+            where 1=1 """
+        else:
+            select = f"""
+            select employee_name, round(sum(price),2), count(distinct order_id) from {self._empSales} 
+            where 1=1 """
 
         group = """ group by employee_name
         order by 2 desc
         limit 10
         """
 
-        sql = self.prepareFinalSql(year, region, state, select, group)
+        sql, params = self.prepareFinalSql(year, region, state, select, group)
 
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        result = self._fetchCached(sql, params)
         self.ui.tblEmpSales.setRowCount(0)
         if len(result) > 0:
-            self.ui.tblEmpSales.setRowCount(len(result))
-            for row_number, row_data in enumerate(result):
-                for column_number, data in enumerate(row_data):
-                    item = QTableWidgetItem(str(data))
-                    self.ui.tblEmpSales.setItem(row_number, column_number, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.ui.tblEmpSales.resizeColumnsToContents()
+            fill_table(self.ui.tblEmpSales, result, sortable=False)
 
-            colorsList = sns.light_palette("xkcd:golden", 10).as_hex()
+            colorsList = light_palette("xkcd:golden", 10)
             colorsList = colorsList[::-1]
             for rowIndex in range(self.ui.tblEmpSales.rowCount()):
                 self.setColortoRow(rowIndex, QColor(colorsList[rowIndex]), self.ui.tblEmpSales)
 
-        select = """
-        select employee_name, round(avg(rating),2), count(distinct order_id)
-        from employee_sales_view
-        where 1=1 """
+        if self._rollups:
+            select = """
+            select employee_name, round(sum(rating_sum) / nullif(sum(rating_count), 0),2), sum(order_count)
+            from employee_rollup
+            where 1=1 """
+        else:
+            select = f"""
+            select employee_name, round(avg(rating),2), count(distinct order_id)
+            from {self._empSales}
+            where 1=1 """
 
         group = """
         group by employee_name
@@ -1097,21 +1227,14 @@ class BikeStoreManagerDash(QDialog):
         limit 10
         """
 
-        sql = self.prepareFinalSql(year, region, state, select, group)
+        sql, params = self.prepareFinalSql(year, region, state, select, group)
 
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        result = self._fetchCached(sql, params)
         self.ui.tblEmpRating.setRowCount(0)
         if len(result) > 0:
-            self.ui.tblEmpRating.setRowCount(len(result))
-            for row_number, row_data in enumerate(result):
-                for column_number, data in enumerate(row_data):
-                    item = QTableWidgetItem(str(data))
-                    self.ui.tblEmpRating.setItem(row_number, column_number, item)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.ui.tblEmpRating.resizeColumnsToContents()
+            fill_table(self.ui.tblEmpRating, result, sortable=False)
 
-            colorsList = sns.light_palette("#29F", 10).as_hex()
+            colorsList = light_palette("#29F", 10)
             colorsList = colorsList[::-1]
             for rowIndex in range(self.ui.tblEmpRating.rowCount()):
                 self.setColortoRow(rowIndex, QColor(colorsList[rowIndex]), self.ui.tblEmpRating)
@@ -1126,65 +1249,56 @@ class BikeStoreManagerDash(QDialog):
             - region (str): The specific region for which the data is to be analyzed. Default is 'All'.
             - state (str): The specific state for which the data is to be analyzed. Default is 'All'.
             """
-            select = """
-            select region,
-            round(sum(price),2) as Revenue_generated, COUNT(DISTINCT order_id) as count_of_orders
-            from employee_sales_view
-            where 1=1 """
+            if self._rollups:
+                select = """
+                select region,
+                round(sum(revenue),2) as Revenue_generated, sum(order_count) as count_of_orders
+                from employee_rollup
+                where 1=1 """
+            else:
+                select = f"""
+                select region,
+                round(sum(price),2) as Revenue_generated, COUNT(DISTINCT order_id) as count_of_orders
+                from {self._empSales}
+                where 1=1 """
             
             group = """
             group by region
             order by 1 desc;
             """
             
-            sql = self.prepareFinalSql(year, region, state, select, group)
+            sql, params = self.prepareFinalSql(year, region, state, select, group)
             
-            cursor.execute(sql)
-            result = cursor.fetchall()
+            # Both pies come from the same query, a cached image helps only if both are cached
+            revenueCached = self._revenuePie.show(sql, params, self._generation)
+            ordersCached = self._ordersPie.show(sql, params, self._generation)
+            if revenueCached and ordersCached:
+                return
+            result = self._fetchCached(sql, params)
             if len(result) > 0:
-                df = pd.DataFrame(result, columns = ['Region', 'Revenue_generated', 'count_of_orders'])
+                df = ColumnarResult.from_rows(result, ['Region', 'Revenue_generated', 'count_of_orders'], [object, float, int])
                 
                 colors = ['gold', 'yellowgreen', 'lightcoral', 'lightskyblue', 'lightgreen', 'paleturquoise', 'peachpuff']
                 labels = df['Region']
                 values1 = df['Revenue_generated']
                 values2 = df['count_of_orders']
-                fig, ax = plt.subplots(figsize = (5, 3))
-                ax.pie(values1, labels = labels, autopct = '%1.1f%%', startangle = 90, colors = colors, textprops={'fontsize': 6})
-                ax.set_title('Revenue Generated by Region', fontsize = 10)
-                canvas = FigureCanvas(fig)
-                while self.ui.EmpPie1.count():
-                    item = self.ui.EmpPie1.takeAt(0)
-                    if item.widget():
-                        item.widget().deleteLater()
-                
-                self.ui.EmpPie1.addWidget(canvas)
-                plt.close(fig)
-                
-                fig, ax = plt.subplots(figsize = (5, 3))
-                ax.pie(values2, labels = labels, autopct = '%1.1f%%', startangle = 90,colors = colors, textprops={'fontsize': 6})
-                ax.set_title('Orders by Region', fontsize = 10)
-                canvas = FigureCanvas(fig)  
-                while self.ui.EmpPie2.count():
-                    item = self.ui.EmpPie2.takeAt(0)
-                    if item.widget():
-                        item.widget().deleteLater()
-                        
-                self.ui.EmpPie2.addWidget(canvas)
-                plt.close(fig)
+
+                def paintRevenue(chart):
+                    ax = chart.reset()
+                    ax.pie(values1, labels = labels, autopct = '%1.1f%%', startangle = 90, colors = colors, textprops={'fontsize': 6})
+                    chart.decorate('Revenue Generated by Region')
+
+                def paintOrders(chart):
+                    ax = chart.reset()
+                    ax.pie(values2, labels = labels, autopct = '%1.1f%%', startangle = 90,colors = colors, textprops={'fontsize': 6})
+                    chart.decorate('Orders by Region')
+                if not revenueCached:
+                    self._revenuePie.render(paintRevenue)
+                if not ordersCached:
+                    self._ordersPie.render(paintOrders)
             else:
-                while self.ui.EmpPie1.count():
-                    item = self.ui.EmpPie1.takeAt(0)
-                    if item.widget():
-                        item.widget().deleteLater()
-                while self.ui.EmpPie2.count():
-                    item = self.ui.EmpPie2.takeAt(0)
-                    if item.widget():
-                        item.widget().deleteLater()
-                noData = QLabel("No Data")
-                noData.setStyleSheet("color: white; background-color: DodgerBlue;")
-                noData.setAlignment(Qt.AlignCenter)
-                self.ui.EmpPie1.addWidget(noData)
-                self.ui.EmpPie2.addWidget(noData)
+                self._revenuePie.showNoData()
+                self._ordersPie.showNoData()
         
     def format_labels(self):
         font = QFont()
@@ -1256,138 +1370,116 @@ class BikeStoreManagerDash(QDialog):
             State (str): The state to filter the sales data. Default is 'All'.
         """
         self.setEmptyEmpLabels()
-        select = """
-            select region, count(DISTINCT order_id)  as order_count,
-            round(sum(price),2)  as Revenue_generated
-            from employee_sales_view
-            where 1=1 """
-        group = """
-            group by region
-            order by 3 desc
-            limit 1
-            """
-            
-        sql = self.prepareFinalSql(Year, Region, State, select, group)
-        cursor.execute(sql)
-        result = cursor.fetchall()
-        if len(result) > 0:
-            self.ui.lblTpRegion.setText(str(result[0][0]))
-            self.ui.lblTpRegionDets.setText(str(result[0][2]))
-            
-        select = """
-            select  state, count(DISTINCT order_id) as order_count,
-            round(sum(price),2)  as Revenue_generated
-            from employee_sales_view
-            where 1=1 """
-        group = """
-            group by state
-            order by 3 desc
-            limit 1
-            """
-            
-        sql = self.prepareFinalSql(Year, Region, State, select, group)   
-        cursor.execute(sql)
-        result = cursor.fetchall()
-        if len(result) > 0: 
-            self.ui.lblTpState.setText(str(result[0][0]))
-            self.ui.lblTpStateDets.setText(str(result[0][2]))
-            
-        select = """
-            select employee_name,
-            round(sum(price),2) as Revenue_generated
-            from employee_sales_view
-            where 1=1 """
-        group = """
-            group by employee_name
-            order by 2 desc
-            limit 1
-        """
-        
-        sql = self.prepareFinalSql(Year, Region, State, select, group)
-        
-        cursor.execute(sql)
-        result = cursor.fetchall()
-        if len(result) > 0:
-            self.ui.lblTpEmpBus.setText(str(result[0][0]))
-            self.ui.lblTpEmpBusDets.setText(str(result[0][1]))
-            
-        select = """
-            select employee_name,count(distinct order_id) as count_of_orders
-            from employee_sales_view
-            where 1=1 """
-        group = """
-            group by employee_name
-            order by 2 desc
-            limit 1
-        """
-            
-        sql = self.prepareFinalSql(Year, Region, State, select, group)
-        
-        cursor.execute(sql)
-        result = cursor.fetchall()
-        if len(result) > 0:
-            self.ui.lblEmpMaxOrders.setText(str(result[0][0]))
-            self.ui.lblEmpMaxOrdDets.setText(str(result[0][1]))
-            
-        select = """
-            select employee_name, count(distinct order_ID) AS TOTAL_ORDERS 
-            from employee_sales_view
-            where rating >= 4 """
+        # One scan at (region, state, employee) grain, rolled up below for every label
+        if self._rollups:
+            select = """
+                select region, state, employee_name,
+                sum(revenue) as revenue,
+                sum(order_count) as order_count,
+                sum(rated_orders) as rated_orders
+                from employee_rollup
+                where 1=1 """
+        else:
+            select = f"""
+                select region, state, employee_name,
+                sum(price) as revenue,
+                count(distinct order_id) as order_count,
+                count(distinct case when rating >= 4 then order_id end) as rated_orders
+                from {self._empSales}
+                where 1=1 """
         group = """
-            group by employee_name
-            order by 2 desc
-            LIMIT 1
+            group by region, state, employee_name
             """
-        
-        sql = self.prepareFinalSql(Year, Region, State, select, group)    
-        cursor.execute(sql) 
-        result = cursor.fetchall()
-        if len(result) > 0:
-            self.ui.lblEmpRating.setText(str(result[0][0]))
-            self.ui.lblEmpRatingDets.setText(str(result[0][1]))  
-            
-        select = """
-            select employee_name,
-            round(sum(price),2) as Revenue_generated
-            from employee_sales_view
-            where 1=1 """
-        group = """
-            group by employee_name
-            order by 2 asc
-            limit 1
 
-            """
-            
-        sql = self.prepareFinalSql(Year, Region, State, select, group)
-        cursor.execute(sql)
-        result = cursor.fetchall()
+        sql, params = self.prepareFinalSql(Year, Region, State, select, group)
+        result = self._fetchCached(sql, params)
         if len(result) > 0:
-            self.ui.lblEmpLowSales.setText(str(result[0][0]))
-            self.ui.lblEmpLowSalesDets.setText(str(result[0][1]))
-        
+            regionRevenue = defaultdict(int)
+            stateRevenue = defaultdict(int)
+            empRevenue = defaultdict(int)
+            empOrders = defaultdict(int)
+            empRatedOrders = defaultdict(int)
+            for region, state, employee, revenue, orders, ratedOrders in result:
+                regionRevenue[region] += revenue
+                stateRevenue[state] += revenue
+                empRevenue[employee] += revenue
+                # An order is placed in a single state, so distinct counts add up across groups
+                empOrders[employee] += orders
+                empRatedOrders[employee] += ratedOrders
+
+            topRegion = max(regionRevenue, key=regionRevenue.get)
+            self.ui.lblTpRegion.setText(str(topRegion))
+            self.ui.lblTpRegionDets.setText(str(round(regionRevenue[topRegion], 2)))
+
+            topState = max(stateRevenue, key=stateRevenue.get)
+            self.ui.lblTpState.setText(str(topState))
+            self.ui.lblTpStateDets.setText(str(round(stateRevenue[topState], 2)))
+
+            topEmp = max(empRevenue, key=empRevenue.get)
+            self.ui.lblTpEmpBus.setText(str(topEmp))
+            self.ui.lblTpEmpBusDets.setText(str(round(empRevenue[topEmp], 2)))
+
+            maxOrdersEmp = max(empOrders, key=empOrders.get)
+            self.ui.lblEmpMaxOrders.setText(str(maxOrdersEmp))
+            self.ui.lblEmpMaxOrdDets.setText(str(empOrders[maxOrdersEmp]))
+
+            ratedEmp = max(empRatedOrders, key=empRatedOrders.get)
+            if empRatedOrders[ratedEmp] > 0:
+                self.ui.lblEmpRating.setText(str(ratedEmp))
+                self.ui.lblEmpRatingDets.setText(str(empRatedOrders[ratedEmp]))
+
+            lowEmp = min(empRevenue, key=empRevenue.get)
+            self.ui.lblEmpLowSales.setText(str(lowEmp))
+            self.ui.lblEmpLowSalesDets.setText(str(round(empRevenue[lowEmp], 2)))
+
         self.format_labels()
     
     @pyqtSlot()
     def on_RefreshDwh_clicked(self):
         """
         Slot function called when the 'Refresh Data' button is clicked.
+        The refresh runs off the GUI thread, the dashboard is reloaded when it has finished.
+        """
+        self.ui.RefreshDwh.setEnabled(False)
+        self._refreshJob = _RefreshJob()
+        self._refreshJob.signals.finished.connect(self._onRefreshFinished)
+        QThreadPool.globalInstance().start(self._refreshJob)
+        self.setWindowTitle(f'{self._title} - refreshing data')
+        self._progressTimer.start()
+
+    def _showRefreshProgress(self):
+        """
+        Shows the step of a full refresh in the window title while the refresh runs.
+        The incremental refresh only publishes its end, so it is shown as 'refreshing data'.
+        """
+        try:
+            step, stepsDone, stepsTotal = refresh_progress()
+        except Exception:
+            return
+        if step in (None, 'Published', 'Failed') or stepsTotal == 0:
+            self.setWindowTitle(f'{self._title} - refreshing data')
+        else:
+            self.setWindowTitle(f'{self._title} - refreshing data: {step} ({stepsDone}/{stepsTotal})')
+
+    def _onRefreshFinished(self, rowsTouched):
         """
-        sql = """
-            call refresh_dwh_prc(@refresh_status);
-            """
-        cursor.execute(sql)
-        sql = """
-            select @refresh_status;
-            """
-        cursor.execute(sql)
-        result = cursor.fetchall()
-        conn.commit()
-        if len(result) > 0:
-            if result[0][0] == "Success":
-                QMessageBox.information(self, "Refresh Data", "Data Refreshed Successfully")
-                self.setDefaults()
-                self.emp_defaults()
-                # self.setupCharts()
-                self.setupEmpCharts()
-            else:
-                QMessageBox.warning(self, "Refresh Data", "Data Refresh Failed")
\ No newline at end of file
+        Reloads the dashboard once the warehouse refresh has finished.
+
+        Args:
+            rowsTouched (dict): The rows touched per warehouse table, empty if the refresh failed.
+        """
+        self._refreshJob = None
+        self._progressTimer.stop()
+        self.setWindowTitle(self._title)
+        self.ui.RefreshDwh.setEnabled(True)
+        # run_refresh records the run in dwh_refresh_log and returns no rows if the refresh failed
+        if len(rowsTouched) == 0:
+            QMessageBox.warning(self, "Refresh Data", "Data Refresh Failed")
+            return
+        self._syncGeneration()
+        details = '\n'.join(f'{table}: {rows}' for table, rows in rowsTouched.items())
+        QMessageBox.information(self, "Refresh Data", "Data Refreshed Successfully\n\nRows touched\n" + details)
+        self.setDefaults()
+        self.emp_defaults()
+        # self.setupCharts()
+        self.setupEmpCharts()
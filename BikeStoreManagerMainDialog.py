@@ -9,13 +9,14 @@ Course: DATA 225
 '''
 import sys
 from PyQt5.QtWidgets import QDialog, QApplication, QLabel
-from PyQt5.QtWidgets import QTableWidgetItem, QMessageBox
+from PyQt5.QtWidgets import QMessageBox
 from BikeStoreManagerMainDialog_ui import Ui_BikeStoreManagerMainDialog
-from BikeStoreUtils import create_connection
-from PyQt5.QtCore import pyqtSlot, QDate, QRegExp, Qt
+from BikeStoreUtils import get_pool, get_region_catalogue, QueryExecutor
+from BikeStoreTableModel import fill_table
+from BikeStoreSearch import employee_search, NameTrie
+from PyQt5.QtCore import pyqtSlot, QDate, QRegExp, QTimer
 from PyQt5.QtGui import QRegExpValidator
 from datetime import datetime
-from BikeStoreManagerDashDialog import BikeStoreManagerDash
 
 class BikeStoreManagerMain(QDialog):
     """
@@ -32,6 +33,15 @@ class BikeStoreManagerMain(QDialog):
         self.ui.setupUi(self)
         self.conn = conn
         self.cursor = cursor
+        self._executor = QueryExecutor(get_pool(config_file='terrabikes.ini'), parent=self)
+        # Names of the manager's employees for the type-ahead, loaded on the first search and after an
+        # employee is created. If the load fails, the type-ahead uses the database search until then.
+        self._empNames = None
+        self._empNamesFailed = False
+        self._empSearchTimer = QTimer(self)
+        self._empSearchTimer.setSingleShot(True)
+        self._empSearchTimer.setInterval(200)
+        self._empSearchTimer.timeout.connect(self._searchEmpNames)
 
         self._BikeStoreMainWin = None
 
@@ -59,7 +69,7 @@ class BikeStoreManagerMain(QDialog):
         sql = """select concat(e.first_name,' ',e.last_name)
                 from users u, employee e
                 where e.employee_id = u.employee_id
-                and upper(u.username) = upper(%s)"""
+                and u.username = %s"""
         self.cursor.execute(sql, (self.username,))
         result = self.cursor.fetchall()
 
@@ -83,6 +93,8 @@ class BikeStoreManagerMain(QDialog):
         """
         Handles the cancel button click event.
         """
+        self._empSearchTimer.stop()
+        self._executor.cancel()
         self.close()
         if self._BikeStoreMainWin:
             self._BikeStoreMainWin.show_dialog()
@@ -120,14 +132,7 @@ class BikeStoreManagerMain(QDialog):
         self.ui.tblEmployee.setRowCount(0)
 
         if len(result) > 0:
-            self.ui.tblEmployee.setRowCount(len(result))
-            for row_number, row_data in enumerate(result):
-                for column_number, data in enumerate(row_data):
-                    item = QTableWidgetItem(str(data))
-                    self.ui.tblEmployee.setItem(row_number, column_number, item)
-                    self.ui.tblEmployee.resizeColumnsToContents()
-                    self.ui.tblEmployee.setSortingEnabled(True)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            fill_table(self.ui.tblEmployee, result)
 
     def on_tblEmployee_cellClicked(self, row, column):
         """
@@ -149,14 +154,7 @@ class BikeStoreManagerMain(QDialog):
         result = self.cursor.fetchall()
 
         if len(result) > 0:
-            self.ui.tblEmployeeDetails.setRowCount(len(result))
-            for row_number, row_data in enumerate(result):
-                for column_number, data in enumerate(row_data):
-                    item = QTableWidgetItem(str(data))
-                    self.ui.tblEmployeeDetails.setItem(row_number, column_number, item)
-                    self.ui.tblEmployeeDetails.resizeColumnsToContents()
-                    self.ui.tblEmployeeDetails.setSortingEnabled(True)
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            fill_table(self.ui.tblEmployeeDetails, result)
 
     @pyqtSlot()
     def on_btnPg1UpdEmp_clicked(self):
@@ -207,39 +205,90 @@ class BikeStoreManagerMain(QDialog):
     def on_txtEmpName_textChanged(self):
         """
         This method is called when the text in the txtEmpName QLineEdit widget is changed.
-        It retrieves the entered employee name, performs a database query to search for matching employee names,
-        and populates the selectEmpName QComboBox widget with the matching names.
+        It restarts the search delay, so the names are looked up once typing pauses instead of per keystroke.
 
         Returns:
             None
         """
         emp_text = self.ui.txtEmpName.text()  
-        if emp_text == '':
+        if emp_text.strip() == '':
+            self._empSearchTimer.stop()
+            self._executor.cancel('empNames')
             self.ui.selectEmpName.clear()
             return
-        sql = """
-            select concat(e.first_name, ' ', e.last_name) 
-            from employee e
-            where upper(concat(e.first_name, ' ', e.last_name)) like upper(%s)
-            """
-        sqlparam = '%' + emp_text + '%'
-        self.cursor.execute(sql, (sqlparam,))
-        result = self.cursor.fetchall()
+        self._empSearchTimer.start()
+
+    def _searchEmpNames(self):
+        """
+        Populates the selectEmpName QComboBox widget with the employee names matching the entered text.
+
+        The names are looked up in the in-memory trie of the names of the manager's employees, which is
+        loaded on the first search. Text that matches no name prefix, e.g. the middle of a name, and every
+        search after a failed load fall back to the ranked name search of the manager's employees in the
+        database. A newer search cancels a database search still running.
+        """
+        emp_text = self.ui.txtEmpName.text()
+        if emp_text.strip() == '':
+            return
+        if self._empNames is None and not self._empNamesFailed:
+            if not self._executor.isPending('empNameList'):
+                sql = """select concat(e.first_name, ' ', e.last_name)
+                         from users u, manager m, employee e
+                         where u.username = %s
+                         and u.employee_id = m.manager_emp_id
+                         and e.manager_id = m.manager_id"""
+                self._executor.submit('empNameList', sql, (self.username,), on_result=self._loadEmpNames,
+                                      on_error=self._empNamesLoadFailed)
+            return
+        names = self._empNames.search(emp_text) if self._empNames is not None else []
+        if len(names) > 0:
+            self._executor.cancel('empNames')
+            self._showEmpNames(names)
+        else:
+            sql, params = employee_search(emp_text, manager_username=self.username)
+            self._executor.submit('empNames', sql, params,
+                                  on_result=lambda result: self._showEmpNames([row[0] for row in result]))
+
+    def _loadEmpNames(self, result):
+        """
+        Builds the trie of employee names and answers the search typed while it was loading.
+
+        Args:
+            result (list): The employee name rows.
+        """
+        self._empNames = NameTrie(row[0] for row in result)
+        self._searchEmpNames()
+
+    def _empNamesLoadFailed(self, message):
+        """
+        Records a failed load of the employee names, so the type-ahead uses the database search
+        instead of loading them again on every search, and answers the search typed meanwhile.
+
+        Args:
+            message (str): The error message.
+        """
+        self._empNamesFailed = True
+        self._searchEmpNames()
+
+    def _showEmpNames(self, names):
+        """
+        Populates the selectEmpName QComboBox widget with the matching employee names.
+
+        Args:
+            names (list): The matching employee names.
+        """
         self.ui.selectEmpName.clear()
-        if len(result) > 0:
-            self.ui.selectEmpName.addItems([row[0] for row in result])
+        if len(names) > 0:
+            self.ui.selectEmpName.addItems(names)
 
     def populateState(self):
         """
         Loads the menus for Search Bar
         """
-        sql = """ select distinct state_name from regions order by 1"""
-        self.cursor.execute(sql)
-        result = self.cursor.fetchall()
-        if len(result) > 0:
+        states = get_region_catalogue().states()
+        if len(states) > 0:
             self.ui.EmplPgState.clear()
-            for i in range(len(result)):
-                self.ui.EmplPgState.addItem(result[i][0])
+            self.ui.EmplPgState.addItems(states)
 
     def on_EmplPgState_currentTextChanged(self):
         state = self.ui.EmplPgState.currentText()
@@ -249,13 +298,10 @@ class BikeStoreManagerMain(QDialog):
         """
         Loads the menus for Search Bar
         """
-        sql = """ select distinct city from regions where state_name = %s order by 1"""
-        self.cursor.execute(sql, (state,))
-        result = self.cursor.fetchall()
-        if len(result) > 0:
+        cities = get_region_catalogue().cities(state)
+        if len(cities) > 0:
             self.ui.EmplPageCity.clear()
-            for i in range(len(result)):
-                self.ui.EmplPageCity.addItem(result[i][0])
+            self.ui.EmplPageCity.addItems(cities)
 
     @pyqtSlot()
     def on_btnSearchEmp_clicked(self):
@@ -524,6 +570,8 @@ class BikeStoreManagerMain(QDialog):
             self.conn.commit()
             if len(result) > 0:
                 QMessageBox.information(self, "Success", "Employee Created Successfully")
+                self._empNames = None
+                self._empNamesFailed = False
                 self.clear_fields()
                 self.ui.btnEmployeesLarge.setChecked(True)
                 self.on_btnEmployeesLarge_toggled()
@@ -535,6 +583,10 @@ class BikeStoreManagerMain(QDialog):
     '''
     def on_btnEmplDashLarge_toggled(self):
         if self.ui.btnEmplDashLarge.isChecked():
-            self._bikeStoreManagerDashMain = BikeStoreManagerDash(self.username, parent=self)
-            self._bikeStoreManagerDashMain.set_main_dialog(self._BikeStoreMainWin)
-            self._bikeStoreManagerDashMain.exec_()
+            # The dashboard pulls in the plotting stack, so it is imported when first opened
+            from BikeStoreManagerDashDialog import BikeStoreManagerDash
+            # The dashboard reads the warehouse, borrow a terrabikes_bi connection while it is open
+            with get_pool(config_file='terrabikes_bi.ini').connection() as biConn:
+                self._bikeStoreManagerDashMain = BikeStoreManagerDash(self.username, biConn, biConn.cursor(), parent=self)
+                self._bikeStoreManagerDashMain.set_main_dialog(self._BikeStoreMainWin)
+                self._bikeStoreManagerDashMain.exec_()
@@ -0,0 +1,239 @@
+'''
+This file contains the bulk order importer for marketplace and partner order files.
+The file is streamed order by order, validated against product and customer lookups loaded once,
+and written in batched transactions: one multi-row insert for the orders, one for the order details
+and one aggregated stock update per batch.
+
+Input is CSV with a header row, or JSON lines (.jsonl), with one order line per row:
+    order_ref, customer_id, product_id, quantity, discount, price[, ordered_date]
+Lines of the same order must be consecutive and share the order_ref. price is the line total.
+
+Run it from the command line:
+    python BikeStoreOrderImport.py orders.csv --employee ONL_DIRECT --batch-size 500
+
+Author: SQLWeavers
+File: BikeStoreOrderImport.py
+Course: Data 225
+Project: TerraBikes
+'''
+
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import date
+from itertools import groupby
+from BikeStoreUtils import get_pool, get_id_allocator
+
+
+def read_rows(path):
+    """
+    Streams the order lines of a CSV or JSON lines file.
+
+    Args:
+        path (str): The file path. Files ending in .jsonl or .json are read as JSON lines.
+
+    Yields:
+        dict: One order line. A JSON line that cannot be parsed is yielded as its ValueError,
+            so the importer can reject it and go on.
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.jsonl') or path.endswith('.json'):
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        yield e
+        else:
+            for row in csv.DictReader(f):
+                yield row
+
+
+class OrderImporter:
+    """
+    Validates and inserts streamed orders in batched transactions.
+    """
+
+    def __init__(self, employee_username='ONL_DIRECT', batch_size=500, config_file='terrabikes.ini'):
+        """
+        Initializes the importer and loads the product and customer lookups.
+
+        Args:
+            employee_username (str): The employee the imported orders are booked on. Default is 'ONL_DIRECT'.
+            batch_size (int): The number of orders written per transaction. Default is 500.
+            config_file (str): The configuration file of the terrabikes database. Default is 'terrabikes.ini'.
+
+        Raises:
+            ValueError: If the employee user does not exist.
+        """
+        self.pool = get_pool(config_file=config_file)
+        self.orderIds = get_id_allocator('orders', config_file=config_file)
+        self.orderDetailIds = get_id_allocator('order_details', config_file=config_file)
+        self.batch_size = batch_size
+        self.imported_orders = 0
+        self.imported_lines = 0
+        self.rejected = []
+
+        with self.pool.cursor() as cursor:
+            cursor.execute("select product_id from products")
+            self.products = {row[0] for row in cursor.fetchall()}
+            cursor.execute("select customer_id from customer where end_date is null")
+            self.customers = {row[0] for row in cursor.fetchall()}
+            cursor.execute("select employee_id from users where username = %s", (employee_username,))
+            result = cursor.fetchall()
+        if len(result) == 0:
+            raise ValueError(f'Unknown employee user {employee_username}')
+        self.employee_id = result[0][0]
+
+    def _validate(self, order_ref, lines):
+        """
+        Converts the lines of one order and checks them against the lookups.
+
+        Returns:
+            tuple: (customer_id, ordered_date, [(product_id, quantity, discount, price)]), or None if rejected.
+        """
+        try:
+            customer_id = int(lines[0]['customer_id'])
+            ordered_date = lines[0].get('ordered_date')
+            ordered_date = date.fromisoformat(str(ordered_date)) if ordered_date else date.today()
+            items = [(str(line['product_id']), int(line['quantity']), round(float(line.get('discount') or 0), 2),
+                      round(float(line['price']), 2)) for line in lines]
+        except (KeyError, TypeError, ValueError) as e:
+            self.rejected.append((order_ref, f'invalid value: {e}'))
+            return None
+        if customer_id not in self.customers:
+            self.rejected.append((order_ref, f'unknown customer {customer_id}'))
+            return None
+        for product_id, quantity, _, _ in items:
+            if product_id not in self.products:
+                self.rejected.append((order_ref, f'unknown product {product_id}'))
+                return None
+            if quantity <= 0:
+                self.rejected.append((order_ref, f'quantity {quantity} of {product_id}'))
+                return None
+        return customer_id, ordered_date, items
+
+    def _keyed_rows(self, rows):
+        """
+        Passes on the order lines that have an order_ref and rejects the others, so groupby() can key on it.
+        Lines that are not objects, such as the parse errors of read_rows(), are rejected too.
+        """
+        for number, row in enumerate(rows, start=1):
+            if isinstance(row, ValueError):
+                self.rejected.append((f'line {number}', f'malformed JSON: {row}'))
+                continue
+            if not isinstance(row, dict):
+                self.rejected.append((f'line {number}', 'not an order line object'))
+                continue
+            if row.get('order_ref') in (None, ''):
+                self.rejected.append((f'line {number}', 'missing order_ref'))
+                continue
+            yield row
+
+    def _write_batch(self, batch):
+        """
+        Inserts a batch of validated orders in one transaction.
+        """
+        order_ids = self.orderIds.next_ids(len(batch))
+        line_ids = iter(self.orderDetailIds.next_ids(sum(len(items) for _, _, items in batch)))
+        orders = []
+        details = []
+        stock = {}
+        for order_id, (customer_id, ordered_date, items) in zip(order_ids, batch):
+            orders.append((order_id, ordered_date, customer_id, self.employee_id))
+            for product_id, quantity, discount, price in items:
+                details.append((next(line_ids), order_id, product_id, quantity, discount, price))
+                stock[product_id] = stock.get(product_id, 0) + quantity
+        stockSql = " union all ".join(["select %s product_id, %s qty"] * len(stock))
+        stockParams = [value for item in stock.items() for value in item]
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany("""insert into orders (order_id, order_status, ordered_date, shipped_date,
+                                                          customer_id, employee_id, creation_date, updated_date)
+                                      values (%s, 'New', %s, null, %s, %s, now(), now())""", orders)
+                cursor.executemany("""insert into order_details (order_detail_id, order_id, product_id, quantity,
+                                                                 discount, price, creation_date, updated_date)
+                                      values (%s, %s, %s, %s, %s, %s, now(), now())""", details)
+                cursor.execute(f"""update products p
+                                     join ({stockSql}) d on d.product_id = p.product_id
+                                      set p.quantity = p.quantity - d.qty, p.updated_date = now()""",
+                               stockParams)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        self.imported_orders += len(orders)
+        self.imported_lines += len(details)
+
+    def _flush(self, refs, batch):
+        """
+        Writes a batch, or rejects all its orders if the transaction fails, so the import goes on with the next batch.
+        """
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            self.rejected.extend((order_ref, f'batch failed: {e}') for order_ref in refs)
+
+    def run(self, rows):
+        """
+        Imports streamed order lines.
+
+        Args:
+            rows (iterable): Order line dicts, e.g. from read_rows().
+
+        Returns:
+            dict: The imported orders and lines, the rejected orders, the elapsed seconds and the orders per second.
+        """
+        start = time.perf_counter()
+        refs = []
+        batch = []
+        for order_ref, lines in groupby(self._keyed_rows(rows), key=lambda row: row['order_ref']):
+            order = self._validate(order_ref, list(lines))
+            if order is None:
+                continue
+            refs.append(order_ref)
+            batch.append(order)
+            if len(batch) >= self.batch_size:
+                self._flush(refs, batch)
+                refs = []
+                batch = []
+        if len(batch) > 0:
+            self._flush(refs, batch)
+        elapsed = time.perf_counter() - start
+        return {
+            'orders': self.imported_orders,
+            'lines': self.imported_lines,
+            'rejected': len(self.rejected),
+            'seconds': round(elapsed, 2),
+            'orders_per_second': round(self.imported_orders / elapsed, 1) if elapsed > 0 else 0,
+        }
+
+
+def main(argv=None):
+    """
+    Command line entry point: imports one order file and prints the throughput.
+    """
+    parser = argparse.ArgumentParser(description='Import a CSV or JSON lines order file into terrabikes.')
+    parser.add_argument('file', help='order file (.csv, or .jsonl for JSON lines)')
+    parser.add_argument('--employee', default='ONL_DIRECT', help='username of the employee the orders are booked on')
+    parser.add_argument('--batch-size', type=int, default=500, help='orders written per transaction')
+    parser.add_argument('--config', default='terrabikes.ini', help='database configuration file')
+    args = parser.parse_args(argv)
+
+    importer = OrderImporter(args.employee, args.batch_size, args.config)
+    stats = importer.run(read_rows(args.file))
+    for order_ref, reason in importer.rejected:
+        print(f'Rejected order {order_ref}: {reason}', file=sys.stderr)
+    print(f"Imported {stats['orders']} orders ({stats['lines']} lines) in {stats['seconds']}s, "
+          f"{stats['orders_per_second']} orders/s, {stats['rejected']} rejected")
+    return 0 if stats['rejected'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+'''
+This file contains the OrderService class, which submits an order and all of its lines in one transaction.
+Order and order detail ids come from the shared id allocators, so the whole order is written with three
+statements and one commit, and either the complete order is stored or nothing is.
+
+Author: SQLWeavers
+File: BikeStoreOrders.py
+Course: Data 225
+Project: TerraBikes
+'''
+
+from BikeStoreUtils import get_pool, get_id_allocator, get_product_catalogue
+
+
+class OrderService:
+    """
+    Writes orders to the terrabikes database.
+    """
+
+    def __init__(self, config_file='terrabikes.ini'):
+        """
+        Initializes the service.
+
+        Args:
+            config_file (str): The configuration file of the terrabikes database. Default is 'terrabikes.ini'.
+        """
+        self.pool = get_pool(config_file=config_file)
+        self.products = get_product_catalogue(config_file=config_file)
+        self.orderIds = get_id_allocator('orders', config_file=config_file)
+        self.orderDetailIds = get_id_allocator('order_details', config_file=config_file)
+
+    def submit(self, order, lines):
+        """
+        Inserts an order, its order details and the product stock updates in one transaction.
+
+        Args:
+            order (dict): 'customer_username' and 'employee_username' of the order.
+            lines (list): (product_id, quantity, discount, price) of every order line.
+
+        Returns:
+            tuple: The order id (int) and the order detail ids (list) in the order of the lines.
+
+        Raises:
+            ValueError: If the order has no lines.
+            Exception: If the order could not be stored. Nothing is stored in that case.
+        """
+        if len(lines) == 0:
+            raise ValueError('An order needs at least one line')
+        order_id = self.orderIds.next_id()
+        line_ids = self.orderDetailIds.next_ids(len(lines))
+
+        details = [(line_id, order_id, product_id, quantity, round(discount, 2), round(price, 2))
+                   for line_id, (product_id, quantity, discount, price) in zip(line_ids, lines)]
+
+        # Quantities of repeated products are added up so each product is updated once
+        stock = {}
+        for product_id, quantity, _, _ in lines:
+            stock[product_id] = stock.get(product_id, 0) + quantity
+        stockSql = " union all ".join(["select %s product_id, %s qty"] * len(stock))
+        stockParams = [value for item in stock.items() for value in item]
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""insert into orders (order_id, order_status, ordered_date, shipped_date,
+                                                      customer_id, employee_id, creation_date, updated_date)
+                                  select %s, 'New', now(), null, c.customer_id, e.employee_id, now(), now()
+                                    from users c, users e
+                                   where c.username = %s
+                                     and e.username = %s""",
+                               (order_id, order['customer_username'], order['employee_username']))
+                if cursor.rowcount != 1:
+                    raise Exception('Unknown customer or employee')
+                cursor.executemany("""insert into order_details (order_detail_id, order_id, product_id, quantity,
+                                                                 discount, price, creation_date, updated_date)
+                                      values (%s, %s, %s, %s, %s, %s, now(), now())""", details)
+                cursor.execute(f"""update products p
+                                     join ({stockSql}) d on d.product_id = p.product_id
+                                      set p.quantity = p.quantity - d.qty, p.updated_date = now()""",
+                               stockParams)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        self.products.invalidate(stock.keys())
+        return order_id, line_ids
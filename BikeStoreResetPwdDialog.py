@@ -9,7 +9,7 @@ import sys
 from PyQt5 import uic
 from PyQt5.QtWidgets import QDialog, QApplication
 import random
-from BikeStoreUtils import create_connection, send_email, popupMessage
+from BikeStoreUtils import send_email, popupMessage
 
 verificationCode = random.randint(100000, 999999)
 
@@ -18,19 +18,19 @@ class BikeStoreResetPwd(QDialog):
     A dialog window for resetting the password in a bike store application.
     """
 
-    def __init__(self, _username, conn, cursor, parent=None):
+    def __init__(self, _username, pool, parent=None):
         """
         Initializes the BikeStoreResetPwd dialog.
 
         Args:
             _username (str): The username for which the password is being reset.
+            pool (ConnectionPool): The connection pool used for database access.
             parent (QWidget): The parent widget. Defaults to None.
         """
         super(BikeStoreResetPwd, self).__init__(parent)
 
         self.ui = uic.loadUi("BikeStoreResetPwdDialog.ui")
-        self.conn = conn
-        self.cursor = cursor
+        self.pool = pool
 
         self._initTxtFields(_username)
         # Set the Stacked Widget to the First Page
@@ -92,9 +92,10 @@ class BikeStoreResetPwd(QDialog):
                     on c.customer_id = u.customer_id
                     left join employee e
                     on e.employee_id = u.employee_id
-                    where upper(u.username) = upper(%s)"""
-            self.cursor.execute(sql, (self.ui.txtUserName.toPlainText(),))
-            result = self.cursor.fetchall()
+                    where u.username = %s"""
+            with self.pool.cursor() as cursor:
+                cursor.execute(sql, (self.ui.txtUserName.toPlainText(),))
+                result = cursor.fetchall()
             if len(result) != 0:
                 # if the Customer Email is available, populate the Email field
                 if result[0][1] != '':
@@ -136,9 +137,11 @@ class BikeStoreResetPwd(QDialog):
         else:
             sql = """update users
                         set pwd = md5(%s)
-                      where upper(username) = upper(%s)"""
-            self.cursor.execute(sql, (self.ui.txtNewPass.text(), self.ui.txtUserName.toPlainText()))
-            self.conn.commit()
+                      where username = %s"""
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, (self.ui.txtNewPass.text(), self.ui.txtUserName.toPlainText()))
+                conn.commit()
             popupMessage("Password Reset Successful", "Success")
 
             # Navigate to the Login Screen
@@ -158,12 +161,13 @@ class BikeStoreResetPwd(QDialog):
 
             sql = """ select t.role 
                     from users u, type t
-                   where upper(u.username) = upper(%s)
+                   where u.username = %s
                      and t.user_role_id = u.user_role_id 
                   """
             # Execute the query
-            self.cursor.execute(sql, (self.ui.txtUserName.toPlainText(),))
-            result = self.cursor.fetchall()
+            with self.pool.cursor() as cursor:
+                cursor.execute(sql, (self.ui.txtUserName.toPlainText(),))
+                result = cursor.fetchall()
             # Check the result
             if len(result) == 0:
                 popupMessage("Username does not exist", "Error")
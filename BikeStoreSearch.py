@@ -0,0 +1,213 @@
+'''
+This file contains the name search used by the portals to find customers, employees and products.
+Names are matched against the n-gram FULLTEXT indexes of migrations/003_search_indexes.sql in boolean
+mode, so every typed word matches anywhere inside the first name, last name or email address, and the
+results come back ranked by relevance with a limit. Single letters are shorter than an n-gram and are
+matched as a name prefix on the B-tree name indexes instead.
+NameTrie answers type-ahead searches of short name lists from memory.
+
+Author: SQLWeavers
+File: BikeStoreSearch.py
+Course: Data 225
+Project: TerraBikes
+'''
+
+from BikeStoreFilters import SqlFilter
+
+# ngram_token_size of the server; shorter words are not in the FULLTEXT index
+NGRAM_TOKEN_SIZE = 2
+
+# Characters with a meaning in boolean mode searches
+_OPERATORS = '+-<>()~*"@'
+
+# (FULLTEXT columns, prefix columns, order of unranked results) of every search target.
+# The FULLTEXT columns must list the columns of the index in its order.
+SEARCH_TARGETS = {
+    'customers': ("c.first_name, c.last_name, c.email_id", ("c.first_name", "c.last_name"), "c.first_name, c.last_name"),
+    'employees': ("e.first_name, e.last_name, e.email_id", ("e.first_name", "e.last_name"), "e.first_name, e.last_name"),
+    'products': ("p.product_name", ("p.product_name",), "p.product_name"),
+}
+
+
+def search_terms(text):
+    """
+    Splits a search text into words, with the boolean mode operators removed.
+
+    Args:
+        text (str): The text typed by the user.
+
+    Returns:
+        list: The search words.
+    """
+    for operator in _OPERATORS:
+        text = text.replace(operator, ' ')
+    return text.split()
+
+
+def ranked_search(builder, target, text, limit=50):
+    """
+    Adds a name search to a filter builder and returns the statement ordered by relevance.
+
+    Every word must match. Words of at least NGRAM_TOKEN_SIZE characters go to the FULLTEXT index,
+    shorter ones are matched as a prefix of the name columns.
+
+    Args:
+        builder (SqlFilter): The builder of the statement, with the other filters already added.
+        target (str): The key of the search target in SEARCH_TARGETS: 'customers', 'employees' or 'products'.
+        text (str): The text typed by the user.
+        limit (int): The maximum number of rows returned. Default is 50.
+
+    Returns:
+        tuple: The SQL template (str) and the bind parameters (tuple).
+    """
+    columns, prefixColumns, nameOrder = SEARCH_TARGETS[target]
+    terms = search_terms(text)
+    words = [term for term in terms if len(term) >= NGRAM_TOKEN_SIZE]
+    for term in terms:
+        if len(term) < NGRAM_TOKEN_SIZE:
+            builder.where("(" + " or ".join(f"{column} like %s" for column in prefixColumns) + ")",
+                          *[term + '%'] * len(prefixColumns))
+
+    if len(words) == 0:
+        sql, params = builder.build(f" order by {nameOrder} limit %s")
+        return sql, params + (limit,)
+
+    match = f"match({columns}) against (%s in boolean mode)"
+    query = " ".join('+' + word for word in words)
+    builder.where(match, query)
+    sql, params = builder.build(f" order by {match} desc, {nameOrder} limit %s")
+    return sql, params + (query, limit)
+
+
+def customer_search(name, customer_id='', state='All', limit=200):
+    """
+    Builds the customer search of the employee portal.
+
+    A name search is ranked by relevance and limited. Without a name, the customers are read page by page
+    in customer id order, so the statement comes without ORDER BY or LIMIT, ready for a PagedQueryModel.
+
+    Args:
+        name (str): The customer name or email text. Empty means no name filter.
+        customer_id (str): The customer id. Empty means no id filter.
+        state (str): The state of the customer. 'All' means no state filter.
+        limit (int): The maximum number of rows of a name search. Default is 200.
+
+    Returns:
+        tuple: The SQL template (str), the bind parameters (tuple) and the key column the pages are read by
+            (str), None for a ranked name search read as a single page.
+    """
+    builder = SqlFilter("""select customer_id, concat(first_name,' ',last_name) customer_name, status, end_date,
+                            (select count(order_id) from orders where customer_id = c.customer_id) order_count,
+                            contact, email_id, address, city, state_name, region
+                            from customer c, regions r
+                            where c.region_id = r.region_id""")
+    if customer_id != "":
+        builder.where("c.customer_id = %s", customer_id)
+    if state != "All":
+        builder.where("r.state_name = %s", state)
+    if search_terms(name) == []:
+        sql, params = builder.build()
+        return sql, params, "c.customer_id"
+    sql, params = ranked_search(builder, 'customers', name, limit)
+    return sql, params, None
+
+
+def employee_search(name, limit=20, manager_username=None):
+    """
+    Builds the employee name type-ahead search.
+
+    Args:
+        name (str): The employee name or email text.
+        limit (int): The maximum number of names returned. Default is 20.
+        manager_username (str): The username of a manager whose reports are searched. Defaults to None,
+            meaning all employees.
+
+    Returns:
+        tuple: The SQL template (str) and the bind parameters (tuple).
+    """
+    builder = SqlFilter("""select concat(e.first_name, ' ', e.last_name)
+                            from employee e
+                            where 1 = 1""")
+    if manager_username is not None:
+        builder.where("""e.manager_id in (select m.manager_id from users u, manager m
+                                          where u.username = %s and u.employee_id = m.manager_emp_id)""",
+                      manager_username)
+    return ranked_search(builder, 'employees', name, limit)
+
+
+def product_search(name, limit=20):
+    """
+    Builds the product name search.
+
+    Args:
+        name (str): The product name text.
+        limit (int): The maximum number of products returned. Default is 20.
+
+    Returns:
+        tuple: The SQL template (str) and the bind parameters (tuple).
+    """
+    builder = SqlFilter("""select p.product_id, p.product_name, p.price, p.quantity
+                            from products p
+                            where 1 = 1""")
+    return ranked_search(builder, 'products', name, limit)
+
+
+class NameTrie:
+    """
+    An in-memory prefix trie of names, used to answer type-ahead searches without a database round trip.
+    Every word of a name is indexed, so typing the start of the first or the last name finds it.
+    """
+
+    def __init__(self, names=()):
+        """
+        Initializes the trie.
+
+        Args:
+            names (iterable): The names to index. Default is no names.
+        """
+        self.names = []
+        self._root = {}
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        """
+        Adds a name to the trie.
+
+        Args:
+            name (str): The name.
+        """
+        nameId = len(self.names)
+        self.names.append(name)
+        for word in name.lower().split():
+            node = self._root
+            for char in word:
+                node = node.setdefault(char, {})
+                node.setdefault('', set()).add(nameId)
+
+    def _matches(self, prefix):
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get('', set())
+
+    def search(self, text, limit=20):
+        """
+        Returns the names in which every typed word is the start of a word of the name.
+
+        Args:
+            text (str): The text typed by the user.
+            limit (int): The maximum number of names returned. Default is 20.
+
+        Returns:
+            list: The matching names in alphabetical order.
+        """
+        words = text.lower().split()
+        if len(words) == 0:
+            return []
+        nameIds = set(self._matches(words[0]))
+        for word in words[1:]:
+            nameIds &= self._matches(word)
+        return sorted(self.names[nameId] for nameId in nameIds)[:limit]
@@ -10,7 +10,7 @@ from PyQt5 import uic
 from PyQt5.QtWidgets import QDialog, QApplication, QMessageBox
 from PyQt5.QtGui import QRegExpValidator
 from PyQt5.QtCore import QRegExp   
-from BikeStoreUtils import popupMessage, create_connection
+from BikeStoreUtils import popupMessage, get_region_catalogue
 
 
 class BikeStoreSignUp(QDialog):
@@ -18,28 +18,28 @@ class BikeStoreSignUp(QDialog):
     Represents the sign-up dialog for the bike store application.
     """
 
-    def __init__(self, conn, cursor, parent=None):
+    def __init__(self, pool, parent=None):
         """
         Initializes the BikeStoreSignUp dialog.
 
         Args:
+            pool (ConnectionPool): The connection pool used for database access.
             parent: The parent widget (default: None).
         """
         super(BikeStoreSignUp, self).__init__(parent)
         
         self.ui = uic.loadUi("BikeStoreSignUpDialog.ui")
         self._BikeStoreMainWin = None
-        self.conn = conn
-        self.cursor = cursor
+        self.pool = pool
         
         validator = QRegExpValidator(QRegExp("[0-9]{3}-[0-9]{3}-[0-9]{4}"))
         self.ui.txtPhone.setValidator(validator)
 
         # Handle the Cancel Button
-        self.ui.btnCancel.clicked.self.connect(self._cancel)
-        self.ui.txtState.currentIndexChanged.self.connect(self._txtState_currentIndexChanged)
+        self.ui.btnCancel.clicked.connect(self._cancel)
+        self.ui.txtState.currentIndexChanged.connect(self._txtState_currentIndexChanged)
         # Handle the Submit Button
-        self.ui.btnSubmit.clicked.self.connect(self._submit)
+        self.ui.btnSubmit.clicked.connect(self._submit)
         self._setStateSelection()
             
     def set_main_dialog(self, main_dialog):
@@ -73,28 +73,22 @@ class BikeStoreSignUp(QDialog):
         """
         Sets the state selection options in the order page.
         """
-        sql = """select DISTINCT state_name from regions order by 1"""
-        self.cursor.execute(sql)
-        result = self.cursor.fetchall()
+        states = get_region_catalogue().states()
         self.ui.txtState.clear()
-        if len(result) > 0:
+        if len(states) > 0:
             self.ui.txtState.addItem("")
-            for i in range(len(result)):
-                self.ui.txtState.addItem(result[i][0])
+            self.ui.txtState.addItems(states)
 
     def _txtState_currentIndexChanged(self, index):
         """
         Sets the city selection options in the order page.
         """
         if self.ui.txtState.currentText() != "":
-            sql = """select DISTINCT city from regions where state_name = %s order by 1"""
-            self.cursor.execute(sql,(self.ui.txtState.currentText(),))
-            result = self.cursor.fetchall()
+            cities = get_region_catalogue().cities(self.ui.txtState.currentText())
             self.ui.txtCity.clear()
-            if len(result) > 0:
+            if len(cities) > 0:
                 self.ui.txtCity.addItem("")
-                for i in range(len(result)):
-                    self.ui.txtCity.addItem(result[i][0])
+                self.ui.txtCity.addItems(cities)
 
     
     '''
@@ -123,8 +117,9 @@ class BikeStoreSignUp(QDialog):
         
         if self.ui.txtUserName.text() != "":
             sql = """select count(*) from users where username = %s"""
-            self.cursor.execute(sql,(self.ui.txtUserName.text(),))
-            result = self.cursor.fetchall()
+            with self.pool.cursor() as cursor:
+                cursor.execute(sql,(self.ui.txtUserName.text(),))
+                result = cursor.fetchall()
             if result[0][0] > 0:
                 self._CustValidation = "Error"
                 QMessageBox.warning(self, "Warning", "Username already exists")
@@ -139,7 +134,6 @@ class BikeStoreSignUp(QDialog):
         """
         self._checkCustomerRequired()
         if self._CustValidation == "Success":
-            self.conn.autocommit = True
             customerArgs = [self.ui.txtFName.text()
                         , self.ui.txtLName.text()
                         , self.ui.txtEmail.text()
@@ -151,9 +145,11 @@ class BikeStoreSignUp(QDialog):
                         , self.ui.txtCity.currentText()
                         , self.ui.txtPostalCode.text()
                         ]
-            self.cursor.execute("SELECT InsertCustomerAndUser(%s, %s,%s, %s,%s, %s,%s, %s,%s, %s)", customerArgs)
-            self._user_id = self.cursor.fetchone()[0]
-            self.conn.commit()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT InsertCustomerAndUser(%s, %s,%s, %s,%s, %s,%s, %s,%s, %s)", customerArgs)
+                self._user_id = cursor.fetchone()[0]
+                conn.commit()
             if self._user_id == None or self._user_id == 0:
                 QMessageBox.warning(self, "Warning", "Customer Creation Failed")
                 return
@@ -0,0 +1,259 @@
+'''
+This file contains the table helpers of the dialogs.
+PagedQueryModel is a read-only table model that loads the rows of a query page by page.
+Pages are read with keyset pagination on a unique key column, so every page costs the same index range
+scan no matter how far the user has scrolled, and a QTableView only asks for more rows when the user
+scrolls to the end of the rows already loaded. The pages are read through a QueryExecutor, so scrolling
+never runs a query on the GUI thread.
+fill_table loads a fetched result into a QTableWidget in one pass, with sorting, signals and repaints
+suspended during the load and a single column resize afterwards.
+
+Run the fill benchmark, which times fill_table against the per cell loops it replaced, with:
+    python BikeStoreTableModel.py --rows 10000
+
+Author: SQLWeavers
+File: BikeStoreTableModel.py
+Course: Data 225
+Project: TerraBikes
+'''
+
+import argparse
+import sys
+import time
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+from BikeStoreUtils import popupMessage
+
+
+def fill_table(table, rows, sortable=True):
+    """
+    Replaces the contents of a QTableWidget with a fetched result.
+    Sorting, signals and repaints are suspended while the items are set, so the table is neither
+    re-sorted nor repainted per cell, and the columns are resized once at the end.
+
+    Args:
+        table (QTableWidget): The table to fill.
+        rows (list): The fetched rows.
+        sortable (bool): Whether sorting by the column headers is enabled after the load. Default is True.
+    """
+    table.setSortingEnabled(False)
+    table.setUpdatesEnabled(False)
+    table.blockSignals(True)
+    try:
+        table.clearContents()
+        table.setRowCount(len(rows))
+        prototype = QTableWidgetItem()
+        prototype.setFlags(prototype.flags() & ~Qt.ItemIsEditable)
+        for i, row in enumerate(rows):
+            for j, col in enumerate(row):
+                item = prototype.clone()
+                item.setText(str(col))
+                table.setItem(i, j, item)
+    finally:
+        table.blockSignals(False)
+        table.setUpdatesEnabled(True)
+    table.resizeColumnsToContents()
+    table.setSortingEnabled(sortable)
+
+
+class PagedQueryModel(QAbstractTableModel):
+    """
+    A read-only table model over a query that is fetched in pages as the view scrolls.
+
+    Every page is submitted to a QueryExecutor under the request key of the model and appended when its
+    rows arrive on the GUI thread. A new model submitting under the same key supersedes the pending page
+    of the model it replaces.
+    """
+
+    def __init__(self, executor, request_key, sql, params, key_column, headers, key_index=0, page_size=200,
+                 parent=None):
+        """
+        Initializes the model. No rows are loaded until the view asks for them.
+
+        Args:
+            executor (QueryExecutor): The executor the pages are read with.
+            request_key (str): The executor key of the page requests, e.g. 'orderPages'.
+            sql (str): The SELECT statement without ORDER BY or LIMIT, ending in a WHERE clause.
+                If key_column is None, a complete statement read as a single page.
+            params (tuple): The bind parameters of the statement.
+            key_column (str): The SQL expression of the unique column the pages are ordered by, e.g. 'o.order_id'.
+                None for a statement with its own ORDER BY and LIMIT, such as a ranked search.
+            headers (list): The column headers.
+            key_index (int): The position of the key column in the selected columns. Default is 0.
+            page_size (int): The number of rows read per page. Default is 200.
+            parent (QObject): The parent object. Defaults to None.
+        """
+        super(PagedQueryModel, self).__init__(parent)
+        self.executor = executor
+        self.request_key = request_key
+        self.sql = sql
+        self.params = tuple(params)
+        self.key_column = key_column
+        self.headers = headers
+        self.key_index = key_index
+        self.page_size = page_size
+        self._rows = []
+        self._exhausted = False
+        self._loading = False
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return str(self._rows[index.row()][index.column()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def canFetchMore(self, parent=QModelIndex()):
+        # A page request cancelled by the executor (e.g. on a page switch) never reports back
+        if self._loading and not self.executor.isPending(self.request_key):
+            self._loading = False
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        """
+        Requests the page after the last loaded row. The rows are appended when the query returns.
+        """
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+        sql = self.sql
+        params = self.params
+        if self.key_column is not None:
+            if len(self._rows) > 0:
+                sql = sql + f" and {self.key_column} > %s"
+                params = params + (self._rows[-1][self.key_index],)
+            sql = sql + f" order by {self.key_column} limit %s"
+            params = params + (self.page_size,)
+        self._loading = True
+        self.executor.submit(self.request_key, sql, params, on_result=self._appendPage, on_error=self._pageFailed)
+
+    def _appendPage(self, page):
+        """
+        Appends a page returned by the executor.
+
+        Args:
+            page (list): The rows of the page.
+        """
+        self._loading = False
+        if self.key_column is None or len(page) < self.page_size:
+            self._exhausted = True
+        if len(page) == 0:
+            return
+        self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def _pageFailed(self, message):
+        self._loading = False
+        # Stop fetching, so scrolling does not repeat the failing query
+        self._exhausted = True
+        popupMessage(f'Query failed: {message}', "Error")
+
+    def value(self, row, column):
+        """
+        Returns the value of a loaded cell as text.
+
+        Args:
+            row (int): The row number.
+            column (int): The column number.
+
+        Returns:
+            str: The cell value.
+        """
+        return str(self._rows[row][column])
+
+
+def benchmark_fill(rows=10000, columns=8, resize_rows=500):
+    """
+    Times filling a QTableWidget with the two cell by cell loops the dialogs used before fill_table, and with fill_table.
+
+    'per_cell' is the loop of the employee and customer portals: items are set, then made read-only,
+    and the columns are resized once after the loop. 'per_cell_resize' is the loop of the manager
+    dialogs, which also resized the columns and enabled sorting after every cell. Its cost grows with
+    the square of the rows, so it is timed on the first resize_rows rows only.
+
+    Args:
+        rows (int): The number of rows of the synthetic result. Default is 10000.
+        columns (int): The number of columns of the synthetic result. Default is 8.
+        resize_rows (int): The number of rows of the 'per_cell_resize' load. Default is 500.
+
+    Returns:
+        dict: Rows per second of the 'per_cell', 'per_cell_resize' and 'fill_table' loads.
+    """
+    app = QApplication.instance() or QApplication(['-platform', 'offscreen'])
+    result = [tuple(f'r{i}c{j}' for j in range(columns)) for i in range(rows)]
+
+    # The employee portal loop before fill_table
+    table = QTableWidget(0, columns)
+    start = time.perf_counter()
+    table.clearContents()
+    table.setRowCount(len(result))
+    for i, row in enumerate(result):
+        for j, col in enumerate(row):
+            item = QTableWidgetItem(str(col))
+            table.setItem(i, j, item)
+            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+    table.resizeColumnsToContents()
+    table.setSortingEnabled(True)
+    perCell = time.perf_counter() - start
+
+    # The manager dialog loop before fill_table
+    resizeResult = result[:resize_rows]
+    table = QTableWidget(0, columns)
+    start = time.perf_counter()
+    table.setRowCount(0)
+    table.setRowCount(len(resizeResult))
+    for row_number, row_data in enumerate(resizeResult):
+        for column_number, data in enumerate(row_data):
+            item = QTableWidgetItem(str(data))
+            table.setItem(row_number, column_number, item)
+            table.resizeColumnsToContents()
+            table.setSortingEnabled(True)
+            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+    perCellResize = time.perf_counter() - start
+
+    table = QTableWidget(0, columns)
+    start = time.perf_counter()
+    fill_table(table, result)
+    bulk = time.perf_counter() - start
+    app.processEvents()
+
+    return {'per_cell': round(rows / perCell), 'per_cell_resize': round(len(resizeResult) / perCellResize),
+            'fill_table': round(rows / bulk)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark filling a QTableWidget with a fetched result.')
+    parser.add_argument('--rows', type=int, default=10000, help='rows of the synthetic result')
+    parser.add_argument('--columns', type=int, default=8, help='columns of the synthetic result')
+    parser.add_argument('--resize-rows', type=int, default=500, help='rows of the loop resizing after every cell')
+    args = parser.parse_args(argv)
+
+    stats = benchmark_fill(args.rows, args.columns, args.resize_rows)
+    print(f"{args.rows} rows x {args.columns} columns")
+    print(f"    per cell loop (portals):                 {stats['per_cell']} rows/s")
+    print(f"    per cell loop with resize (manager, {min(args.rows, args.resize_rows)} rows): "
+          f"{stats['per_cell_resize']} rows/s")
+    print(f"    fill_table:                              {stats['fill_table']} rows/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
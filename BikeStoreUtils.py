@@ -1,10 +1,19 @@
+import json
+import math
 import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
 from configparser import ConfigParser
 from mysql.connector import MySQLConnection, Error
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from PyQt5.QtWidgets import QMessageBox
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
 
 
 def read_config(config_file='config.ini', section='mysql'):
@@ -63,7 +72,972 @@ def create_connection(config_file='config.ini', section='mysql'):
 
     except Error as e:
         raise Exception(f'Connection failed: {e}')
-    
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of MySQL connections created from one configuration file.
+
+    Connections are created lazily up to the configured size, checked for liveness
+    when they are borrowed and closed once they have been idle for longer than the
+    idle timeout. Use connection() or cursor() to borrow a connection for the
+    duration of a with block.
+    """
+
+    def __init__(self, config_file='config.ini', section='mysql', pool_size=5, idle_timeout=300, checkout_timeout=30):
+        """
+        Initializes the pool. No connection is opened until the first checkout.
+
+        Args:
+            config_file (str): The path to the configuration file. Default is 'config.ini'.
+            section (str): The section name in the configuration file. Default is 'mysql'.
+            pool_size (int): The maximum number of open connections. Default is 5.
+            idle_timeout (int): Seconds a returned connection may stay unused before it is closed. Default is 300.
+            checkout_timeout (int): Seconds to wait for a free connection when the pool is exhausted. Default is 30.
+        """
+        self.config_file = config_file
+        self.section = section
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._db_config = read_config(config_file, section)
+        self._idle = []
+        self._in_use = 0
+        self._lock = threading.Condition()
+
+    def _open(self):
+        """
+        Opens a new physical connection.
+
+        Returns:
+            MySQLConnection: The connection object.
+
+        Raises:
+            Exception: If the connection fails.
+        """
+        try:
+            return MySQLConnection(**self._db_config)
+        except Error as e:
+            raise Exception(f'Connection failed: {e}')
+
+    def _evict_idle(self):
+        """
+        Closes connections that have been idle for longer than the idle timeout.
+        Must be called with the pool lock held.
+        """
+        now = time.monotonic()
+        keep = []
+        for conn, returned_at in self._idle:
+            if now - returned_at > self.idle_timeout:
+                _close_quietly(conn)
+            else:
+                keep.append((conn, returned_at))
+        self._idle = keep
+
+    def get_connection(self):
+        """
+        Borrows a live connection from the pool, opening a new one if needed.
+
+        Returns:
+            MySQLConnection: The connection object. It must be handed back with release().
+
+        Raises:
+            Exception: If no connection becomes free within the checkout timeout or the connection fails.
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._lock:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.pool_size:
+                    conn = None
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Exception(f'Connection pool for {self.config_file} exhausted ({self.pool_size} connections in use)')
+                self._lock.wait(remaining)
+
+        # Health check outside the lock, a dead connection is replaced by a fresh one
+        try:
+            if conn is None or not conn.is_connected():
+                if conn is not None:
+                    _close_quietly(conn)
+                conn = self._open()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+        return conn
+
+    def release(self, conn):
+        """
+        Returns a borrowed connection to the pool.
+
+        Any open transaction is rolled back so the next borrower starts clean.
+
+        Args:
+            conn (MySQLConnection): The connection obtained from get_connection().
+        """
+        try:
+            if conn.is_connected():
+                if conn.in_transaction:
+                    conn.rollback()
+                conn.autocommit = False
+                healthy = True
+            else:
+                healthy = False
+        except Error:
+            healthy = False
+
+        with self._lock:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                _close_quietly(conn)
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of a with block.
+
+        Yields:
+            MySQLConnection: The connection object.
+        """
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def cursor(self, **kwargs):
+        """
+        Borrows a connection and opens a cursor on it for the duration of a with block.
+
+        Args:
+            **kwargs: Passed through to MySQLConnection.cursor().
+
+        Yields:
+            MySQLCursor: The cursor object.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor(**kwargs)
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def close_all(self):
+        """
+        Closes every idle connection. Borrowed connections are closed when they are released.
+        """
+        with self._lock:
+            for conn, _ in self._idle:
+                _close_quietly(conn)
+            self._idle = []
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _close_quietly(conn):
+    """
+    Closes a connection, ignoring errors from connections that are already broken.
+    """
+    try:
+        conn.close()
+    except Error:
+        pass
+
+
+def get_pool(config_file='config.ini', section='mysql'):
+    """
+    Returns the process-wide connection pool for a configuration file section.
+
+    The pool size and idle timeout are read from the optional [pool] section of the
+    same configuration file (keys: size, idle_timeout, checkout_timeout).
+
+    Args:
+        config_file (str): The path to the configuration file. Default is 'config.ini'.
+        section (str): The section name in the configuration file. Default is 'mysql'.
+
+    Returns:
+        ConnectionPool: The shared pool.
+    """
+    key = (config_file, section)
+    with _pools_lock:
+        if key not in _pools:
+            try:
+                pool_config = read_config(config_file, 'pool')
+            except Exception:
+                pool_config = {}
+            _pools[key] = ConnectionPool(config_file, section,
+                                         pool_size=int(pool_config.get('size', 5)),
+                                         idle_timeout=int(pool_config.get('idle_timeout', 300)),
+                                         checkout_timeout=int(pool_config.get('checkout_timeout', 30)))
+        return _pools[key]
+
+
+def close_pools():
+    """
+    Closes the idle connections of every pool created by get_pool().
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+
+class ResultCache:
+    """
+    A thread-safe LRU cache of query results keyed on the SQL template and its parameters.
+
+    Entries expire after a time to live and the least recently used entries are dropped once
+    the estimated size of the cached rows exceeds the memory limit. invalidate() bumps the
+    generation counter and empties the cache; a result fetched under an older generation is
+    not stored, so a query that was running during a data refresh cannot repopulate the cache
+    with stale rows.
+    """
+
+    def __init__(self, ttl=600, max_bytes=32 * 1024 * 1024):
+        """
+        Initializes the cache.
+
+        Args:
+            ttl (int): Seconds a cached result stays valid. Default is 600.
+            max_bytes (int): The approximate memory limit of the cached rows in bytes. Default is 32 MB.
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _estimate_size(rows):
+        size = sys.getsizeof(rows)
+        for row in rows:
+            size += sys.getsizeof(row)
+            for value in row:
+                size += sys.getsizeof(value)
+        return size
+
+    def get(self, sql, params=None):
+        """
+        Returns the cached rows for a query.
+
+        Args:
+            sql (str): The SQL template.
+            params (tuple): The bind parameters. Defaults to None.
+
+        Returns:
+            list: The cached rows, or None if the query is not cached or has expired.
+        """
+        key = (sql, tuple(params or ()))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            rows, size, stored = entry
+            if time.monotonic() - stored > self.ttl:
+                del self._entries[key]
+                self._size -= size
+                return None
+            self._entries.move_to_end(key)
+            return rows
+
+    def put(self, sql, params, rows, generation=None):
+        """
+        Stores the rows of a query.
+
+        Args:
+            sql (str): The SQL template.
+            params (tuple): The bind parameters.
+            rows (list): The fetched rows.
+            generation (int): The generation the rows were fetched under. Defaults to None, meaning the current one.
+        """
+        key = (sql, tuple(params or ()))
+        size = self._estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (rows, size, time.monotonic())
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def invalidate(self):
+        """
+        Drops every cached result and starts a new generation.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._size = 0
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(config_file='config.ini', section='mysql'):
+    """
+    Returns the process-wide result cache for a configuration file section.
+
+    The time to live and memory limit are read from the optional [cache] section of the
+    same configuration file (keys: ttl, max_bytes).
+
+    Args:
+        config_file (str): The path to the configuration file. Default is 'config.ini'.
+        section (str): The section name in the configuration file. Default is 'mysql'.
+
+    Returns:
+        ResultCache: The shared cache.
+    """
+    key = (config_file, section)
+    with _caches_lock:
+        if key not in _caches:
+            try:
+                cache_config = read_config(config_file, 'cache')
+            except Exception:
+                cache_config = {}
+            _caches[key] = ResultCache(ttl=int(cache_config.get('ttl', 600)),
+                                       max_bytes=int(cache_config.get('max_bytes', 32 * 1024 * 1024)))
+        return _caches[key]
+
+class IdAllocator:
+    """
+    Hands out ids from blocks reserved with the ReserveIds database function.
+
+    One round trip reserves block_size consecutive ids, which are then handed out from memory,
+    so concurrent terminals never compete for the same id. Ids left in a block when the
+    application exits are never used.
+    """
+
+    def __init__(self, pool, seq_name, block_size=20):
+        """
+        Initializes the allocator. No block is reserved until the first id is requested.
+
+        Args:
+            pool (ConnectionPool): The pool used to reserve blocks.
+            seq_name (str): The sequence name in the id_sequence table, e.g. 'orders'.
+            block_size (int): The number of ids reserved per round trip. Default is 20.
+        """
+        self.pool = pool
+        self.seq_name = seq_name
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self, count):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT ReserveIds(%s, %s)", (self.seq_name, count))
+            first = cursor.fetchone()[0]
+            conn.commit()
+            cursor.close()
+        return first
+
+    def next_id(self):
+        """
+        Returns the next id of the sequence.
+
+        Returns:
+            int: The id.
+        """
+        return self.next_ids(1)[0]
+
+    def next_ids(self, count):
+        """
+        Returns consecutive ids of the sequence.
+
+        Args:
+            count (int): The number of ids.
+
+        Returns:
+            list: The ids.
+        """
+        with self._lock:
+            if self._end - self._next < count:
+                size = max(count, self.block_size)
+                self._next = self._reserve(size)
+                self._end = self._next + size
+            first = self._next
+            self._next += count
+        return list(range(first, first + count))
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def get_id_allocator(seq_name, config_file='terrabikes.ini', section='mysql'):
+    """
+    Returns the process-wide id allocator of a sequence.
+
+    Args:
+        seq_name (str): The sequence name in the id_sequence table, e.g. 'orders'.
+        config_file (str): The path to the configuration file. Default is 'terrabikes.ini'.
+        section (str): The section name in the configuration file. Default is 'mysql'.
+
+    Returns:
+        IdAllocator: The shared allocator.
+    """
+    key = (seq_name, config_file, section)
+    with _allocators_lock:
+        if key not in _allocators:
+            _allocators[key] = IdAllocator(get_pool(config_file, section), seq_name)
+        return _allocators[key]
+
+
+class RegionCatalogue:
+    """
+    The states and cities of the regions table, loaded once per process with a single query.
+
+    The catalogue can be persisted to a local JSON file together with a version stamp of the regions
+    table (row count and last update). A later process reuses the file as long as the stamp still
+    matches, so it only runs the stamp query.
+    """
+
+    def __init__(self, pool, cache_file=None):
+        """
+        Initializes the catalogue. Nothing is loaded until a state or city list is asked for.
+
+        Args:
+            pool (ConnectionPool): The pool of the terrabikes database.
+            cache_file (str): The path of the local cache file. Defaults to None, meaning not persisted.
+        """
+        self.pool = pool
+        self.cache_file = cache_file
+        self._cities = None
+        self._lock = threading.Lock()
+
+    def _version(self, cursor):
+        cursor.execute("select count(*), max(updated_date) from regions")
+        count, updated = cursor.fetchall()[0]
+        return f"{count}/{updated}"
+
+    def _read_file(self, version):
+        if self.cache_file is None or not os.path.isfile(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get('version') != version:
+            return None
+        return stored['cities']
+
+    def _write_file(self, version, cities):
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump({'version': version, 'cities': cities}, f)
+        except OSError:
+            pass
+
+    def _load(self):
+        with self._lock:
+            if self._cities is not None:
+                return self._cities
+            with self.pool.cursor() as cursor:
+                version = self._version(cursor)
+                cities = self._read_file(version)
+                if cities is None:
+                    cursor.execute("""select distinct state_name, city from regions
+                                      where state_name is not null and city is not null
+                                      order by 1, 2""")
+                    cities = {}
+                    for state, city in cursor.fetchall():
+                        cities.setdefault(state, []).append(city)
+                    self._write_file(version, cities)
+            self._cities = cities
+            return cities
+
+    def states(self):
+        """
+        Returns the state names in alphabetical order.
+
+        Returns:
+            list: The state names.
+        """
+        return sorted(self._load())
+
+    def cities(self, state):
+        """
+        Returns the cities of a state in alphabetical order.
+
+        Args:
+            state (str): The state name.
+
+        Returns:
+            list: The city names, empty for an unknown state.
+        """
+        return self._load().get(state, [])
+
+    def invalidate(self):
+        """
+        Drops the loaded catalogue, so the next lookup checks the version stamp again.
+        """
+        with self._lock:
+            self._cities = None
+
+
+_catalogues = {}
+_catalogues_lock = threading.Lock()
+
+
+def get_region_catalogue(config_file='terrabikes.ini', section='mysql'):
+    """
+    Returns the process-wide region catalogue of a database.
+
+    The local cache file is read from the optional [cache] section of the same
+    configuration file (key: regions_file).
+
+    Args:
+        config_file (str): The path to the configuration file. Default is 'terrabikes.ini'.
+        section (str): The section name in the configuration file. Default is 'mysql'.
+
+    Returns:
+        RegionCatalogue: The shared catalogue.
+    """
+    key = (config_file, section)
+    with _catalogues_lock:
+        if key not in _catalogues:
+            try:
+                cache_config = read_config(config_file, 'cache')
+            except Exception:
+                cache_config = {}
+            _catalogues[key] = RegionCatalogue(get_pool(config_file, section), cache_config.get('regions_file'))
+        return _catalogues[key]
+
+
+class ProductCatalogue:
+    """
+    A snapshot of the id, name, price, stock quantity and discount of every product, used by the order forms.
+
+    The snapshot is loaded with one query and kept in parallel arrays indexed through a product id map.
+    refresh() reads only the products created or updated since the last load, plus the products marked
+    stale by invalidate(), so the order forms look prices and stock up without a round trip.
+    """
+
+    _COLUMNS = "product_id, product_name, price, quantity, discount_percent, creation_date, updated_date"
+
+    def __init__(self, pool):
+        """
+        Initializes the catalogue. Nothing is loaded until it is used.
+
+        Args:
+            pool (ConnectionPool): The pool of the terrabikes database.
+        """
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._index = None
+        self._stale = set()
+
+    def _reset(self):
+        self._index = {}
+        self.ids = []
+        self.names = []
+        self._prices = array('d')
+        self._quantities = array('l')
+        self._discounts = array('d')
+        self._watermark = None
+        self._stale = set()
+
+    def _store(self, rows):
+        for product_id, name, price, quantity, discount, created, updated in rows:
+            price = float(price or 0)
+            discount = math.nan if discount is None else float(discount)
+            position = self._index.get(product_id)
+            if position is None:
+                self._index[product_id] = len(self.ids)
+                self.ids.append(product_id)
+                self.names.append(name)
+                self._prices.append(price)
+                self._quantities.append(quantity)
+                self._discounts.append(discount)
+            else:
+                self.names[position] = name
+                self._prices[position] = price
+                self._quantities[position] = quantity
+                self._discounts[position] = discount
+            changed = max(created, updated or created)
+            if self._watermark is None or changed > self._watermark:
+                self._watermark = changed
+
+    def _ensure_loaded(self):
+        if self._index is None:
+            self._reset()
+            with self.pool.cursor() as cursor:
+                cursor.execute(f"select {self._COLUMNS} from products order by product_id")
+                self._store(cursor.fetchall())
+
+    def _refresh(self):
+        if self._index is None or self._watermark is None:
+            self._index = None
+            self._ensure_loaded()
+            return
+        sql = f"select {self._COLUMNS} from products where updated_date >= %s or creation_date >= %s"
+        params = [self._watermark, self._watermark]
+        if len(self._stale) > 0:
+            sql += " or product_id in (" + ", ".join(["%s"] * len(self._stale)) + ")"
+            params.extend(self._stale)
+        with self.pool.cursor() as cursor:
+            cursor.execute(sql, params)
+            self._store(cursor.fetchall())
+        self._stale = set()
+
+    def refresh(self):
+        """
+        Loads the catalogue, or reads the products changed since the last load and the stale ones.
+        Every product update sets updated_date, so changes made by other clients are picked up here;
+        invalidate() only makes this process read its own changes before the watermark moves.
+        """
+        with self._lock:
+            self._refresh()
+
+    def invalidate(self, product_ids=None):
+        """
+        Marks products as changed, so the next refresh() or snapshot of one of them reads them again.
+
+        Args:
+            product_ids (iterable): The changed product ids. Defaults to None, meaning the whole catalogue is reloaded.
+        """
+        with self._lock:
+            if product_ids is None or self._index is None:
+                self._index = None
+            else:
+                self._stale.update(product_ids)
+
+    def choices(self):
+        """
+        Returns the 'product id - product name' entries of the product pickers.
+
+        Returns:
+            list: The entries in product id order.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return [f"{product_id} - {name}" for product_id, name in zip(self.ids, self.names)]
+
+    def product_ids(self):
+        """
+        Returns the product ids.
+
+        Returns:
+            list: The product ids in product id order.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return list(self.ids)
+
+    def snapshot(self, product_id):
+        """
+        Returns the price, stock quantity and discount percent of a product.
+
+        Args:
+            product_id (str): The product id.
+
+        Returns:
+            tuple: (price, quantity, discount percent or None), or None for an unknown product.
+        """
+        with self._lock:
+            if self._index is None or product_id in self._stale:
+                self._refresh()
+            position = self._index.get(product_id)
+            if position is None:
+                return None
+            discount = self._discounts[position]
+            return (self._prices[position], self._quantities[position],
+                    None if math.isnan(discount) else discount)
+
+
+_product_catalogues = {}
+
+
+def get_product_catalogue(config_file='terrabikes.ini', section='mysql'):
+    """
+    Returns the process-wide product catalogue of a database.
+
+    Args:
+        config_file (str): The path to the configuration file. Default is 'terrabikes.ini'.
+        section (str): The section name in the configuration file. Default is 'mysql'.
+
+    Returns:
+        ProductCatalogue: The shared catalogue.
+    """
+    key = (config_file, section)
+    with _catalogues_lock:
+        if key not in _product_catalogues:
+            _product_catalogues[key] = ProductCatalogue(get_pool(config_file, section))
+        return _product_catalogues[key]
+
+class _QuerySignals(QObject):
+    """
+    Signals emitted by a _QueryJob from its worker thread.
+    """
+    finished = pyqtSignal(str, int, object)
+    failed = pyqtSignal(str, int, str)
+
+
+class _QueryJob(QRunnable):
+    """
+    Runs one SQL statement on a pooled connection in a QThreadPool worker.
+    """
+
+    def __init__(self, executor, key, ticket, sql, params):
+        super(_QueryJob, self).__init__()
+        self.executor = executor
+        self.key = key
+        self.ticket = ticket
+        self.sql = sql
+        self.params = params
+        self.connection_id = None
+        # Held while connection_id is read or changed, so a KILL QUERY is only sent while the
+        # connection still runs this job's statement and not after it went back to the pool
+        self.connection_lock = threading.Lock()
+        self.generation = executor.cache.generation if executor.cache is not None else None
+        self.signals = _QuerySignals()
+
+    def run(self):
+        # A newer request for the same key may have arrived while this one was queued,
+        # skip the query but still report back so the executor forgets the request
+        if self.executor._isStale(self.key, self.ticket):
+            self.signals.finished.emit(self.key, self.ticket, None)
+            return
+        try:
+            with self.executor.pool.connection() as conn:
+                with self.connection_lock:
+                    self.connection_id = conn.connection_id
+                try:
+                    cursor = conn.cursor(prepared=self.executor.prepared)
+                    try:
+                        if self.params:
+                            cursor.execute(self.sql, self.params)
+                        else:
+                            cursor.execute(self.sql)
+                        rows = cursor.fetchall()
+                    finally:
+                        cursor.close()
+                finally:
+                    # Waits for a KILL QUERY in flight before the connection goes back to the pool
+                    with self.connection_lock:
+                        self.connection_id = None
+        except Exception as e:
+            self.signals.failed.emit(self.key, self.ticket, str(e))
+            return
+        if self.executor.cache is not None:
+            self.executor.cache.put(self.sql, self.params, rows, self.generation)
+        self.signals.finished.emit(self.key, self.ticket, rows)
+
+
+class _KillQueryJob(QRunnable):
+    """
+    Interrupts the running statement of a _QueryJob with KILL QUERY from a separate pooled connection.
+
+    The KILL is sent while holding the job's connection lock, and only if the job still holds its
+    connection, so it cannot hit another statement after the connection was returned to the pool.
+    """
+
+    def __init__(self, pool, job):
+        super(_KillQueryJob, self).__init__()
+        self.pool = pool
+        self.job = job
+
+    def run(self):
+        try:
+            # Borrow the connection before taking the lock, the job must not wait on a full pool
+            with self.pool.cursor() as cursor:
+                with self.job.connection_lock:
+                    if self.job.connection_id is not None:
+                        cursor.execute("KILL QUERY %s", (self.job.connection_id,))
+        except Exception:
+            # The query may already have finished, nothing to interrupt
+            pass
+
+
+class QueryExecutor(QObject):
+    """
+    Runs SQL queries off the GUI thread and delivers the rows back on the GUI thread.
+
+    Every request is submitted under a key (for example the name of the table it fills).
+    Submitting a new request for a key supersedes the previous one: a superseded request
+    that has not started is skipped and the result of one that is already running is
+    discarded. cancel() drops pending results and interrupts running statements, so a
+    dialog can call it when the user switches to another page.
+    """
+
+    resultReady = pyqtSignal(str, object)
+    queryFailed = pyqtSignal(str, str)
+
+    def __init__(self, pool, max_threads=4, prepared=False, cache=None, parent=None):
+        """
+        Initializes the executor.
+
+        Args:
+            pool (ConnectionPool): The pool the worker threads borrow connections from.
+            max_threads (int): The maximum number of queries running at once. Default is 4.
+            prepared (bool): Whether to run queries as server-side prepared statements. Default is False.
+            cache (ResultCache): Cache answering repeated queries without a round trip. Defaults to None.
+            parent (QObject): The parent object. Defaults to None.
+        """
+        super(QueryExecutor, self).__init__(parent)
+        self.pool = pool
+        self.prepared = prepared
+        self.cache = cache
+        self._threadPool = QThreadPool()
+        self._threadPool.setMaxThreadCount(max_threads)
+        self._lock = threading.Lock()
+        self._ticket = 0
+        self._latest = {}
+        self._jobs = {}
+        self._callbacks = {}
+
+    def submit(self, key, sql, params=None, on_result=None, on_error=None):
+        """
+        Queues a query, superseding any earlier request submitted under the same key.
+
+        Args:
+            key (str): Identifies the widget or purpose of the query.
+            sql (str): The SQL statement.
+            params (tuple): The bind parameters. Defaults to None.
+            on_result (callable): Called on the GUI thread with the fetched rows. Defaults to None.
+            on_error (callable): Called on the GUI thread with the error message. Defaults to None,
+                which shows an error popup.
+
+        Returns:
+            int: The ticket number of the request, or 0 if the result was served from the cache.
+        """
+        if self.cache is not None:
+            rows = self.cache.get(sql, params)
+            if rows is not None:
+                self.cancel(key)
+                if on_result is not None:
+                    on_result(rows)
+                self.resultReady.emit(key, rows)
+                return 0
+        with self._lock:
+            self._ticket += 1
+            ticket = self._ticket
+            superseded = self._latest.get(key)
+            self._latest[key] = ticket
+            job = _QueryJob(self, key, ticket, sql, params)
+            self._jobs[ticket] = job
+            self._callbacks[ticket] = (on_result, on_error)
+        if superseded is not None:
+            self._interrupt(superseded)
+        job.signals.finished.connect(self._onFinished)
+        job.signals.failed.connect(self._onFailed)
+        self._threadPool.start(job)
+        return ticket
+
+    def cancel(self, key=None):
+        """
+        Cancels the pending request for a key, or every pending request when no key is given.
+
+        Args:
+            key (str): The key to cancel. Defaults to None, meaning all keys.
+        """
+        with self._lock:
+            if key is None:
+                tickets = list(self._latest.values())
+                self._latest.clear()
+            elif key in self._latest:
+                tickets = [self._latest.pop(key)]
+            else:
+                tickets = []
+        for ticket in tickets:
+            self._interrupt(ticket)
+
+    def isPending(self, key):
+        """
+        Checks whether a request for the key is still waiting for its result.
+
+        Args:
+            key (str): The request key.
+
+        Returns:
+            bool: True if a result is still expected.
+        """
+        with self._lock:
+            return key in self._latest
+
+    def _isStale(self, key, ticket):
+        with self._lock:
+            return self._latest.get(key) != ticket
+
+    def _interrupt(self, ticket):
+        """
+        Interrupts the statement of a superseded or cancelled request if it is running.
+        """
+        with self._lock:
+            job = self._jobs.get(ticket)
+        if job is not None and job.connection_id is not None:
+            QThreadPool.globalInstance().start(_KillQueryJob(self.pool, job))
+
+    def _finish(self, key, ticket):
+        """
+        Forgets a completed request and reports whether its result should be delivered.
+        """
+        with self._lock:
+            self._jobs.pop(ticket, None)
+            callbacks = self._callbacks.pop(ticket, (None, None))
+            if self._latest.get(key) != ticket:
+                return None
+            del self._latest[key]
+        return callbacks
+
+    @pyqtSlot(str, int, object)
+    def _onFinished(self, key, ticket, rows):
+        callbacks = self._finish(key, ticket)
+        if callbacks is None:
+            return
+        on_result, _ = callbacks
+        if on_result is not None:
+            on_result(rows)
+        self.resultReady.emit(key, rows)
+
+    @pyqtSlot(str, int, str)
+    def _onFailed(self, key, ticket, message):
+        callbacks = self._finish(key, ticket)
+        if callbacks is None:
+            return
+        _, on_error = callbacks
+        if on_error is not None:
+            on_error(message)
+        else:
+            popupMessage(f'Query failed: {message}', "Error")
+        self.queryFailed.emit(key, message)
+
+    def waitForDone(self, msecs=-1):
+        """
+        Blocks until every queued query has finished.
+
+        Args:
+            msecs (int): The maximum time to wait in milliseconds. Default is -1 (no limit).
+
+        Returns:
+            bool: True if all queries finished in time.
+        """
+        return self._threadPool.waitForDone(msecs)
+
 def DecisionBox(message, parent=None): 
     """
     Displays a confirmation message box with the given message and returns the user's reply.
@@ -1,7 +1,73 @@
+'''
+This file starts the TerraBikes application.
+Run it with --profile-startup to print the import time of every module loaded before the login
+window is shown, and the time until the window is shown, and then exit.
+
+File: TerraBikes.py
+Author: SQLWeavers
+Project: TerraBikes GUI
+Course: Data 225
+'''
+import builtins
 import sys
-from PyQt5.QtWidgets import QApplication
-from BikeStoreMainWin import BikeStoreMainWin
+import time
+
+
+class ImportTimer:
+    """
+    Records the time spent importing each module, including the modules it imports itself.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self._import = builtins.__import__
+
+    def __call__(self, name, *args, **kwargs):
+        if name in sys.modules:
+            return self._import(name, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return self._import(name, *args, **kwargs)
+        finally:
+            self.times.setdefault(name, time.perf_counter() - start)
+
+    def install(self):
+        builtins.__import__ = self
+
+    def uninstall(self):
+        builtins.__import__ = self._import
+
+    def report(self, top=25):
+        """
+        Prints the slowest imports.
+
+        Args:
+            top (int): The number of modules printed. Default is 25.
+        """
+        print(f"{'module':<45} {'ms':>9}")
+        for name, seconds in sorted(self.times.items(), key=lambda item: item[1], reverse=True)[:top]:
+            print(f"{name:<45} {seconds * 1000:9.1f}")
+
+
+if __name__ == '__main__':
+    profile = '--profile-startup' in sys.argv
+    if profile:
+        sys.argv.remove('--profile-startup')
+        start = time.perf_counter()
+        timer = ImportTimer()
+        timer.install()
+
+    from PyQt5.QtWidgets import QApplication
+    from BikeStoreMainWin import BikeStoreMainWin
+
+    app = QApplication(sys.argv)
+    window = BikeStoreMainWin()
+
+    if profile:
+        timer.uninstall()
+        shown = time.perf_counter() - start
+        timer.report()
+        print(f"Login window shown after {shown * 1000:.0f} ms")
+        sys.exit(0)
 
-app = QApplication(sys.argv)
-window = BikeStoreMainWin()
-app.exec_()
\ No newline at end of file
+    app.exec_()
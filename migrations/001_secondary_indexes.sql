@@ -0,0 +1,40 @@
+-- Migration 001: secondary indexes for the dashboard and login hot paths
+--
+-- Apply once to databases created from terrabikes.sql and terrabikes_bi.sql:
+--     mysql -u root -p < migrations/001_secondary_indexes.sql
+-- Applied versions are recorded in terrabikes.schema_migrations. Running it a second time stops
+-- at the first CREATE INDEX with a duplicate key name error.
+-- Run BikeStoreIndexAdvisor.py afterwards to check the dialog queries for full scans.
+
+CREATE TABLE IF NOT EXISTS `terrabikes`.`schema_migrations` (
+  `Version` int NOT NULL,
+  `Description` varchar(100) NOT NULL,
+  `Applied_At` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`Version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+USE `terrabikes`;
+
+-- Login and every portal look users up by username. The column collation is case insensitive,
+-- so username = %s matches regardless of case and can use this index.
+CREATE INDEX `username` ON `users` (`username`);
+
+-- State and city pickers of the sign up, customer search and new order pages
+CREATE INDEX `state_city` ON `regions` (`state_name`, `city`);
+
+-- Feedback and grievance lookups per order, and the warehouse load subqueries
+CREATE INDEX `order_record_type` ON `Feedback` (`order_id`, `record_type`);
+
+USE `terrabikes_bi`;
+
+-- Year and month filters of both dashboards
+CREATE INDEX `Year_Month` ON `Calendar` (`Year`, `Month`);
+
+-- Date range and year filters of the order status chart
+CREATE INDEX `Order_Date` ON `Order_Details` (`Order_Date`);
+
+-- Region/state filters: Region (Region, State) and Calendar (Full_Date) are already
+-- covered by the unique keys of the warehouse schema.
+
+INSERT INTO `terrabikes`.`schema_migrations` (Version, Description)
+VALUES (1, 'Secondary indexes for the dashboard and login hot paths');
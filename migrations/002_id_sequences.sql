@@ -0,0 +1,107 @@
+-- Migration 002: sequence based order and order detail ids
+--
+-- InsertOrder and InsertOrderDetails computed MAX(id) + 1, a scan per insert that hands the same
+-- id to concurrent terminals. Ids now come from the id_sequence table. ReserveIds hands out a
+-- block of ids in one short row update, so the application can reserve blocks and cache them
+-- (BikeStoreUtils.get_id_allocator) and pass the ids to InsertOrderWithId / InsertOrderDetailsWithId.
+--     mysql -u root -p < migrations/002_id_sequences.sql
+
+USE `terrabikes`;
+
+CREATE TABLE `id_sequence` (
+  `seq_name` varchar(30) NOT NULL,
+  `next_id` int NOT NULL,
+  PRIMARY KEY (`seq_name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT INTO id_sequence (seq_name, next_id)
+SELECT 'orders', COALESCE(MAX(order_id), 0) + 1 FROM orders;
+INSERT INTO id_sequence (seq_name, next_id)
+SELECT 'order_details', COALESCE(MAX(order_detail_id), 0) + 1 FROM order_details;
+
+DROP FUNCTION IF EXISTS `ReserveIds`;
+DROP FUNCTION IF EXISTS `InsertOrderWithId`;
+DROP FUNCTION IF EXISTS `InsertOrderDetailsWithId`;
+DROP FUNCTION IF EXISTS `InsertOrder`;
+DROP FUNCTION IF EXISTS `InsertOrderDetails`;
+
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` FUNCTION `ReserveIds`(p_seq_name VARCHAR(30), p_count INT) RETURNS int
+    NOT DETERMINISTIC
+    MODIFIES SQL DATA
+BEGIN
+  -- Returns the first id of a block of p_count consecutive ids
+  DECLARE l_first_id INT;
+
+  SELECT next_id
+    INTO l_first_id
+    FROM id_sequence
+   WHERE seq_name = p_seq_name
+     FOR UPDATE;
+
+  UPDATE id_sequence
+     SET next_id = next_id + p_count
+   WHERE seq_name = p_seq_name;
+
+  RETURN l_first_id;
+END ;;
+
+CREATE DEFINER=`root`@`localhost` FUNCTION `InsertOrderWithId`(p_order_id INT, p_username VARCHAR(200),p_employee_username VARCHAR(200)) RETURNS int
+    DETERMINISTIC
+BEGIN
+  DECLARE l_customer_id INT;
+  DECLARE l_employee_id INT;
+  
+  SELECT customer_id
+    INTO l_customer_id
+    FROM users u
+    WHERE u.username = p_username;
+  
+  SELECT employee_id
+    INTO l_employee_id
+    FROM users u
+    WHERE u.username = p_employee_username;
+  
+  INSERT INTO orders (order_id, order_status, ordered_date, shipped_date, customer_id, employee_id, creation_date, updated_date)
+    VALUES (p_order_id, 'New', NOW(), NULL, l_customer_id, l_employee_id, NOW(), NOW());
+    
+  RETURN p_order_id;
+END ;;
+
+CREATE DEFINER=`root`@`localhost` FUNCTION `InsertOrderDetailsWithId`( p_order_detail_id INT
+                   , p_order_id INT
+                   , p_product_id VARCHAR(200)
+                   , p_quantity FLOAT
+                                   , p_discount FLOAT
+                                   , p_price FLOAT) RETURNS int
+    DETERMINISTIC
+BEGIN
+  INSERT INTO order_details (order_detail_id, order_id, product_id, quantity, discount, price, creation_date, updated_date)
+    VALUES (p_order_detail_id, p_order_id, p_product_id, p_quantity, round(p_discount,2), round(p_price,2), now(), now());
+  
+  update products
+  set quantity = quantity - p_quantity, updated_date = now()
+  where product_id = p_product_id;
+  
+  RETURN p_order_detail_id;
+END ;;
+
+CREATE DEFINER=`root`@`localhost` FUNCTION `InsertOrder`(p_username VARCHAR(200),p_employee_username VARCHAR(200)) RETURNS int
+    DETERMINISTIC
+BEGIN
+  RETURN InsertOrderWithId(ReserveIds('orders', 1), p_username, p_employee_username);
+END ;;
+
+CREATE DEFINER=`root`@`localhost` FUNCTION `InsertOrderDetails`( p_order_id INT
+                   , p_product_id VARCHAR(200)
+                   , p_quantity FLOAT
+                                   , p_discount FLOAT
+                                   , p_price FLOAT) RETURNS int
+    DETERMINISTIC
+BEGIN
+  RETURN InsertOrderDetailsWithId(ReserveIds('order_details', 1), p_order_id, p_product_id, p_quantity, p_discount, p_price);
+END ;;
+DELIMITER ;
+
+INSERT INTO schema_migrations (Version, Description)
+VALUES (2, 'Sequence based order and order detail ids');
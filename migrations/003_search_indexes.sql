@@ -0,0 +1,24 @@
+-- Migration 003: name search indexes for customers, employees and products
+--
+-- The customer search and the employee name type-ahead matched names with LIKE '%text%', a full
+-- scan per search. BikeStoreSearch.py now matches words against these n-gram FULLTEXT indexes in
+-- boolean mode, ranked by relevance, and matches single letters as a name prefix on the B-tree
+-- name indexes. The n-gram parser indexes every ngram_token_size (default 2) character sequence,
+-- so words still match anywhere inside a name as they did with LIKE.
+--     mysql -u root -p < migrations/003_search_indexes.sql
+
+USE `terrabikes`;
+
+CREATE FULLTEXT INDEX `ft_name_email` ON `customer` (`first_name`, `last_name`, `email_id`) WITH PARSER ngram;
+CREATE INDEX `first_name` ON `customer` (`first_name`);
+CREATE INDEX `last_name` ON `customer` (`last_name`);
+
+CREATE FULLTEXT INDEX `ft_name_email` ON `employee` (`first_name`, `last_name`, `email_id`) WITH PARSER ngram;
+CREATE INDEX `first_name` ON `employee` (`first_name`);
+CREATE INDEX `last_name` ON `employee` (`last_name`);
+
+CREATE FULLTEXT INDEX `ft_product_name` ON `products` (`Product_Name`) WITH PARSER ngram;
+CREATE INDEX `product_name` ON `products` (`Product_Name`);
+
+INSERT INTO `terrabikes`.`schema_migrations` (Version, Description)
+VALUES (3, 'Name search indexes for customers, employees and products');
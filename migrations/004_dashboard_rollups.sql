@@ -0,0 +1,1055 @@
+-- Migration 004: rollup tables for the manager dashboard
+--
+-- Every dashboard panel aggregated the Sales x Order_Details x Calendar x Region join at query time,
+-- so the dashboard got slower as the order history grew. The refresh procedures now also maintain
+-- pre-aggregated rollups, and BikeStoreManagerDash reads the smallest rollup able to answer a panel:
+--   Sales_Order_Rollup     orders, lines, items, revenue and ratings by year/month/region/state/status
+--   Sales_Product_Rollup   the same by year/month/region/state/product, with the product category
+--   Sales_Customer_Rollup  orders by year/month/region/state/customer, for distinct customer counts
+--   Employee_Rollup        the employee_sales_view measures by year/region/state/employee
+-- Order counts are exact when rows are added up: an order has one date, one customer region, one
+-- status and one employee. Only the sales date range filter is finer than a month; the dashboard
+-- reads the fact tables for it.
+-- refresh_dwh_prc builds the rollups into shadow tables published with the base tables,
+-- refresh_dwh_incr_prc rebuilds the rollup rows of the months of the changed orders.
+--     mysql -u root -p < migrations/004_dashboard_rollups.sql
+
+USE `terrabikes_bi`;
+
+CREATE TABLE `Sales_Order_Rollup` (
+  `Year` int NOT NULL,
+  `Month` int NOT NULL,
+  `Region` varchar(20) NOT NULL,
+  `State` varchar(20) NOT NULL,
+  `Order_Status` varchar(40) DEFAULT NULL,
+  `Order_Count` int NOT NULL,
+  `Line_Count` int NOT NULL,
+  `Qty` int NOT NULL,
+  `Revenue` double NOT NULL,
+  `Rating_Sum` int NOT NULL,
+  `Rating_Count` int NOT NULL,
+  `First_Date` date NOT NULL,
+  `Last_Date` date NOT NULL,
+  KEY `Year_Month_Region` (`Year`,`Month`,`Region`,`State`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `Sales_Product_Rollup` (
+  `Year` int NOT NULL,
+  `Month` int NOT NULL,
+  `Region` varchar(20) NOT NULL,
+  `State` varchar(20) NOT NULL,
+  `Product_Key` int NOT NULL,
+  `Product_Name` varchar(50) NOT NULL,
+  `Category_Name` varchar(50) NOT NULL,
+  `Order_Count` int NOT NULL,
+  `Line_Count` int NOT NULL,
+  `Qty` int NOT NULL,
+  `Revenue` double NOT NULL,
+  PRIMARY KEY (`Year`,`Month`,`Region`,`State`,`Product_Key`),
+  KEY `Product_Key` (`Product_Key`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `Sales_Customer_Rollup` (
+  `Year` int NOT NULL,
+  `Month` int NOT NULL,
+  `Region` varchar(20) NOT NULL,
+  `State` varchar(20) NOT NULL,
+  `Customer_Key` int NOT NULL,
+  `Order_Count` int NOT NULL,
+  PRIMARY KEY (`Year`,`Month`,`Region`,`State`,`Customer_Key`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `Employee_Rollup` (
+  `Year` int NOT NULL,
+  `Region` varchar(20) NOT NULL,
+  `State` varchar(20) NOT NULL,
+  `Employee_ID` int NOT NULL,
+  `Employee_Name` varchar(30) NOT NULL,
+  `Order_Count` int NOT NULL,
+  `Rated_Orders` int NOT NULL,
+  `Line_Count` int NOT NULL,
+  `Revenue` double NOT NULL,
+  `Rating_Sum` int NOT NULL,
+  `Rating_Count` int NOT NULL,
+  PRIMARY KEY (`Year`,`Region`,`State`,`Employee_ID`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Initial load from the published warehouse tables
+INSERT INTO Sales_Order_Rollup (
+  Year, Month, Region, State, Order_Status, Order_Count, Line_Count,
+  Qty, Revenue, Rating_Sum, Rating_Count, First_Date, Last_Date
+)
+SELECT 
+  cd.Year, 
+  cd.Month, 
+  r.Region, 
+  r.State, 
+  od.order_status, 
+  COUNT(DISTINCT od.Order_Id), 
+  COUNT(*), 
+  SUM(s.qty), 
+  SUM(s.Price), 
+  COALESCE(SUM(od.Rating), 0), 
+  COUNT(od.Rating), 
+  MIN(cd.Full_Date), 
+  MAX(cd.Full_Date) 
+FROM 
+  Sales s, 
+  Order_Details od, 
+  Calendar cd, 
+  Region r 
+WHERE 
+  od.Order_Detail_Key = s.Order_Detail_Key 
+  AND cd.Calendar_Key = s.Calendar_Key 
+  AND r.Region_Key = s.Region_Key
+GROUP BY 
+  cd.Year, cd.Month, r.Region, r.State, od.order_status;
+
+INSERT INTO Sales_Product_Rollup (
+  Year, Month, Region, State, Product_Key, Product_Name, Category_Name,
+  Order_Count, Line_Count, Qty, Revenue
+)
+SELECT 
+  cd.Year, 
+  cd.Month, 
+  r.Region, 
+  r.State, 
+  p.Product_Key, 
+  p.Product_Name, 
+  p.Category_Name, 
+  COUNT(DISTINCT od.Order_Id), 
+  COUNT(*), 
+  SUM(s.qty), 
+  SUM(s.Price) 
+FROM 
+  Sales s, 
+  Order_Details od, 
+  Calendar cd, 
+  Region r, 
+  Product p 
+WHERE 
+  od.Order_Detail_Key = s.Order_Detail_Key 
+  AND cd.Calendar_Key = s.Calendar_Key 
+  AND r.Region_Key = s.Region_Key 
+  AND p.Product_Key = s.Product_Key
+GROUP BY 
+  cd.Year, cd.Month, r.Region, r.State, p.Product_Key, p.Product_Name, p.Category_Name;
+
+INSERT INTO Sales_Customer_Rollup (
+  Year, Month, Region, State, Customer_Key, Order_Count
+)
+SELECT 
+  cd.Year, 
+  cd.Month, 
+  r.Region, 
+  r.State, 
+  s.Customer_Key, 
+  COUNT(DISTINCT od.Order_Id) 
+FROM 
+  Sales s, 
+  Order_Details od, 
+  Calendar cd, 
+  Region r 
+WHERE 
+  od.Order_Detail_Key = s.Order_Detail_Key 
+  AND cd.Calendar_Key = s.Calendar_Key 
+  AND r.Region_Key = s.Region_Key
+GROUP BY 
+  cd.Year, cd.Month, r.Region, r.State, s.Customer_Key;
+
+INSERT INTO Employee_Rollup (
+  Year, Region, State, Employee_ID, Employee_Name, Order_Count,
+  Rated_Orders, Line_Count, Revenue, Rating_Sum, Rating_Count
+)
+SELECT 
+  c.Year, 
+  r.Region, 
+  r.State, 
+  e.Employee_ID, 
+  e.Employee_Name, 
+  COUNT(DISTINCT od.Order_Id), 
+  COUNT(DISTINCT CASE WHEN od.Rating >= 4 THEN od.Order_Id END), 
+  COUNT(*), 
+  SUM(sa.Price), 
+  COALESCE(SUM(od.Rating), 0), 
+  COUNT(od.Rating) 
+FROM 
+  Calendar c, 
+  Employee e, 
+  Sales sa, 
+  Performance p, 
+  Order_Details od, 
+  Region r 
+WHERE 
+  c.Calendar_Key = sa.Calendar_Key 
+  AND e.Employee_Key = p.Employee_Key 
+  AND p.Order_Detail_Key = sa.Order_Detail_Key 
+  AND od.Order_Detail_Key = sa.Order_Detail_Key 
+  AND e.Employee_Name NOT LIKE 'ONLINE DIRECT' 
+  AND r.Region_Key = p.Region_Key
+GROUP BY 
+  c.Year, r.Region, r.State, e.Employee_ID, e.Employee_Name;
+
+DROP PROCEDURE IF EXISTS `refresh_dwh_prc`;
+DROP PROCEDURE IF EXISTS `refresh_dwh_incr_prc`;
+
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `refresh_dwh_prc`(OUT o_status VARCHAR(20))
+BEGIN
+	-- Rebuilds the warehouse and its rollup tables into shadow tables while the dashboards keep
+	-- reading the published tables, then publishes all twelve tables with one atomic RENAME TABLE.
+	-- Progress and the published generation are kept in Dwh_Refresh_Status, every progress update is
+	-- committed at once so other sessions can follow the refresh.
+	DECLARE EXIT HANDLER FOR SQLEXCEPTION
+	BEGIN
+		ROLLBACK;
+		UPDATE Dwh_Refresh_Status SET Step = 'Failed' WHERE Status_ID = 1;
+		COMMIT;
+		DROP TABLE IF EXISTS Sales_New, Performance_New, Customer_New, Region_New,
+		                     Product_New, Calendar_New, Order_Details_New, Employee_New,
+		                     Sales_Order_Rollup_New, Sales_Product_Rollup_New,
+		                     Sales_Customer_Rollup_New, Employee_Rollup_New;
+		SET o_status = 'Failed';
+	END;
+
+	UPDATE Dwh_Refresh_Status
+	SET Step = 'Creating shadow tables', Steps_Done = 0, Steps_Total = 11, Started_At = NOW()
+	WHERE Status_ID = 1;
+	COMMIT;
+
+	DROP TABLE IF EXISTS Sales_New, Performance_New, Customer_New, Region_New,
+	                     Product_New, Calendar_New, Order_Details_New, Employee_New,
+	                     Sales_Order_Rollup_New, Sales_Product_Rollup_New,
+	                     Sales_Customer_Rollup_New, Employee_Rollup_New;
+	CREATE TABLE Product_New LIKE Product;
+	CREATE TABLE Calendar_New LIKE Calendar;
+	CREATE TABLE Region_New LIKE Region;
+	CREATE TABLE Employee_New LIKE Employee;
+	CREATE TABLE Customer_New LIKE Customer;
+	CREATE TABLE Order_Details_New LIKE Order_Details;
+	CREATE TABLE Sales_New LIKE Sales;
+	CREATE TABLE Performance_New LIKE Performance;
+	CREATE TABLE Sales_Order_Rollup_New LIKE Sales_Order_Rollup;
+	CREATE TABLE Sales_Product_Rollup_New LIKE Sales_Product_Rollup;
+	CREATE TABLE Sales_Customer_Rollup_New LIKE Sales_Customer_Rollup;
+	CREATE TABLE Employee_Rollup_New LIKE Employee_Rollup;
+
+	-- Load Products Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Product', Steps_Done = 1 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Product_New(
+	  Product_Key, Product_ID, Price, discount_percent, 
+	  Model_Year, Product_Name, Brand_Name, 
+	  Category_Name, Inventory_Status
+	) 
+	SELECT 
+	  NULL product_key, 
+	  p.product_id, 
+	  p.price, 
+	  p.discount_percent, 
+	  p.model_year, 
+	  p.product_name, 
+	  b.brand_name, 
+	  c.category_name, 
+	  p.inventory_status 
+	FROM 
+	  terrabikes.products p, 
+	  terrabikes.brand b, 
+	  terrabikes.category c 
+	WHERE 
+	  b.brand_id = p.brand_id 
+	  AND c.category_id = p.category_id;
+
+	-- Load Calendar Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Calendar', Steps_Done = 2 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Calendar_New (
+	  Calendar_Key, Full_Date, Year, Month, 
+	  Qtr, day_of_month, Week
+	) 
+	SELECT 
+	  DISTINCT NULL, 
+	  ordered_date, 
+	  YEAR(ordered_date), 
+	  MONTH(ordered_date), 
+	  QUARTER(ordered_date), 
+	  DAY(ordered_date), 
+	  WEEK(ordered_date) 
+	FROM 
+	  terrabikes.orders;
+
+	-- Load Region Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Region', Steps_Done = 3 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Region_New(Region_Key, Region, State) 
+	SELECT 
+	  DISTINCT NULL, 
+	  region, 
+	  state_name 
+	FROM 
+	  terrabikes.regions;
+
+	-- Load Employee Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Employee', Steps_Done = 4 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Employee_New(
+	  Employee_Key, Employee_ID, Employee_Name, 
+	  Employee_Rating
+	) 
+	SELECT 
+	  NULL, 
+	  employee_id, 
+	  CONCAT(first_name, ' ', last_name) employee_name, 
+	  emp_rating 
+	FROM 
+	  terrabikes.employee;
+
+	-- Load Customer Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Customer', Steps_Done = 5 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Customer_New(
+	  Customer_Key, customer_id, Customer_Name
+	) 
+	SELECT 
+	  NULL, 
+	  customer_id, 
+	  CONCAT(first_name, ' ', last_name) customer_name 
+	FROM 
+	  terrabikes.customer;
+
+	-- Load Order Details Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Order_Details', Steps_Done = 6 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Order_Details_New(
+	  Order_Detail_Key, Order_Id, Order_Detail_ID, 
+	  Order_Date, order_status, Issue_category, Rating, 
+	  status
+	) 
+	SELECT 
+	  NULL, 
+	  o.order_id, 
+	  od.order_detail_id, 
+	  o.ordered_date, 
+      o.order_status,
+	  (
+		SELECT 
+		  f.grevience_category 
+		FROM 
+		  terrabikes.feedback f 
+		WHERE 
+		  order_id = o.order_id 
+		  AND record_type = 'GREVIANCE'
+	  ) Issue_category, 
+	  (
+		SELECT 
+		  f.rating 
+		FROM 
+		  terrabikes.feedback f 
+		WHERE 
+		  order_id = o.order_id 
+		  AND record_type = 'FEEDBACK'
+	  ) rating, 
+	  (
+		SELECT 
+		  f.status 
+		FROM 
+		  terrabikes.feedback f 
+		WHERE 
+		  order_id = o.order_id 
+		  AND record_type = 'GREVIANCE'
+	  ) status 
+	FROM 
+	  terrabikes.orders o 
+	  JOIN terrabikes.order_details od ON od.order_id = o.order_id 
+	ORDER BY 
+	  od.order_detail_id;
+
+	-- Load Sales Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Sales', Steps_Done = 7 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Sales_New (
+	  Product_Key, Calendar_Key, Order_Detail_Key, 
+	  Region_Key, Customer_Key, Price, 
+	  qty
+	) 
+	SELECT 
+	  p.product_key, 
+	  cd.calendar_key, 
+	  od.order_detail_key, 
+	  r.region_key, 
+	  c.customer_key, 
+	  todd.price, 
+	  todd.quantity 
+	FROM 
+	  terrabikes.orders tod, 
+	  terrabikes.order_details todd, 
+	  terrabikes.customer tc, 
+	  terrabikes.regions tr, 
+	  Customer_New c, 
+	  Region_New r, 
+	  Product_New p, 
+	  Order_Details_New od, 
+	  Calendar_New cd 
+	WHERE 
+	  tod.order_id = todd.order_id 
+	  AND tc.customer_id = tod.customer_id 
+	  AND tr.region_id = tc.region_id 
+	  AND c.customer_id = tc.customer_id 
+	  AND r.state = tr.state_name 
+	  AND r.region = tr.region 
+	  AND p.product_id = todd.product_id 
+	  AND od.order_detail_id = todd.order_detail_id 
+	  AND cd.full_date = od.order_date;
+
+	-- Load Performance Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Performance', Steps_Done = 8 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Performance_New (
+	  Calendar_Key, Employee_Key, Region_Key, 
+	  Order_Detail_Key, employee_ratings
+	) 
+	SELECT 
+	  c.calendar_key, 
+	  e.employee_key, 
+	  r.region_key, 
+	  od.order_detail_key, 
+	  te.emp_rating 
+	FROM 
+	  terrabikes.orders tod, 
+	  terrabikes.order_details todd, 
+	  terrabikes.employee te, 
+	  terrabikes.regions tre, 
+	  Calendar_New c, 
+	  Employee_New e, 
+	  Region_New r, 
+	  Order_Details_New od 
+	WHERE 
+	  tod.order_id = todd.order_id 
+	  AND te.employee_id = tod.employee_id 
+	  AND tre.region_id = te.region_id --
+	  AND c.full_date = tod.ordered_date 
+	  AND e.employee_id = tod.employee_id 
+	  AND r.state = tre.state_name 
+	  AND r.region = tre.region 
+	  AND od.order_detail_id = todd.order_detail_id;
+
+	-- Load the rollup tables the dashboards read instead of aggregating the fact tables
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading rollups', Steps_Done = 9 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Sales_Order_Rollup_New (
+	  Year, Month, Region, State, Order_Status, Order_Count, Line_Count,
+	  Qty, Revenue, Rating_Sum, Rating_Count, First_Date, Last_Date
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  od.order_status, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(*), 
+	  SUM(s.qty), 
+	  SUM(s.Price), 
+	  COALESCE(SUM(od.Rating), 0), 
+	  COUNT(od.Rating), 
+	  MIN(cd.Full_Date), 
+	  MAX(cd.Full_Date) 
+	FROM 
+	  Sales_New s, 
+	  Order_Details_New od, 
+	  Calendar_New cd, 
+	  Region_New r 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, od.order_status;
+
+	INSERT INTO Sales_Product_Rollup_New (
+	  Year, Month, Region, State, Product_Key, Product_Name, Category_Name,
+	  Order_Count, Line_Count, Qty, Revenue
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  p.Product_Key, 
+	  p.Product_Name, 
+	  p.Category_Name, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(*), 
+	  SUM(s.qty), 
+	  SUM(s.Price) 
+	FROM 
+	  Sales_New s, 
+	  Order_Details_New od, 
+	  Calendar_New cd, 
+	  Region_New r, 
+	  Product_New p 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key 
+	  AND p.Product_Key = s.Product_Key
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, p.Product_Key, p.Product_Name, p.Category_Name;
+
+	INSERT INTO Sales_Customer_Rollup_New (
+	  Year, Month, Region, State, Customer_Key, Order_Count
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  s.Customer_Key, 
+	  COUNT(DISTINCT od.Order_Id) 
+	FROM 
+	  Sales_New s, 
+	  Order_Details_New od, 
+	  Calendar_New cd, 
+	  Region_New r 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, s.Customer_Key;
+
+	INSERT INTO Employee_Rollup_New (
+	  Year, Region, State, Employee_ID, Employee_Name, Order_Count,
+	  Rated_Orders, Line_Count, Revenue, Rating_Sum, Rating_Count
+	)
+	SELECT 
+	  c.Year, 
+	  r.Region, 
+	  r.State, 
+	  e.Employee_ID, 
+	  e.Employee_Name, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(DISTINCT CASE WHEN od.Rating >= 4 THEN od.Order_Id END), 
+	  COUNT(*), 
+	  SUM(sa.Price), 
+	  COALESCE(SUM(od.Rating), 0), 
+	  COUNT(od.Rating) 
+	FROM 
+	  Calendar_New c, 
+	  Employee_New e, 
+	  Sales_New sa, 
+	  Performance_New p, 
+	  Order_Details_New od, 
+	  Region_New r 
+	WHERE 
+	  c.Calendar_Key = sa.Calendar_Key 
+	  AND e.Employee_Key = p.Employee_Key 
+	  AND p.Order_Detail_Key = sa.Order_Detail_Key 
+	  AND od.Order_Detail_Key = sa.Order_Detail_Key 
+	  AND e.Employee_Name NOT LIKE 'ONLINE DIRECT' 
+	  AND r.Region_Key = p.Region_Key
+	GROUP BY 
+	  c.Year, r.Region, r.State, e.Employee_ID, e.Employee_Name;
+
+	-- Publish the shadow tables in one atomic rename
+	UPDATE Dwh_Refresh_Status SET Step = 'Publishing', Steps_Done = 10 WHERE Status_ID = 1;
+	COMMIT;
+	DROP TABLE IF EXISTS Sales_Old, Performance_Old, Customer_Old, Region_Old,
+	                     Product_Old, Calendar_Old, Order_Details_Old, Employee_Old,
+	                     Sales_Order_Rollup_Old, Sales_Product_Rollup_Old,
+	                     Sales_Customer_Rollup_Old, Employee_Rollup_Old;
+	RENAME TABLE
+	  Sales TO Sales_Old, Sales_New TO Sales,
+	  Performance TO Performance_Old, Performance_New TO Performance,
+	  Customer TO Customer_Old, Customer_New TO Customer,
+	  Region TO Region_Old, Region_New TO Region,
+	  Product TO Product_Old, Product_New TO Product,
+	  Calendar TO Calendar_Old, Calendar_New TO Calendar,
+	  Order_Details TO Order_Details_Old, Order_Details_New TO Order_Details,
+	  Employee TO Employee_Old, Employee_New TO Employee,
+	  Sales_Order_Rollup TO Sales_Order_Rollup_Old, Sales_Order_Rollup_New TO Sales_Order_Rollup,
+	  Sales_Product_Rollup TO Sales_Product_Rollup_Old, Sales_Product_Rollup_New TO Sales_Product_Rollup,
+	  Sales_Customer_Rollup TO Sales_Customer_Rollup_Old, Sales_Customer_Rollup_New TO Sales_Customer_Rollup,
+	  Employee_Rollup TO Employee_Rollup_Old, Employee_Rollup_New TO Employee_Rollup;
+	DROP TABLE Sales_Old, Performance_Old, Customer_Old, Region_Old,
+	           Product_Old, Calendar_Old, Order_Details_Old, Employee_Old,
+	           Sales_Order_Rollup_Old, Sales_Product_Rollup_Old,
+	           Sales_Customer_Rollup_Old, Employee_Rollup_Old;
+
+	-- The full load covers every change made up to today
+	UPDATE Dwh_Load_Watermark SET Last_Loaded = CURDATE(), Rows_Touched = 0, Loaded_At = NOW();
+
+	UPDATE Dwh_Refresh_Status
+	SET Step = 'Published', Steps_Done = 11, Generation = Generation + 1, Published_At = NOW()
+	WHERE Status_ID = 1;
+	COMMIT;
+	SET o_status = 'Success';
+END ;;
+
+CREATE DEFINER=`root`@`localhost` PROCEDURE `refresh_dwh_incr_prc`(OUT o_status VARCHAR(20))
+BEGIN
+	-- Loads only the source rows created or updated since the last incremental load.
+	-- Dimensions are upserted on their natural keys; the Sales and Performance rows of every
+	-- changed order are deleted and reloaded, and the rollup rows of the months of those orders rebuilt.
+	-- Rows deleted in terrabikes need a full refresh_dwh_prc.
+	DECLARE v_since DATE;
+	DECLARE v_today DATE DEFAULT CURDATE();
+	DECLARE v_product INT DEFAULT 0;
+	DECLARE v_calendar INT DEFAULT 0;
+	DECLARE v_region INT DEFAULT 0;
+	DECLARE v_employee INT DEFAULT 0;
+	DECLARE v_customer INT DEFAULT 0;
+	DECLARE v_order_details INT DEFAULT 0;
+	DECLARE v_sales INT DEFAULT 0;
+	DECLARE v_performance INT DEFAULT 0;
+	DECLARE v_rollups INT DEFAULT 0;
+	DECLARE EXIT HANDLER FOR SQLEXCEPTION
+	BEGIN
+		ROLLBACK;
+		DROP TEMPORARY TABLE IF EXISTS tmp_changed_orders;
+		DROP TEMPORARY TABLE IF EXISTS tmp_changed_periods;
+		SET o_status = 'Failed';
+	END;
+
+	-- Dates are day granular, so rows changed on the watermark day are examined again
+	SELECT COALESCE(MIN(Last_Loaded), '1000-01-01') INTO v_since FROM Dwh_Load_Watermark;
+
+	START TRANSACTION;
+
+	-- Orders whose fact rows must be reloaded
+	DROP TEMPORARY TABLE IF EXISTS tmp_changed_orders;
+	CREATE TEMPORARY TABLE tmp_changed_orders (order_id INT PRIMARY KEY);
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT order_id FROM terrabikes.orders
+	WHERE GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since;
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT order_id FROM terrabikes.order_details
+	WHERE GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since;
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT order_id FROM terrabikes.feedback
+	WHERE GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since;
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT o.order_id FROM terrabikes.orders o, terrabikes.customer c
+	WHERE c.customer_id = o.customer_id
+	  AND GREATEST(c.creation_date, COALESCE(c.updated_date, c.creation_date)) >= v_since;
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT o.order_id FROM terrabikes.orders o, terrabikes.employee e
+	WHERE e.employee_id = o.employee_id
+	  AND GREATEST(e.creation_date, COALESCE(e.updated_date, e.creation_date)) >= v_since;
+
+	-- Months whose rollup rows must be rebuilt: the old and the new order dates of the changed orders
+	DROP TEMPORARY TABLE IF EXISTS tmp_changed_periods;
+	CREATE TEMPORARY TABLE tmp_changed_periods (Year INT, Month INT, PRIMARY KEY (Year, Month));
+	INSERT IGNORE INTO tmp_changed_periods
+	SELECT DISTINCT YEAR(od.Order_Date), MONTH(od.Order_Date)
+	FROM Order_Details od, tmp_changed_orders t
+	WHERE od.Order_Id = t.order_id;
+	INSERT IGNORE INTO tmp_changed_periods
+	SELECT DISTINCT YEAR(o.ordered_date), MONTH(o.ordered_date)
+	FROM terrabikes.orders o, tmp_changed_orders t
+	WHERE o.order_id = t.order_id;
+
+	-- Upsert Products Table
+	INSERT INTO Product(
+	  Product_Key, Product_ID, Price, discount_percent, 
+	  Model_Year, Product_Name, Brand_Name, 
+	  Category_Name, Inventory_Status
+	) 
+	SELECT 
+	  NULL product_key, 
+	  p.product_id, 
+	  p.price, 
+	  p.discount_percent, 
+	  p.model_year, 
+	  p.product_name, 
+	  b.brand_name, 
+	  c.category_name, 
+	  p.inventory_status 
+	FROM 
+	  terrabikes.products p, 
+	  terrabikes.brand b, 
+	  terrabikes.category c 
+	WHERE 
+	  b.brand_id = p.brand_id 
+	  AND c.category_id = p.category_id
+	  AND GREATEST(p.creation_date, COALESCE(p.updated_date, p.creation_date),
+	               COALESCE(b.updated_date, b.creation_date),
+	               COALESCE(c.updated_date, c.creation_date)) >= v_since
+	ON DUPLICATE KEY UPDATE
+	  Price = VALUES(Price),
+	  discount_percent = VALUES(discount_percent),
+	  Model_Year = VALUES(Model_Year),
+	  Product_Name = VALUES(Product_Name),
+	  Brand_Name = VALUES(Brand_Name),
+	  Category_Name = VALUES(Category_Name),
+	  Inventory_Status = VALUES(Inventory_Status);
+	SET v_product = ROW_COUNT();
+
+	-- Add new Calendar dates
+	INSERT IGNORE INTO calendar (
+	  Calendar_Key, Full_Date, Year, Month, 
+	  Qtr, day_of_month, Week
+	) 
+	SELECT 
+	  DISTINCT NULL, 
+	  o.ordered_date, 
+	  YEAR(o.ordered_date), 
+	  MONTH(o.ordered_date), 
+	  QUARTER(o.ordered_date), 
+	  DAY(o.ordered_date), 
+	  WEEK(o.ordered_date) 
+	FROM 
+	  terrabikes.orders o, 
+	  tmp_changed_orders t 
+	WHERE 
+	  o.order_id = t.order_id;
+	SET v_calendar = ROW_COUNT();
+
+	-- Add new Regions
+	INSERT IGNORE INTO region(Region_Key, Region, State) 
+	SELECT 
+	  DISTINCT NULL, 
+	  region, 
+	  state_name 
+	FROM 
+	  terrabikes.regions
+	WHERE 
+	  DATE(GREATEST(creation_date, COALESCE(updated_date, creation_date))) >= v_since;
+	SET v_region = ROW_COUNT();
+
+	-- Upsert Employee Table
+	INSERT INTO Employee(
+	  Employee_Key, Employee_ID, Employee_Name, 
+	  Employee_Rating
+	) 
+	SELECT 
+	  NULL, 
+	  employee_id, 
+	  CONCAT(first_name, ' ', last_name) employee_name, 
+	  emp_rating 
+	FROM 
+	  terrabikes.employee
+	WHERE 
+	  GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since
+	ON DUPLICATE KEY UPDATE
+	  Employee_Name = VALUES(Employee_Name),
+	  Employee_Rating = VALUES(Employee_Rating);
+	SET v_employee = ROW_COUNT();
+
+	-- Upsert Customer Table
+	INSERT INTO Customer(
+	  Customer_Key, customer_id, Customer_Name
+	) 
+	SELECT 
+	  NULL, 
+	  customer_id, 
+	  CONCAT(first_name, ' ', last_name) customer_name 
+	FROM 
+	  terrabikes.customer
+	WHERE 
+	  GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since
+	ON DUPLICATE KEY UPDATE
+	  Customer_Name = VALUES(Customer_Name);
+	SET v_customer = ROW_COUNT();
+
+	-- Upsert Order Details of the changed orders
+	INSERT INTO Order_Details(
+	  Order_Detail_Key, Order_Id, Order_Detail_ID, 
+	  Order_Date, order_status, Issue_category, Rating, 
+	  status
+	) 
+	SELECT 
+	  NULL, 
+	  o.order_id, 
+	  od.order_detail_id, 
+	  o.ordered_date, 
+	  o.order_status,
+	  (
+		SELECT 
+		  f.grevience_category 
+		FROM 
+		  terrabikes.feedback f 
+		WHERE 
+		  order_id = o.order_id 
+		  AND record_type = 'GREVIANCE'
+	  ) Issue_category, 
+	  (
+		SELECT 
+		  f.rating 
+		FROM 
+		  terrabikes.feedback f 
+		WHERE 
+		  order_id = o.order_id 
+		  AND record_type = 'FEEDBACK'
+	  ) rating, 
+	  (
+		SELECT 
+		  f.status 
+		FROM 
+		  terrabikes.feedback f 
+		WHERE 
+		  order_id = o.order_id 
+		  AND record_type = 'GREVIANCE'
+	  ) status 
+	FROM 
+	  terrabikes.orders o 
+	  JOIN tmp_changed_orders t ON t.order_id = o.order_id 
+	  JOIN terrabikes.order_details od ON od.order_id = o.order_id 
+	ORDER BY 
+	  od.order_detail_id
+	ON DUPLICATE KEY UPDATE
+	  Order_Id = VALUES(Order_Id),
+	  Order_Date = VALUES(Order_Date),
+	  order_status = VALUES(order_status),
+	  Issue_category = VALUES(Issue_category),
+	  Rating = VALUES(Rating),
+	  status = VALUES(status);
+	SET v_order_details = ROW_COUNT();
+
+	-- Reload Sales rows of the changed orders
+	DELETE s FROM Sales s, Order_Details od, tmp_changed_orders t
+	WHERE s.Order_Detail_Key = od.Order_Detail_Key
+	  AND od.Order_Id = t.order_id;
+	INSERT INTO Sales (
+	  Product_Key, Calendar_Key, Order_Detail_Key, 
+	  Region_Key, Customer_Key, Price, 
+	  qty
+	) 
+	SELECT 
+	  p.product_key, 
+	  cd.calendar_key, 
+	  od.order_detail_key, 
+	  r.region_key, 
+	  c.customer_key, 
+	  todd.price, 
+	  todd.quantity 
+	FROM 
+	  tmp_changed_orders t, 
+	  terrabikes.orders tod, 
+	  terrabikes.order_details todd, 
+	  terrabikes.customer tc, 
+	  terrabikes.regions tr, 
+	  customer c, 
+	  region r, 
+	  product p, 
+	  order_details od, 
+	  calendar cd 
+	WHERE 
+	  tod.order_id = t.order_id 
+	  AND tod.order_id = todd.order_id 
+	  AND tc.customer_id = tod.customer_id 
+	  AND tr.region_id = tc.region_id 
+	  AND c.customer_id = tc.customer_id 
+	  AND r.state = tr.state_name 
+	  AND r.region = tr.region 
+	  AND p.product_id = todd.product_id 
+	  AND od.order_detail_id = todd.order_detail_id 
+	  AND cd.full_date = od.order_date;
+	SET v_sales = ROW_COUNT();
+
+	-- Reload Performance rows of the changed orders
+	DELETE pf FROM Performance pf, Order_Details od, tmp_changed_orders t
+	WHERE pf.Order_Detail_Key = od.Order_Detail_Key
+	  AND od.Order_Id = t.order_id;
+	INSERT INTO Performance (
+	  Calendar_Key, Employee_Key, Region_Key, 
+	  Order_Detail_Key, employee_ratings
+	) 
+	SELECT 
+	  c.calendar_key, 
+	  e.employee_key, 
+	  r.region_key, 
+	  od.order_detail_key, 
+	  te.emp_rating 
+	FROM 
+	  tmp_changed_orders t, 
+	  terrabikes.orders tod, 
+	  terrabikes.order_details todd, 
+	  terrabikes.employee te, 
+	  terrabikes.regions tre, 
+	  calendar c, 
+	  employee e, 
+	  region r, 
+	  order_details od 
+	WHERE 
+	  tod.order_id = t.order_id 
+	  AND tod.order_id = todd.order_id 
+	  AND te.employee_id = tod.employee_id 
+	  AND tre.region_id = te.region_id 
+	  AND c.full_date = tod.ordered_date 
+	  AND e.employee_id = tod.employee_id 
+	  AND r.state = tre.state_name 
+	  AND r.region = tre.region 
+	  AND od.order_detail_id = todd.order_detail_id;
+	SET v_performance = ROW_COUNT();
+
+	-- Rebuild the rollup rows of every month with a changed order (by year for employees)
+	DELETE r FROM Sales_Order_Rollup r, tmp_changed_periods tp
+	WHERE r.Year = tp.Year AND r.Month = tp.Month;
+	DELETE r FROM Sales_Product_Rollup r, tmp_changed_periods tp
+	WHERE r.Year = tp.Year AND r.Month = tp.Month;
+	DELETE r FROM Sales_Customer_Rollup r, tmp_changed_periods tp
+	WHERE r.Year = tp.Year AND r.Month = tp.Month;
+	DELETE FROM Employee_Rollup WHERE Year IN (SELECT Year FROM tmp_changed_periods);
+	INSERT INTO Sales_Order_Rollup (
+	  Year, Month, Region, State, Order_Status, Order_Count, Line_Count,
+	  Qty, Revenue, Rating_Sum, Rating_Count, First_Date, Last_Date
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  od.order_status, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(*), 
+	  SUM(s.qty), 
+	  SUM(s.Price), 
+	  COALESCE(SUM(od.Rating), 0), 
+	  COUNT(od.Rating), 
+	  MIN(cd.Full_Date), 
+	  MAX(cd.Full_Date) 
+	FROM 
+	  tmp_changed_periods tp, 
+	  Sales s, 
+	  Order_Details od, 
+	  Calendar cd, 
+	  Region r 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key 
+	  AND tp.Year = cd.Year AND tp.Month = cd.Month
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, od.order_status;
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	INSERT INTO Sales_Product_Rollup (
+	  Year, Month, Region, State, Product_Key, Product_Name, Category_Name,
+	  Order_Count, Line_Count, Qty, Revenue
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  p.Product_Key, 
+	  p.Product_Name, 
+	  p.Category_Name, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(*), 
+	  SUM(s.qty), 
+	  SUM(s.Price) 
+	FROM 
+	  tmp_changed_periods tp, 
+	  Sales s, 
+	  Order_Details od, 
+	  Calendar cd, 
+	  Region r, 
+	  Product p 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key 
+	  AND p.Product_Key = s.Product_Key 
+	  AND tp.Year = cd.Year AND tp.Month = cd.Month
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, p.Product_Key, p.Product_Name, p.Category_Name;
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	INSERT INTO Sales_Customer_Rollup (
+	  Year, Month, Region, State, Customer_Key, Order_Count
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  s.Customer_Key, 
+	  COUNT(DISTINCT od.Order_Id) 
+	FROM 
+	  tmp_changed_periods tp, 
+	  Sales s, 
+	  Order_Details od, 
+	  Calendar cd, 
+	  Region r 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key 
+	  AND tp.Year = cd.Year AND tp.Month = cd.Month
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, s.Customer_Key;
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	INSERT INTO Employee_Rollup (
+	  Year, Region, State, Employee_ID, Employee_Name, Order_Count,
+	  Rated_Orders, Line_Count, Revenue, Rating_Sum, Rating_Count
+	)
+	SELECT 
+	  c.Year, 
+	  r.Region, 
+	  r.State, 
+	  e.Employee_ID, 
+	  e.Employee_Name, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(DISTINCT CASE WHEN od.Rating >= 4 THEN od.Order_Id END), 
+	  COUNT(*), 
+	  SUM(sa.Price), 
+	  COALESCE(SUM(od.Rating), 0), 
+	  COUNT(od.Rating) 
+	FROM 
+	  Calendar c, 
+	  Employee e, 
+	  Sales sa, 
+	  Performance p, 
+	  Order_Details od, 
+	  Region r 
+	WHERE 
+	  c.Calendar_Key = sa.Calendar_Key 
+	  AND e.Employee_Key = p.Employee_Key 
+	  AND p.Order_Detail_Key = sa.Order_Detail_Key 
+	  AND od.Order_Detail_Key = sa.Order_Detail_Key 
+	  AND e.Employee_Name NOT LIKE 'ONLINE DIRECT' 
+	  AND r.Region_Key = p.Region_Key 
+	  AND c.Year IN (SELECT Year FROM tmp_changed_periods)
+	GROUP BY 
+	  c.Year, r.Region, r.State, e.Employee_ID, e.Employee_Name;
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	-- Product renames and category moves do not change any order, update the names in place
+	UPDATE Sales_Product_Rollup r, Product p
+	SET r.Product_Name = p.Product_Name, r.Category_Name = p.Category_Name
+	WHERE p.Product_Key = r.Product_Key
+	  AND (r.Product_Name <> p.Product_Name OR r.Category_Name <> p.Category_Name);
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	-- Move the watermarks and record the rows touched per table
+	INSERT INTO Dwh_Load_Watermark (Table_Name, Last_Loaded, Rows_Touched, Loaded_At)
+	VALUES ('Product', v_today, v_product, NOW()),
+	       ('Calendar', v_today, v_calendar, NOW()),
+	       ('Region', v_today, v_region, NOW()),
+	       ('Employee', v_today, v_employee, NOW()),
+	       ('Customer', v_today, v_customer, NOW()),
+	       ('Order_Details', v_today, v_order_details, NOW()),
+	       ('Sales', v_today, v_sales, NOW()),
+	       ('Performance', v_today, v_performance, NOW()),
+	       ('Rollups', v_today, v_rollups, NOW())
+	ON DUPLICATE KEY UPDATE
+	  Last_Loaded = VALUES(Last_Loaded),
+	  Rows_Touched = VALUES(Rows_Touched),
+	  Loaded_At = VALUES(Loaded_At);
+
+	UPDATE Dwh_Refresh_Status
+	SET Step = 'Published', Generation = Generation + 1, Published_At = NOW()
+	WHERE Status_ID = 1;
+
+	COMMIT;
+	DROP TEMPORARY TABLE IF EXISTS tmp_changed_orders;
+	DROP TEMPORARY TABLE IF EXISTS tmp_changed_periods;
+	SET o_status = 'Success';
+END ;;
+DELIMITER ;
+
+INSERT INTO `terrabikes`.`schema_migrations` (Version, Description)
+VALUES (4, 'Rollup tables for the manager dashboard');
@@ -32,7 +32,8 @@ CREATE TABLE `Calendar` (
   `Qtr` int NOT NULL,
   `day_of_month` int NOT NULL,
   `Week` int NOT NULL,
-  PRIMARY KEY (`Calendar_Key`)
+  PRIMARY KEY (`Calendar_Key`),
+  UNIQUE KEY `Full_Date` (`Full_Date`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1024 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -57,7 +58,8 @@ CREATE TABLE `Customer` (
   `Customer_Key` int NOT NULL AUTO_INCREMENT,
   `customer_id` int NOT NULL,
   `Customer_Name` varchar(50) NOT NULL,
-  PRIMARY KEY (`Customer_Key`)
+  PRIMARY KEY (`Customer_Key`),
+  UNIQUE KEY `customer_id` (`customer_id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=256 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -83,7 +85,8 @@ CREATE TABLE `Employee` (
   `Employee_ID` int NOT NULL,
   `Employee_Name` varchar(30) NOT NULL,
   `Employee_Rating` int DEFAULT NULL,
-  PRIMARY KEY (`Employee_Key`)
+  PRIMARY KEY (`Employee_Key`),
+  UNIQUE KEY `Employee_ID` (`Employee_ID`)
 ) ENGINE=InnoDB AUTO_INCREMENT=64 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -134,7 +137,8 @@ CREATE TABLE `Order_Details` (
   `Issue_category` varchar(50) DEFAULT NULL,
   `Rating` int DEFAULT NULL,
   `status` varchar(20) DEFAULT NULL,
-  PRIMARY KEY (`Order_Detail_Key`)
+  PRIMARY KEY (`Order_Detail_Key`),
+  UNIQUE KEY `Order_Detail_ID` (`Order_Detail_ID`)
 ) ENGINE=InnoDB AUTO_INCREMENT=2048 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -164,11 +168,7 @@ CREATE TABLE `Performance` (
   KEY `Calendar_Key` (`Calendar_Key`),
   KEY `Employee_Key` (`Employee_Key`),
   KEY `Region_Key` (`Region_Key`),
-  KEY `Order_Detail_Key` (`Order_Detail_Key`),
-  CONSTRAINT `performance_ibfk_1` FOREIGN KEY (`Calendar_Key`) REFERENCES `Calendar` (`Calendar_Key`),
-  CONSTRAINT `performance_ibfk_2` FOREIGN KEY (`Employee_Key`) REFERENCES `Employee` (`Employee_Key`),
-  CONSTRAINT `performance_ibfk_3` FOREIGN KEY (`Region_Key`) REFERENCES `Region` (`Region_Key`),
-  CONSTRAINT `performance_ibfk_4` FOREIGN KEY (`Order_Detail_Key`) REFERENCES `Order_Details` (`Order_Detail_Key`)
+  KEY `Order_Detail_Key` (`Order_Detail_Key`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -225,7 +225,8 @@ CREATE TABLE `Region` (
   `Region_Key` int NOT NULL AUTO_INCREMENT,
   `Region` varchar(20) NOT NULL,
   `State` varchar(20) NOT NULL,
-  PRIMARY KEY (`Region_Key`)
+  PRIMARY KEY (`Region_Key`),
+  UNIQUE KEY `Region_State` (`Region`,`State`)
 ) ENGINE=InnoDB AUTO_INCREMENT=64 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -258,12 +259,7 @@ CREATE TABLE `Sales` (
   KEY `Calendar_Key` (`Calendar_Key`),
   KEY `Order_Detail_Key` (`Order_Detail_Key`),
   KEY `Region_Key` (`Region_Key`),
-  KEY `Customer_Key` (`Customer_Key`),
-  CONSTRAINT `sales_ibfk_1` FOREIGN KEY (`Product_Key`) REFERENCES `Product` (`Product_Key`),
-  CONSTRAINT `sales_ibfk_2` FOREIGN KEY (`Calendar_Key`) REFERENCES `Calendar` (`Calendar_Key`),
-  CONSTRAINT `sales_ibfk_3` FOREIGN KEY (`Order_Detail_Key`) REFERENCES `Order_Details` (`Order_Detail_Key`),
-  CONSTRAINT `sales_ibfk_4` FOREIGN KEY (`Region_Key`) REFERENCES `Region` (`Region_Key`),
-  CONSTRAINT `sales_ibfk_5` FOREIGN KEY (`Customer_Key`) REFERENCES `Customer` (`Customer_Key`)
+  KEY `Customer_Key` (`Customer_Key`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -277,6 +273,184 @@ INSERT INTO `Sales` VALUES (10,1,968,10,131,2651.77,3),(10,1,606,44,184,4499.95,
 /*!40000 ALTER TABLE `Sales` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `Dwh_Load_Watermark`
+--
+
+DROP TABLE IF EXISTS `Dwh_Load_Watermark`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `Dwh_Load_Watermark` (
+  `Table_Name` varchar(30) NOT NULL,
+  `Last_Loaded` date NOT NULL,
+  `Rows_Touched` int NOT NULL DEFAULT '0',
+  `Loaded_At` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`Table_Name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `Dwh_Refresh_Status`
+--
+
+DROP TABLE IF EXISTS `Dwh_Refresh_Status`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `Dwh_Refresh_Status` (
+  `Status_ID` int NOT NULL,
+  `Generation` int NOT NULL DEFAULT '0',
+  `Step` varchar(40) DEFAULT NULL,
+  `Steps_Done` int NOT NULL DEFAULT '0',
+  `Steps_Total` int NOT NULL DEFAULT '0',
+  `Started_At` datetime DEFAULT NULL,
+  `Published_At` datetime DEFAULT NULL,
+  PRIMARY KEY (`Status_ID`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `Dwh_Refresh_Status`
+--
+
+LOCK TABLES `Dwh_Refresh_Status` WRITE;
+/*!40000 ALTER TABLE `Dwh_Refresh_Status` DISABLE KEYS */;
+INSERT INTO `Dwh_Refresh_Status` VALUES (1,0,NULL,0,0,NULL,NULL);
+/*!40000 ALTER TABLE `Dwh_Refresh_Status` ENABLE KEYS */;
+UNLOCK TABLES;
+
+--
+-- Table structure for table `Dwh_Refresh_Log`
+--
+
+DROP TABLE IF EXISTS `Dwh_Refresh_Log`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `Dwh_Refresh_Log` (
+  `Log_ID` int NOT NULL AUTO_INCREMENT,
+  `Run_Started` datetime NOT NULL,
+  `Refresh_Mode` varchar(20) NOT NULL,
+  `Table_Name` varchar(30) DEFAULT NULL,
+  `Rows_Touched` int NOT NULL DEFAULT '0',
+  `Duration_Sec` float NOT NULL,
+  `Status` varchar(20) NOT NULL,
+  PRIMARY KEY (`Log_ID`),
+  KEY `Run_Started` (`Run_Started`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `Employee_Sales`
+--
+
+DROP TABLE IF EXISTS `Employee_Sales`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `Employee_Sales` (
+  `employee_id` int NOT NULL,
+  `employee_name` varchar(30) NOT NULL,
+  `year` int NOT NULL,
+  `full_date` date NOT NULL,
+  `order_detail_id` int NOT NULL,
+  `order_id` int NOT NULL,
+  `rating` int DEFAULT NULL,
+  `price` float NOT NULL,
+  `region` varchar(20) NOT NULL,
+  `state` varchar(20) NOT NULL,
+  KEY `Year_Region_State_Employee` (`year`,`region`,`state`,`employee_id`),
+  KEY `Order_Id` (`order_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `Sales_Order_Rollup`
+--
+
+DROP TABLE IF EXISTS `Sales_Order_Rollup`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `Sales_Order_Rollup` (
+  `Year` int NOT NULL,
+  `Month` int NOT NULL,
+  `Region` varchar(20) NOT NULL,
+  `State` varchar(20) NOT NULL,
+  `Order_Status` varchar(40) DEFAULT NULL,
+  `Order_Count` int NOT NULL,
+  `Line_Count` int NOT NULL,
+  `Qty` int NOT NULL,
+  `Revenue` double NOT NULL,
+  `Rating_Sum` int NOT NULL,
+  `Rating_Count` int NOT NULL,
+  `First_Date` date NOT NULL,
+  `Last_Date` date NOT NULL,
+  KEY `Year_Month_Region` (`Year`,`Month`,`Region`,`State`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `Sales_Product_Rollup`
+--
+
+DROP TABLE IF EXISTS `Sales_Product_Rollup`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `Sales_Product_Rollup` (
+  `Year` int NOT NULL,
+  `Month` int NOT NULL,
+  `Region` varchar(20) NOT NULL,
+  `State` varchar(20) NOT NULL,
+  `Product_Key` int NOT NULL,
+  `Product_Name` varchar(50) NOT NULL,
+  `Category_Name` varchar(50) NOT NULL,
+  `Order_Count` int NOT NULL,
+  `Line_Count` int NOT NULL,
+  `Qty` int NOT NULL,
+  `Revenue` double NOT NULL,
+  PRIMARY KEY (`Year`,`Month`,`Region`,`State`,`Product_Key`),
+  KEY `Product_Key` (`Product_Key`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `Sales_Customer_Rollup`
+--
+
+DROP TABLE IF EXISTS `Sales_Customer_Rollup`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `Sales_Customer_Rollup` (
+  `Year` int NOT NULL,
+  `Month` int NOT NULL,
+  `Region` varchar(20) NOT NULL,
+  `State` varchar(20) NOT NULL,
+  `Customer_Key` int NOT NULL,
+  `Order_Count` int NOT NULL,
+  PRIMARY KEY (`Year`,`Month`,`Region`,`State`,`Customer_Key`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `Employee_Rollup`
+--
+
+DROP TABLE IF EXISTS `Employee_Rollup`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `Employee_Rollup` (
+  `Year` int NOT NULL,
+  `Region` varchar(20) NOT NULL,
+  `State` varchar(20) NOT NULL,
+  `Employee_ID` int NOT NULL,
+  `Employee_Name` varchar(30) NOT NULL,
+  `Order_Count` int NOT NULL,
+  `Rated_Orders` int NOT NULL,
+  `Line_Count` int NOT NULL,
+  `Revenue` double NOT NULL,
+  `Rating_Sum` int NOT NULL,
+  `Rating_Count` int NOT NULL,
+  PRIMARY KEY (`Year`,`Region`,`State`,`Employee_ID`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Dumping events for database 'terrabikes_bi'
 --
@@ -500,19 +674,50 @@ DELIMITER ;
 DELIMITER ;;
 CREATE DEFINER=`root`@`localhost` PROCEDURE `refresh_dwh_prc`(OUT o_status VARCHAR(20))
 BEGIN
-	SET FOREIGN_KEY_CHECKS = 0; 
-    TRUNCATE TABLE Sales;
-	TRUNCATE TABLE Performance;
-	TRUNCATE TABLE Customer;
-	TRUNCATE TABLE Region;
-	TRUNCATE TABLE Product;
-	TRUNCATE TABLE Calendar;
-	TRUNCATE TABLE Order_Details;
-	TRUNCATE TABLE Employee;
-    SET FOREIGN_KEY_CHECKS = 1; 
+	-- Rebuilds the warehouse, the materialized employee sales and the rollup tables into shadow tables
+	-- while the dashboards keep reading the published tables, then publishes all thirteen tables with
+	-- one atomic RENAME TABLE.
+	-- Progress and the published generation are kept in Dwh_Refresh_Status, every progress update is
+	-- committed at once so other sessions can follow the refresh.
+	DECLARE EXIT HANDLER FOR SQLEXCEPTION
+	BEGIN
+		ROLLBACK;
+		UPDATE Dwh_Refresh_Status SET Step = 'Failed' WHERE Status_ID = 1;
+		COMMIT;
+		DROP TABLE IF EXISTS Sales_New, Performance_New, Customer_New, Region_New,
+		                     Product_New, Calendar_New, Order_Details_New, Employee_New, Employee_Sales_New,
+		                     Sales_Order_Rollup_New, Sales_Product_Rollup_New,
+		                     Sales_Customer_Rollup_New, Employee_Rollup_New;
+		SET o_status = 'Failed';
+	END;
+
+	UPDATE Dwh_Refresh_Status
+	SET Step = 'Creating shadow tables', Steps_Done = 0, Steps_Total = 12, Started_At = NOW()
+	WHERE Status_ID = 1;
+	COMMIT;
+
+	DROP TABLE IF EXISTS Sales_New, Performance_New, Customer_New, Region_New,
+	                     Product_New, Calendar_New, Order_Details_New, Employee_New, Employee_Sales_New,
+	                     Sales_Order_Rollup_New, Sales_Product_Rollup_New,
+	                     Sales_Customer_Rollup_New, Employee_Rollup_New;
+	CREATE TABLE Product_New LIKE Product;
+	CREATE TABLE Calendar_New LIKE Calendar;
+	CREATE TABLE Region_New LIKE Region;
+	CREATE TABLE Employee_New LIKE Employee;
+	CREATE TABLE Customer_New LIKE Customer;
+	CREATE TABLE Order_Details_New LIKE Order_Details;
+	CREATE TABLE Sales_New LIKE Sales;
+	CREATE TABLE Performance_New LIKE Performance;
+	CREATE TABLE Employee_Sales_New LIKE Employee_Sales;
+	CREATE TABLE Sales_Order_Rollup_New LIKE Sales_Order_Rollup;
+	CREATE TABLE Sales_Product_Rollup_New LIKE Sales_Product_Rollup;
+	CREATE TABLE Sales_Customer_Rollup_New LIKE Sales_Customer_Rollup;
+	CREATE TABLE Employee_Rollup_New LIKE Employee_Rollup;
 
 	-- Load Products Table
-	INSERT INTO Product(
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Product', Steps_Done = 1 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Product_New(
 	  Product_Key, Product_ID, Price, discount_percent, 
 	  Model_Year, Product_Name, Brand_Name, 
 	  Category_Name, Inventory_Status
@@ -536,7 +741,9 @@ BEGIN
 	  AND c.category_id = p.category_id;
 
 	-- Load Calendar Table
-	INSERT INTO calendar (
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Calendar', Steps_Done = 2 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Calendar_New (
 	  Calendar_Key, Full_Date, Year, Month, 
 	  Qtr, day_of_month, Week
 	) 
@@ -552,7 +759,9 @@ BEGIN
 	  terrabikes.orders;
 
 	-- Load Region Table
-	INSERT INTO region(Region_Key, Region, State) 
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Region', Steps_Done = 3 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Region_New(Region_Key, Region, State) 
 	SELECT 
 	  DISTINCT NULL, 
 	  region, 
@@ -561,7 +770,9 @@ BEGIN
 	  terrabikes.regions;
 
 	-- Load Employee Table
-	INSERT INTO Employee(
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Employee', Steps_Done = 4 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Employee_New(
 	  Employee_Key, Employee_ID, Employee_Name, 
 	  Employee_Rating
 	) 
@@ -574,7 +785,9 @@ BEGIN
 	  terrabikes.employee;
 
 	-- Load Customer Table
-	INSERT INTO Customer(
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Customer', Steps_Done = 5 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Customer_New(
 	  Customer_Key, customer_id, Customer_Name
 	) 
 	SELECT 
@@ -585,7 +798,9 @@ BEGIN
 	  terrabikes.customer;
 
 	-- Load Order Details Table
-	INSERT INTO Order_Details(
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Order_Details', Steps_Done = 6 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Order_Details_New(
 	  Order_Detail_Key, Order_Id, Order_Detail_ID, 
 	  Order_Date, order_status, Issue_category, Rating, 
 	  status
@@ -630,6 +845,488 @@ BEGIN
 	  od.order_detail_id;
 
 	-- Load Sales Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Sales', Steps_Done = 7 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Sales_New (
+	  Product_Key, Calendar_Key, Order_Detail_Key, 
+	  Region_Key, Customer_Key, Price, 
+	  qty
+	) 
+	SELECT 
+	  p.product_key, 
+	  cd.calendar_key, 
+	  od.order_detail_key, 
+	  r.region_key, 
+	  c.customer_key, 
+	  todd.price, 
+	  todd.quantity 
+	FROM 
+	  terrabikes.orders tod, 
+	  terrabikes.order_details todd, 
+	  terrabikes.customer tc, 
+	  terrabikes.regions tr, 
+	  Customer_New c, 
+	  Region_New r, 
+	  Product_New p, 
+	  Order_Details_New od, 
+	  Calendar_New cd 
+	WHERE 
+	  tod.order_id = todd.order_id 
+	  AND tc.customer_id = tod.customer_id 
+	  AND tr.region_id = tc.region_id 
+	  AND c.customer_id = tc.customer_id 
+	  AND r.state = tr.state_name 
+	  AND r.region = tr.region 
+	  AND p.product_id = todd.product_id 
+	  AND od.order_detail_id = todd.order_detail_id 
+	  AND cd.full_date = od.order_date;
+
+	-- Load Performance Table
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Performance', Steps_Done = 8 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Performance_New (
+	  Calendar_Key, Employee_Key, Region_Key, 
+	  Order_Detail_Key, employee_ratings
+	) 
+	SELECT 
+	  c.calendar_key, 
+	  e.employee_key, 
+	  r.region_key, 
+	  od.order_detail_key, 
+	  te.emp_rating 
+	FROM 
+	  terrabikes.orders tod, 
+	  terrabikes.order_details todd, 
+	  terrabikes.employee te, 
+	  terrabikes.regions tre, 
+	  Calendar_New c, 
+	  Employee_New e, 
+	  Region_New r, 
+	  Order_Details_New od 
+	WHERE 
+	  tod.order_id = todd.order_id 
+	  AND te.employee_id = tod.employee_id 
+	  AND tre.region_id = te.region_id --
+	  AND c.full_date = tod.ordered_date 
+	  AND e.employee_id = tod.employee_id 
+	  AND r.state = tre.state_name 
+	  AND r.region = tre.region 
+	  AND od.order_detail_id = todd.order_detail_id;
+
+	-- Materialize employee_sales_view, the source of every employee dashboard query
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading Employee_Sales', Steps_Done = 9 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Employee_Sales_New (
+	  employee_id, employee_name, year, full_date, order_detail_id,
+	  order_id, rating, price, region, state
+	)
+	SELECT 
+	  e.Employee_ID, 
+	  e.Employee_Name, 
+	  c.Year, 
+	  c.Full_Date, 
+	  od.Order_Detail_ID, 
+	  od.Order_Id, 
+	  od.Rating, 
+	  sa.Price, 
+	  r.Region, 
+	  r.State 
+	FROM 
+	  Calendar_New c, 
+	  Employee_New e, 
+	  Sales_New sa, 
+	  Performance_New p, 
+	  Order_Details_New od, 
+	  Region_New r 
+	WHERE 
+	  c.Calendar_Key = sa.Calendar_Key 
+	  AND e.Employee_Key = p.Employee_Key 
+	  AND p.Order_Detail_Key = sa.Order_Detail_Key 
+	  AND od.Order_Detail_Key = sa.Order_Detail_Key 
+	  AND e.Employee_Name NOT LIKE 'ONLINE DIRECT' 
+	  AND r.Region_Key = p.Region_Key;
+
+	-- Load the rollup tables the dashboards read instead of aggregating the fact tables
+	UPDATE Dwh_Refresh_Status SET Step = 'Loading rollups', Steps_Done = 10 WHERE Status_ID = 1;
+	COMMIT;
+	INSERT INTO Sales_Order_Rollup_New (
+	  Year, Month, Region, State, Order_Status, Order_Count, Line_Count,
+	  Qty, Revenue, Rating_Sum, Rating_Count, First_Date, Last_Date
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  od.order_status, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(*), 
+	  SUM(s.qty), 
+	  SUM(s.Price), 
+	  COALESCE(SUM(od.Rating), 0), 
+	  COUNT(od.Rating), 
+	  MIN(cd.Full_Date), 
+	  MAX(cd.Full_Date) 
+	FROM 
+	  Sales_New s, 
+	  Order_Details_New od, 
+	  Calendar_New cd, 
+	  Region_New r 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, od.order_status;
+
+	INSERT INTO Sales_Product_Rollup_New (
+	  Year, Month, Region, State, Product_Key, Product_Name, Category_Name,
+	  Order_Count, Line_Count, Qty, Revenue
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  p.Product_Key, 
+	  p.Product_Name, 
+	  p.Category_Name, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(*), 
+	  SUM(s.qty), 
+	  SUM(s.Price) 
+	FROM 
+	  Sales_New s, 
+	  Order_Details_New od, 
+	  Calendar_New cd, 
+	  Region_New r, 
+	  Product_New p 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key 
+	  AND p.Product_Key = s.Product_Key
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, p.Product_Key, p.Product_Name, p.Category_Name;
+
+	INSERT INTO Sales_Customer_Rollup_New (
+	  Year, Month, Region, State, Customer_Key, Order_Count
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  s.Customer_Key, 
+	  COUNT(DISTINCT od.Order_Id) 
+	FROM 
+	  Sales_New s, 
+	  Order_Details_New od, 
+	  Calendar_New cd, 
+	  Region_New r 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, s.Customer_Key;
+
+	INSERT INTO Employee_Rollup_New (
+	  Year, Region, State, Employee_ID, Employee_Name, Order_Count,
+	  Rated_Orders, Line_Count, Revenue, Rating_Sum, Rating_Count
+	)
+	SELECT 
+	  year, 
+	  region, 
+	  state, 
+	  employee_id, 
+	  employee_name, 
+	  COUNT(DISTINCT order_id), 
+	  COUNT(DISTINCT CASE WHEN rating >= 4 THEN order_id END), 
+	  COUNT(*), 
+	  SUM(price), 
+	  COALESCE(SUM(rating), 0), 
+	  COUNT(rating) 
+	FROM 
+	  Employee_Sales_New 
+	GROUP BY 
+	  year, region, state, employee_id, employee_name;
+
+	-- Publish the shadow tables in one atomic rename
+	UPDATE Dwh_Refresh_Status SET Step = 'Publishing', Steps_Done = 11 WHERE Status_ID = 1;
+	COMMIT;
+	DROP TABLE IF EXISTS Sales_Old, Performance_Old, Customer_Old, Region_Old,
+	                     Product_Old, Calendar_Old, Order_Details_Old, Employee_Old, Employee_Sales_Old,
+	                     Sales_Order_Rollup_Old, Sales_Product_Rollup_Old,
+	                     Sales_Customer_Rollup_Old, Employee_Rollup_Old;
+	RENAME TABLE
+	  Sales TO Sales_Old, Sales_New TO Sales,
+	  Performance TO Performance_Old, Performance_New TO Performance,
+	  Customer TO Customer_Old, Customer_New TO Customer,
+	  Region TO Region_Old, Region_New TO Region,
+	  Product TO Product_Old, Product_New TO Product,
+	  Calendar TO Calendar_Old, Calendar_New TO Calendar,
+	  Order_Details TO Order_Details_Old, Order_Details_New TO Order_Details,
+	  Employee TO Employee_Old, Employee_New TO Employee,
+	  Employee_Sales TO Employee_Sales_Old, Employee_Sales_New TO Employee_Sales,
+	  Sales_Order_Rollup TO Sales_Order_Rollup_Old, Sales_Order_Rollup_New TO Sales_Order_Rollup,
+	  Sales_Product_Rollup TO Sales_Product_Rollup_Old, Sales_Product_Rollup_New TO Sales_Product_Rollup,
+	  Sales_Customer_Rollup TO Sales_Customer_Rollup_Old, Sales_Customer_Rollup_New TO Sales_Customer_Rollup,
+	  Employee_Rollup TO Employee_Rollup_Old, Employee_Rollup_New TO Employee_Rollup;
+	DROP TABLE Sales_Old, Performance_Old, Customer_Old, Region_Old,
+	           Product_Old, Calendar_Old, Order_Details_Old, Employee_Old, Employee_Sales_Old,
+	           Sales_Order_Rollup_Old, Sales_Product_Rollup_Old,
+	           Sales_Customer_Rollup_Old, Employee_Rollup_Old;
+
+	-- The full load covers every change made up to today
+	UPDATE Dwh_Load_Watermark SET Last_Loaded = CURDATE(), Rows_Touched = 0, Loaded_At = NOW();
+
+	UPDATE Dwh_Refresh_Status
+	SET Step = 'Published', Steps_Done = 12, Generation = Generation + 1, Published_At = NOW()
+	WHERE Status_ID = 1;
+	COMMIT;
+	SET o_status = 'Success';
+END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `refresh_dwh_incr_prc` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `refresh_dwh_incr_prc`(OUT o_status VARCHAR(20))
+BEGIN
+	-- Loads only the source rows created or updated since the last incremental load.
+	-- Dimensions are upserted on their natural keys; the Sales and Performance rows of every
+	-- changed order are deleted and reloaded, and the rollup rows of the months of those orders rebuilt.
+	-- Rows deleted in terrabikes need a full refresh_dwh_prc.
+	DECLARE v_since DATE;
+	DECLARE v_today DATE DEFAULT CURDATE();
+	DECLARE v_product INT DEFAULT 0;
+	DECLARE v_calendar INT DEFAULT 0;
+	DECLARE v_region INT DEFAULT 0;
+	DECLARE v_employee INT DEFAULT 0;
+	DECLARE v_customer INT DEFAULT 0;
+	DECLARE v_order_details INT DEFAULT 0;
+	DECLARE v_sales INT DEFAULT 0;
+	DECLARE v_performance INT DEFAULT 0;
+	DECLARE v_employee_sales INT DEFAULT 0;
+	DECLARE v_rollups INT DEFAULT 0;
+	DECLARE EXIT HANDLER FOR SQLEXCEPTION
+	BEGIN
+		ROLLBACK;
+		DROP TEMPORARY TABLE IF EXISTS tmp_changed_orders;
+		DROP TEMPORARY TABLE IF EXISTS tmp_changed_periods;
+		SET o_status = 'Failed';
+	END;
+
+	-- Dates are day granular, so rows changed on the watermark day are examined again
+	SELECT COALESCE(MIN(Last_Loaded), '1000-01-01') INTO v_since FROM Dwh_Load_Watermark;
+
+	START TRANSACTION;
+
+	-- Orders whose fact rows must be reloaded
+	DROP TEMPORARY TABLE IF EXISTS tmp_changed_orders;
+	CREATE TEMPORARY TABLE tmp_changed_orders (order_id INT PRIMARY KEY);
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT order_id FROM terrabikes.orders
+	WHERE GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since;
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT order_id FROM terrabikes.order_details
+	WHERE GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since;
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT order_id FROM terrabikes.feedback
+	WHERE GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since;
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT o.order_id FROM terrabikes.orders o, terrabikes.customer c
+	WHERE c.customer_id = o.customer_id
+	  AND GREATEST(c.creation_date, COALESCE(c.updated_date, c.creation_date)) >= v_since;
+	INSERT IGNORE INTO tmp_changed_orders
+	SELECT o.order_id FROM terrabikes.orders o, terrabikes.employee e
+	WHERE e.employee_id = o.employee_id
+	  AND GREATEST(e.creation_date, COALESCE(e.updated_date, e.creation_date)) >= v_since;
+
+	-- Months whose rollup rows must be rebuilt: the old and the new order dates of the changed orders
+	DROP TEMPORARY TABLE IF EXISTS tmp_changed_periods;
+	CREATE TEMPORARY TABLE tmp_changed_periods (Year INT, Month INT, PRIMARY KEY (Year, Month));
+	INSERT IGNORE INTO tmp_changed_periods
+	SELECT DISTINCT YEAR(od.Order_Date), MONTH(od.Order_Date)
+	FROM Order_Details od, tmp_changed_orders t
+	WHERE od.Order_Id = t.order_id;
+	INSERT IGNORE INTO tmp_changed_periods
+	SELECT DISTINCT YEAR(o.ordered_date), MONTH(o.ordered_date)
+	FROM terrabikes.orders o, tmp_changed_orders t
+	WHERE o.order_id = t.order_id;
+
+	-- Upsert Products Table
+	INSERT INTO Product(
+	  Product_Key, Product_ID, Price, discount_percent, 
+	  Model_Year, Product_Name, Brand_Name, 
+	  Category_Name, Inventory_Status
+	) 
+	SELECT 
+	  NULL product_key, 
+	  p.product_id, 
+	  p.price, 
+	  p.discount_percent, 
+	  p.model_year, 
+	  p.product_name, 
+	  b.brand_name, 
+	  c.category_name, 
+	  p.inventory_status 
+	FROM 
+	  terrabikes.products p, 
+	  terrabikes.brand b, 
+	  terrabikes.category c 
+	WHERE 
+	  b.brand_id = p.brand_id 
+	  AND c.category_id = p.category_id
+	  AND GREATEST(p.creation_date, COALESCE(p.updated_date, p.creation_date),
+	               COALESCE(b.updated_date, b.creation_date),
+	               COALESCE(c.updated_date, c.creation_date)) >= v_since
+	ON DUPLICATE KEY UPDATE
+	  Price = VALUES(Price),
+	  discount_percent = VALUES(discount_percent),
+	  Model_Year = VALUES(Model_Year),
+	  Product_Name = VALUES(Product_Name),
+	  Brand_Name = VALUES(Brand_Name),
+	  Category_Name = VALUES(Category_Name),
+	  Inventory_Status = VALUES(Inventory_Status);
+	SET v_product = ROW_COUNT();
+
+	-- Add new Calendar dates
+	INSERT IGNORE INTO calendar (
+	  Calendar_Key, Full_Date, Year, Month, 
+	  Qtr, day_of_month, Week
+	) 
+	SELECT 
+	  DISTINCT NULL, 
+	  o.ordered_date, 
+	  YEAR(o.ordered_date), 
+	  MONTH(o.ordered_date), 
+	  QUARTER(o.ordered_date), 
+	  DAY(o.ordered_date), 
+	  WEEK(o.ordered_date) 
+	FROM 
+	  terrabikes.orders o, 
+	  tmp_changed_orders t 
+	WHERE 
+	  o.order_id = t.order_id;
+	SET v_calendar = ROW_COUNT();
+
+	-- Add new Regions
+	INSERT IGNORE INTO region(Region_Key, Region, State) 
+	SELECT 
+	  DISTINCT NULL, 
+	  region, 
+	  state_name 
+	FROM 
+	  terrabikes.regions
+	WHERE 
+	  DATE(GREATEST(creation_date, COALESCE(updated_date, creation_date))) >= v_since;
+	SET v_region = ROW_COUNT();
+
+	-- Upsert Employee Table
+	INSERT INTO Employee(
+	  Employee_Key, Employee_ID, Employee_Name, 
+	  Employee_Rating
+	) 
+	SELECT 
+	  NULL, 
+	  employee_id, 
+	  CONCAT(first_name, ' ', last_name) employee_name, 
+	  emp_rating 
+	FROM 
+	  terrabikes.employee
+	WHERE 
+	  GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since
+	ON DUPLICATE KEY UPDATE
+	  Employee_Name = VALUES(Employee_Name),
+	  Employee_Rating = VALUES(Employee_Rating);
+	SET v_employee = ROW_COUNT();
+
+	-- Upsert Customer Table
+	INSERT INTO Customer(
+	  Customer_Key, customer_id, Customer_Name
+	) 
+	SELECT 
+	  NULL, 
+	  customer_id, 
+	  CONCAT(first_name, ' ', last_name) customer_name 
+	FROM 
+	  terrabikes.customer
+	WHERE 
+	  GREATEST(creation_date, COALESCE(updated_date, creation_date)) >= v_since
+	ON DUPLICATE KEY UPDATE
+	  Customer_Name = VALUES(Customer_Name);
+	SET v_customer = ROW_COUNT();
+
+	-- Upsert Order Details of the changed orders
+	INSERT INTO Order_Details(
+	  Order_Detail_Key, Order_Id, Order_Detail_ID, 
+	  Order_Date, order_status, Issue_category, Rating, 
+	  status
+	) 
+	SELECT 
+	  NULL, 
+	  o.order_id, 
+	  od.order_detail_id, 
+	  o.ordered_date, 
+	  o.order_status,
+	  (
+		SELECT 
+		  f.grevience_category 
+		FROM 
+		  terrabikes.feedback f 
+		WHERE 
+		  order_id = o.order_id 
+		  AND record_type = 'GREVIANCE'
+	  ) Issue_category, 
+	  (
+		SELECT 
+		  f.rating 
+		FROM 
+		  terrabikes.feedback f 
+		WHERE 
+		  order_id = o.order_id 
+		  AND record_type = 'FEEDBACK'
+	  ) rating, 
+	  (
+		SELECT 
+		  f.status 
+		FROM 
+		  terrabikes.feedback f 
+		WHERE 
+		  order_id = o.order_id 
+		  AND record_type = 'GREVIANCE'
+	  ) status 
+	FROM 
+	  terrabikes.orders o 
+	  JOIN tmp_changed_orders t ON t.order_id = o.order_id 
+	  JOIN terrabikes.order_details od ON od.order_id = o.order_id 
+	ORDER BY 
+	  od.order_detail_id
+	ON DUPLICATE KEY UPDATE
+	  Order_Id = VALUES(Order_Id),
+	  Order_Date = VALUES(Order_Date),
+	  order_status = VALUES(order_status),
+	  Issue_category = VALUES(Issue_category),
+	  Rating = VALUES(Rating),
+	  status = VALUES(status);
+	SET v_order_details = ROW_COUNT();
+
+	-- Reload Sales rows of the changed orders
+	DELETE s FROM Sales s, Order_Details od, tmp_changed_orders t
+	WHERE s.Order_Detail_Key = od.Order_Detail_Key
+	  AND od.Order_Id = t.order_id;
 	INSERT INTO Sales (
 	  Product_Key, Calendar_Key, Order_Detail_Key, 
 	  Region_Key, Customer_Key, Price, 
@@ -644,6 +1341,7 @@ BEGIN
 	  todd.price, 
 	  todd.quantity 
 	FROM 
+	  tmp_changed_orders t, 
 	  terrabikes.orders tod, 
 	  terrabikes.order_details todd, 
 	  terrabikes.customer tc, 
@@ -654,7 +1352,8 @@ BEGIN
 	  order_details od, 
 	  calendar cd 
 	WHERE 
-	  tod.order_id = todd.order_id 
+	  tod.order_id = t.order_id 
+	  AND tod.order_id = todd.order_id 
 	  AND tc.customer_id = tod.customer_id 
 	  AND tr.region_id = tc.region_id 
 	  AND c.customer_id = tc.customer_id 
@@ -663,8 +1362,12 @@ BEGIN
 	  AND p.product_id = todd.product_id 
 	  AND od.order_detail_id = todd.order_detail_id 
 	  AND cd.full_date = od.order_date;
+	SET v_sales = ROW_COUNT();
 
-	-- Load Performance Table
+	-- Reload Performance rows of the changed orders
+	DELETE pf FROM Performance pf, Order_Details od, tmp_changed_orders t
+	WHERE pf.Order_Detail_Key = od.Order_Detail_Key
+	  AND od.Order_Id = t.order_id;
 	INSERT INTO Performance (
 	  Calendar_Key, Employee_Key, Region_Key, 
 	  Order_Detail_Key, employee_ratings
@@ -676,6 +1379,7 @@ BEGIN
 	  od.order_detail_key, 
 	  te.emp_rating 
 	FROM 
+	  tmp_changed_orders t, 
 	  terrabikes.orders tod, 
 	  terrabikes.order_details todd, 
 	  terrabikes.employee te, 
@@ -685,16 +1389,208 @@ BEGIN
 	  region r, 
 	  order_details od 
 	WHERE 
-	  tod.order_id = todd.order_id 
+	  tod.order_id = t.order_id 
+	  AND tod.order_id = todd.order_id 
 	  AND te.employee_id = tod.employee_id 
-	  AND tre.region_id = te.region_id --
+	  AND tre.region_id = te.region_id 
 	  AND c.full_date = tod.ordered_date 
 	  AND e.employee_id = tod.employee_id 
 	  AND r.state = tre.state_name 
 	  AND r.region = tre.region 
 	  AND od.order_detail_id = todd.order_detail_id;
+	SET v_performance = ROW_COUNT();
+
+	-- Reload the materialized employee sales of the changed orders
+	DELETE es FROM Employee_Sales es, tmp_changed_orders t
+	WHERE es.order_id = t.order_id;
+	INSERT INTO Employee_Sales (
+	  employee_id, employee_name, year, full_date, order_detail_id,
+	  order_id, rating, price, region, state
+	)
+	SELECT 
+	  e.Employee_ID, 
+	  e.Employee_Name, 
+	  c.Year, 
+	  c.Full_Date, 
+	  od.Order_Detail_ID, 
+	  od.Order_Id, 
+	  od.Rating, 
+	  sa.Price, 
+	  r.Region, 
+	  r.State 
+	FROM 
+	  tmp_changed_orders t, 
+	  Calendar c, 
+	  Employee e, 
+	  Sales sa, 
+	  Performance p, 
+	  Order_Details od, 
+	  Region r 
+	WHERE 
+	  c.Calendar_Key = sa.Calendar_Key 
+	  AND e.Employee_Key = p.Employee_Key 
+	  AND p.Order_Detail_Key = sa.Order_Detail_Key 
+	  AND od.Order_Detail_Key = sa.Order_Detail_Key 
+	  AND e.Employee_Name NOT LIKE 'ONLINE DIRECT' 
+	  AND r.Region_Key = p.Region_Key 
+	  AND od.Order_Id = t.order_id;
+	SET v_employee_sales = ROW_COUNT();
+
+	-- Rebuild the rollup rows of every month with a changed order (by year for employees)
+	DELETE r FROM Sales_Order_Rollup r, tmp_changed_periods tp
+	WHERE r.Year = tp.Year AND r.Month = tp.Month;
+	DELETE r FROM Sales_Product_Rollup r, tmp_changed_periods tp
+	WHERE r.Year = tp.Year AND r.Month = tp.Month;
+	DELETE r FROM Sales_Customer_Rollup r, tmp_changed_periods tp
+	WHERE r.Year = tp.Year AND r.Month = tp.Month;
+	DELETE FROM Employee_Rollup WHERE Year IN (SELECT Year FROM tmp_changed_periods);
+	INSERT INTO Sales_Order_Rollup (
+	  Year, Month, Region, State, Order_Status, Order_Count, Line_Count,
+	  Qty, Revenue, Rating_Sum, Rating_Count, First_Date, Last_Date
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  od.order_status, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(*), 
+	  SUM(s.qty), 
+	  SUM(s.Price), 
+	  COALESCE(SUM(od.Rating), 0), 
+	  COUNT(od.Rating), 
+	  MIN(cd.Full_Date), 
+	  MAX(cd.Full_Date) 
+	FROM 
+	  tmp_changed_periods tp, 
+	  Sales s, 
+	  Order_Details od, 
+	  Calendar cd, 
+	  Region r 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key 
+	  AND tp.Year = cd.Year AND tp.Month = cd.Month
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, od.order_status;
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	INSERT INTO Sales_Product_Rollup (
+	  Year, Month, Region, State, Product_Key, Product_Name, Category_Name,
+	  Order_Count, Line_Count, Qty, Revenue
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  p.Product_Key, 
+	  p.Product_Name, 
+	  p.Category_Name, 
+	  COUNT(DISTINCT od.Order_Id), 
+	  COUNT(*), 
+	  SUM(s.qty), 
+	  SUM(s.Price) 
+	FROM 
+	  tmp_changed_periods tp, 
+	  Sales s, 
+	  Order_Details od, 
+	  Calendar cd, 
+	  Region r, 
+	  Product p 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key 
+	  AND p.Product_Key = s.Product_Key 
+	  AND tp.Year = cd.Year AND tp.Month = cd.Month
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, p.Product_Key, p.Product_Name, p.Category_Name;
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	INSERT INTO Sales_Customer_Rollup (
+	  Year, Month, Region, State, Customer_Key, Order_Count
+	)
+	SELECT 
+	  cd.Year, 
+	  cd.Month, 
+	  r.Region, 
+	  r.State, 
+	  s.Customer_Key, 
+	  COUNT(DISTINCT od.Order_Id) 
+	FROM 
+	  tmp_changed_periods tp, 
+	  Sales s, 
+	  Order_Details od, 
+	  Calendar cd, 
+	  Region r 
+	WHERE 
+	  od.Order_Detail_Key = s.Order_Detail_Key 
+	  AND cd.Calendar_Key = s.Calendar_Key 
+	  AND r.Region_Key = s.Region_Key 
+	  AND tp.Year = cd.Year AND tp.Month = cd.Month
+	GROUP BY 
+	  cd.Year, cd.Month, r.Region, r.State, s.Customer_Key;
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	INSERT INTO Employee_Rollup (
+	  Year, Region, State, Employee_ID, Employee_Name, Order_Count,
+	  Rated_Orders, Line_Count, Revenue, Rating_Sum, Rating_Count
+	)
+	SELECT 
+	  year, 
+	  region, 
+	  state, 
+	  employee_id, 
+	  employee_name, 
+	  COUNT(DISTINCT order_id), 
+	  COUNT(DISTINCT CASE WHEN rating >= 4 THEN order_id END), 
+	  COUNT(*), 
+	  SUM(price), 
+	  COALESCE(SUM(rating), 0), 
+	  COUNT(rating) 
+	FROM 
+	  Employee_Sales 
+	WHERE 
+	  year IN (SELECT Year FROM tmp_changed_periods) 
+	GROUP BY 
+	  year, region, state, employee_id, employee_name;
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	-- Product renames and category moves do not change any order, update the names in place
+	UPDATE Sales_Product_Rollup r, Product p
+	SET r.Product_Name = p.Product_Name, r.Category_Name = p.Category_Name
+	WHERE p.Product_Key = r.Product_Key
+	  AND (r.Product_Name <> p.Product_Name OR r.Category_Name <> p.Category_Name);
+	SET v_rollups = v_rollups + ROW_COUNT();
+
+	-- Move the watermarks and record the rows touched per table
+	INSERT INTO Dwh_Load_Watermark (Table_Name, Last_Loaded, Rows_Touched, Loaded_At)
+	VALUES ('Product', v_today, v_product, NOW()),
+	       ('Calendar', v_today, v_calendar, NOW()),
+	       ('Region', v_today, v_region, NOW()),
+	       ('Employee', v_today, v_employee, NOW()),
+	       ('Customer', v_today, v_customer, NOW()),
+	       ('Order_Details', v_today, v_order_details, NOW()),
+	       ('Sales', v_today, v_sales, NOW()),
+	       ('Performance', v_today, v_performance, NOW()),
+	       ('Employee_Sales', v_today, v_employee_sales, NOW()),
+	       ('Rollups', v_today, v_rollups, NOW())
+	ON DUPLICATE KEY UPDATE
+	  Last_Loaded = VALUES(Last_Loaded),
+	  Rows_Touched = VALUES(Rows_Touched),
+	  Loaded_At = VALUES(Loaded_At);
+
+	UPDATE Dwh_Refresh_Status
+	SET Step = 'Published', Generation = Generation + 1, Published_At = NOW()
+	WHERE Status_ID = 1;
 
-  SET o_status = 'Success';
+	COMMIT;
+	DROP TEMPORARY TABLE IF EXISTS tmp_changed_orders;
+	DROP TEMPORARY TABLE IF EXISTS tmp_changed_periods;
+	SET o_status = 'Success';
 END ;;
 DELIMITER ;
 /*!50003 SET sql_mode              = @saved_sql_mode */ ;
@@ -713,9 +1609,9 @@ DELIMITER ;
 /*!50001 SET character_set_client      = utf8mb4 */;
 /*!50001 SET character_set_results     = utf8mb4 */;
 /*!50001 SET collation_connection      = utf8mb4_0900_ai_ci */;
-/*!50001 CREATE ALGORITHM=UNDEFINED */
+/*!50001 CREATE ALGORITHM=MERGE */
 /*!50013 DEFINER=`root`@`localhost` SQL SECURITY DEFINER */
-/*!50001 VIEW `employee_sales_view` AS select `e`.`Employee_ID` AS `employee_id`,`e`.`Employee_Name` AS `employee_name`,`c`.`Year` AS `year`,`c`.`Full_Date` AS `full_date`,`od`.`Order_Detail_ID` AS `order_detail_id`,`od`.`Order_Id` AS `order_id`,`od`.`Rating` AS `rating`,`sa`.`Price` AS `price`,`r`.`Region` AS `region`,`r`.`State` AS `state` from (((((`calendar` `c` join `employee` `e`) join `sales` `sa`) join `performance` `p`) join `order_details` `od`) join `region` `r`) where ((`c`.`Calendar_Key` = `sa`.`Calendar_Key`) and (`e`.`Employee_Key` = `p`.`Employee_Key`) and (`p`.`Order_Detail_Key` = `sa`.`Order_Detail_Key`) and (`od`.`Order_Detail_Key` = `sa`.`Order_Detail_Key`) and (not((`e`.`Employee_Name` like 'ONLINE DIRECT'))) and (`r`.`Region_Key` = `p`.`Region_Key`)) */;
+/*!50001 VIEW `employee_sales_view` AS select `employee_sales`.`employee_id` AS `employee_id`,`employee_sales`.`employee_name` AS `employee_name`,`employee_sales`.`year` AS `year`,`employee_sales`.`full_date` AS `full_date`,`employee_sales`.`order_detail_id` AS `order_detail_id`,`employee_sales`.`order_id` AS `order_id`,`employee_sales`.`rating` AS `rating`,`employee_sales`.`price` AS `price`,`employee_sales`.`region` AS `region`,`employee_sales`.`state` AS `state` from `employee_sales` */;
 /*!50001 SET character_set_client      = @saved_cs_client */;
 /*!50001 SET character_set_results     = @saved_cs_results */;
 /*!50001 SET collation_connection      = @saved_col_connection */;